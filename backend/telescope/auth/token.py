@@ -1,31 +1,149 @@
+import copy
+import hashlib
+from threading import Lock
+from typing import Optional
+
+from cachetools import TTLCache
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from rest_framework.authentication import BaseAuthentication
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, Throttled
 
+from telescope.cache import VersionedCache
 from telescope.models import APIToken
 
+# shared cache key of the tokens version, bumped by every process that
+# changes API tokens or deletes users
+TOKENS_VERSION_KEY = "telescope:auth:tokens_version"
+MAX_FAILING_CLIENTS = 10000
+
+_tokens_cache: Optional[VersionedCache] = None
+_invalid_tokens_cache: Optional[VersionedCache] = None
+# invalid tokens sent by each client address, per process
+_failures: Optional[TTLCache] = None
+_tokens_cache_lock = Lock()
+
+
+def _create_tokens_caches():
+    global _tokens_cache, _invalid_tokens_cache, _failures
+    config = settings.CONFIG["auth"]["token_cache"]
+    kwargs = {
+        "enabled": config["enabled"],
+        "shared": config["shared"],
+        "version_check_interval": config["version_check_interval"],
+    }
+    _invalid_tokens_cache = VersionedCache(
+        TOKENS_VERSION_KEY, ttl=config["invalid_ttl"], **kwargs
+    )
+    _failures = TTLCache(maxsize=MAX_FAILING_CLIENTS, ttl=config["failures_window"])
+    _tokens_cache = VersionedCache(TOKENS_VERSION_KEY, ttl=config["ttl"], **kwargs)
+
+
+def get_tokens_cache() -> VersionedCache:
+    """
+    Users by token hash.
+    """
+    if _tokens_cache is None:
+        with _tokens_cache_lock:
+            if _tokens_cache is None:
+                _create_tokens_caches()
+    return _tokens_cache
+
+
+def get_invalid_tokens_cache() -> VersionedCache:
+    """
+    Hashes of unknown tokens, kept apart so that they never evict valid ones.
+    """
+    get_tokens_cache()
+    return _invalid_tokens_cache
+
+
+def get_token_failures() -> TTLCache:
+    """
+    Invalid tokens sent by each client address.
+    """
+    get_tokens_cache()
+    return _failures
+
+
+def bump_tokens_version():
+    """
+    Invalidates cached tokens now, and again once the current transaction is
+    committed.
+    """
+    for tokens_cache in (get_tokens_cache(), get_invalid_tokens_cache()):
+        tokens_cache.bump()
+        transaction.on_commit(tokens_cache.bump)
+
+
+def get_token_hash(token: str) -> str:
+    # tokens are never kept in memory as they are
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class TokenAuth(BaseAuthentication):
+    @staticmethod
+    def _get_testing_user():
+        model = get_user_model()
+        user, created = model.objects.get_or_create(
+            username=settings.CONFIG["auth"]["testing_auth_username"],
+            defaults={
+                "is_superuser": True,
+            },
+        )
+        return user
+
+    @staticmethod
+    def _load_token_user(token: str):
+        # raises APIToken.DoesNotExist, which is not cached here
+        return APIToken.objects.select_related("user").get(token=token).user
+
+    def _check_failures(self, request):
+        max_failures = settings.CONFIG["auth"]["token_cache"]["max_failures"]
+        if not max_failures:
+            return
+        token_failures = get_token_failures()
+        with _tokens_cache_lock:
+            failures = token_failures.get(request.META.get("REMOTE_ADDR"), 0)
+        if failures >= max_failures:
+            raise Throttled(wait=token_failures.ttl)
+
+    def _add_failure(self, request):
+        if not settings.CONFIG["auth"]["token_cache"]["max_failures"]:
+            return
+        token_failures = get_token_failures()
+        client = request.META.get("REMOTE_ADDR")
+        with _tokens_cache_lock:
+            # the window is restarted by every failure
+            token_failures[client] = token_failures.get(client, 0) + 1
+
     def authenticate(self, request):
         if settings.CONFIG["auth"]["enable_testing_auth"]:
-            model = get_user_model()
-            user, created = model.objects.get_or_create(
-                username=settings.CONFIG["auth"]["testing_auth_username"],
-                defaults={
-                    "is_superuser": True,
-                },
-            )
-            return user, None
+            user = get_tokens_cache().get(("testing",), self._get_testing_user)
+            return copy.copy(user), None
         else:
             auth_header = request.headers.get("Authorization")
             if not auth_header or not auth_header.startswith("Token "):
                 return None
             token = auth_header.split(" ", 1)[1].strip()
+            token_hash = get_token_hash(token)
+            tokens_cache = get_tokens_cache()
+            invalid_tokens_cache = get_invalid_tokens_cache()
+            # tokens known to be valid are never throttled, only lookups are
+            if token_hash not in tokens_cache:
+                self._check_failures(request)
             try:
-                api_token = APIToken.objects.select_related("user").get(token=token)
+                if token_hash in invalid_tokens_cache:
+                    raise APIToken.DoesNotExist
+                user = tokens_cache.get(
+                    token_hash, lambda: self._load_token_user(token)
+                )
             except APIToken.DoesNotExist:
+                invalid_tokens_cache.get(token_hash, lambda: True)
+                self._add_failure(request)
                 raise AuthenticationFailed("Permission denied")
 
-            return api_token.user, None
+            # users are shared by the requests of a process, never modified
+            return copy.copy(user), None
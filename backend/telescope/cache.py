@@ -0,0 +1,167 @@
+import copy
+import time
+import logging
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from telescope.models import Source
+
+logger = logging.getLogger("telescope.cache")
+
+
+class VersionedCache:
+    """
+    Per-process read-through cache whose entries are tagged with the version
+    they were loaded at and reloaded once it changes. The version is made of
+    a local counter and, when `shared`, a counter kept in the Django cache
+    under `version_key`, read at most every `version_check_interval`
+    seconds, so that bumps made by other processes are seen too. `ttl`
+    bounds the life of entries whatever the version.
+    """
+
+    def __init__(
+        self,
+        version_key: str,
+        enabled: bool = True,
+        ttl: float = 300,
+        shared: bool = True,
+        version_check_interval: float = 1,
+        maxsize: int = 10000,
+    ):
+        self.version_key = version_key
+        self.enabled = enabled
+        self.shared = shared
+        self.version_check_interval = version_check_interval
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._local_version = 0
+        self._shared_version: Any = None
+        self._checked_at: Optional[float] = None
+        self._lock = Lock()
+
+    def _read_shared_version(self) -> Any:
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.version_check_interval
+        ):
+            return self._shared_version
+        try:
+            version = cache.get(self.version_key, 0)
+        except Exception as err:
+            logger.warning("failed to read %s: %s", self.version_key, err)
+            version = self._shared_version
+        with self._lock:
+            self._shared_version = version
+            self._checked_at = now
+        return version
+
+    def version(self) -> Tuple[Any, int]:
+        shared_version = self._read_shared_version() if self.shared else None
+        return shared_version, self._local_version
+
+    def __contains__(self, key: Hashable) -> bool:
+        if not self.enabled:
+            return False
+        version = self.version()
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and entry[0] == version
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return load()
+        # taken before loading: a change made meanwhile invalidates the entry
+        version = self.version()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+    def bump(self):
+        with self._lock:
+            self._local_version += 1
+            self._entries.clear()
+        if not self.shared:
+            return
+        try:
+            try:
+                version = cache.incr(self.version_key)
+            except ValueError:
+                # missing or expired
+                cache.add(self.version_key, 1, timeout=None)
+                version = cache.get(self.version_key)
+        except Exception as err:
+            logger.warning("failed to bump %s: %s", self.version_key, err)
+            return
+        with self._lock:
+            self._shared_version = version
+            self._checked_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# shared cache key of the sources version, bumped by every process that
+# changes sources or connections
+SOURCES_VERSION_KEY = "telescope:sources_version"
+
+_sources_cache: Optional[VersionedCache] = None
+_sources_cache_lock = Lock()
+
+
+def get_sources_cache() -> VersionedCache:
+    """
+    Sources with their connection by slug, None for unknown slugs.
+    """
+    global _sources_cache
+    if _sources_cache is None:
+        with _sources_cache_lock:
+            if _sources_cache is None:
+                config = settings.CONFIG["sources_cache"]
+                _sources_cache = VersionedCache(
+                    SOURCES_VERSION_KEY,
+                    enabled=config["enabled"],
+                    ttl=config["ttl"],
+                    shared=config["shared"],
+                    version_check_interval=config["version_check_interval"],
+                )
+    return _sources_cache
+
+
+def bump_sources_version():
+    """
+    Invalidates cached sources now, and again once the current transaction
+    is committed.
+    """
+    sources_cache = get_sources_cache()
+    sources_cache.bump()
+    transaction.on_commit(sources_cache.bump)
+
+
+def _load_source(slug: str) -> Optional[Source]:
+    return Source.objects.select_related("conn").filter(slug=slug).first()
+
+
+def get_source_snapshot(slug: str) -> Optional[Source]:
+    """
+    Source `slug` with its connection, without permissions, from the
+    per-process cache. Each call returns its own shallow copy, so that
+    permissions can be added to it; the copies share the decoded column
+    and connection data, which must not be modified.
+    """
+    source = get_sources_cache().get(slug, lambda: _load_source(slug))
+    if source is None:
+        return None
+    snapshot = copy.copy(source)
+    snapshot.permissions = set()
+    return snapshot
@@ -31,7 +31,7 @@ class ParsedColumn:
 
 
 def parse_columns(source, text):
-    flyql_columns = parse_columns_flyql(text)
+    flyql_columns = parse_columns_flyql(text, {"transformers": True})
     parsed_columns = []
 
     for flyql_col in flyql_columns:
@@ -59,7 +59,11 @@ def parse_columns(source, text):
                 type=source_column.type,
                 jsonstring=source_column.jsonstring,
                 display_name=display_name,
-                modifiers=flyql_col.modifiers,
+                # without the source ranges, which are not serializable
+                modifiers=[
+                    {"name": item["name"], "arguments": item["arguments"]}
+                    for item in flyql_col.transformers
+                ],
             )
         )
 
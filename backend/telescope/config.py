@@ -45,6 +45,37 @@ SCHEMA = {
                 "testing_auth_username": {
                     "type": "string",
                 },
+                "token_cache": {
+                    "type": "object",
+                    "properties": {
+                        "enabled": {
+                            "type": "boolean",
+                        },
+                        "ttl": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "invalid_ttl": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "shared": {
+                            "type": "boolean",
+                        },
+                        "version_check_interval": {
+                            "type": "number",
+                            "minimum": 0,
+                        },
+                        "max_failures": {
+                            "type": "integer",
+                            "minimum": 0,
+                        },
+                        "failures_window": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                    },
+                },
             },
         },
         "limits": {
@@ -65,6 +96,138 @@ SCHEMA = {
         "logging": {
             "type": "object",
         },
+        "fetchers": {
+            "type": "object",
+            "properties": {
+                "scheduler": {
+                    "type": "object",
+                    "properties": {
+                        "max_workers": {
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                        "max_per_request": {
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                        "timeout": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                    },
+                },
+                "parse_pool": {
+                    "type": "object",
+                    "properties": {
+                        "max_workers": {
+                            "type": "integer",
+                            "minimum": 0,
+                        },
+                        "min_chunk_size": {
+                            "type": "integer",
+                            "minimum": 0,
+                        },
+                    },
+                },
+                "deadline": {
+                    "type": "object",
+                    "properties": {
+                        "timeout": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "max_timeout": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                    },
+                },
+                "health": {
+                    "type": "object",
+                    "properties": {
+                        "enabled": {
+                            "type": "boolean",
+                        },
+                        "failure_threshold": {
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                        "error_rate_threshold": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                            "maximum": 1,
+                        },
+                        "window": {
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                        "probe_interval": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                    },
+                },
+                "docker_inventory": {
+                    "type": "object",
+                    "properties": {
+                        "watch_events": {
+                            "type": "boolean",
+                        },
+                        "resync_interval": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "idle_timeout": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                    },
+                },
+            },
+        },
+        "sources_cache": {
+            "type": "object",
+            "properties": {
+                "enabled": {
+                    "type": "boolean",
+                },
+                "ttl": {
+                    "type": "number",
+                    "exclusiveMinimum": 0,
+                },
+                "shared": {
+                    "type": "boolean",
+                },
+                "version_check_interval": {
+                    "type": "number",
+                    "minimum": 0,
+                },
+            },
+        },
+        "rbac": {
+            "type": "object",
+            "properties": {
+                "permissions_cache": {
+                    "type": "object",
+                    "properties": {
+                        "enabled": {
+                            "type": "boolean",
+                        },
+                        "ttl": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "shared": {
+                            "type": "boolean",
+                        },
+                        "version_check_interval": {
+                            "type": "number",
+                            "minimum": 0,
+                        },
+                    },
+                },
+            },
+        },
         "frontend": {
             "type": "object",
             "properties": {
@@ -181,6 +344,47 @@ def get_default_config():
         "limits": {
             "max_saved_views_per_user": 0,
         },
+        "fetchers": {
+            "scheduler": {
+                "max_workers": 64,
+                "max_per_request": 32,
+                "timeout": 100,
+            },
+            "parse_pool": {
+                "max_workers": 0,
+                "min_chunk_size": 1048576,
+            },
+            "deadline": {
+                "timeout": 60,
+                "max_timeout": 110,
+            },
+            "health": {
+                "enabled": True,
+                "failure_threshold": 5,
+                "error_rate_threshold": 0.5,
+                "window": 20,
+                "probe_interval": 10,
+            },
+            "docker_inventory": {
+                "watch_events": True,
+                "resync_interval": 300,
+                "idle_timeout": 900,
+            },
+        },
+        "sources_cache": {
+            "enabled": True,
+            "ttl": 300,
+            "shared": True,
+            "version_check_interval": 1,
+        },
+        "rbac": {
+            "permissions_cache": {
+                "enabled": True,
+                "ttl": 300,
+                "shared": True,
+                "version_check_interval": 1,
+            },
+        },
         "auth": {
             "providers": {
                 "github": {
@@ -209,6 +413,15 @@ def get_default_config():
             "local_login_secret_path": None,
             "enable_testing_auth": False,
             "testing_auth_username": "telescope",
+            "token_cache": {
+                "enabled": True,
+                "ttl": 300,
+                "invalid_ttl": 60,
+                "shared": True,
+                "version_check_interval": 1,
+                "max_failures": 0,
+                "failures_window": 60,
+            },
         },
         "frontend": {
             "github_url": "https://github.com/iamtelescope/telescope",
@@ -0,0 +1,92 @@
+import heapq
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from telescope.constants import UTC_ZONE
+from telescope.fetchers.graph_utils import GraphCounter, GroupNames
+from telescope.fetchers.matcher import compile_query
+
+# graph points counted at once by GraphCounter.add_many
+GRAPH_BATCH_SIZE = 8192
+
+
+class ContainerResult:
+    """
+    Compact outcome of processing one container's logs: the newest `limit`
+    matching entries, the number of matching entries and, when requested,
+    their graph counts.
+    """
+
+    __slots__ = ("entries", "matched", "counter")
+
+    def __init__(
+        self,
+        entries: List[Any],
+        matched: int,
+        counter: Optional[GraphCounter] = None,
+    ):
+        self.entries = entries
+        self.matched = matched
+        self.counter = counter
+
+
+def entry_unixtime(entry, tz: ZoneInfo = UTC_ZONE) -> int:
+    dt = entry.timestamp
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=tz)
+    return int(dt.timestamp() * 1000)
+
+
+def aggregate_container_log(
+    parse_lines: Callable[[Any, Any], Iterable],
+    raw_logs,
+    meta,
+    query: str = "",
+    limit: int = 0,
+    graph_range: Optional[Tuple[int, int]] = None,
+    group_by=None,
+    tz: ZoneInfo = UTC_ZONE,
+) -> ContainerResult:
+    """
+    Parses raw logs of a single container with `parse_lines(raw_logs, meta)`,
+    then filters and pre-aggregates the entries in one pass. Entries have a
+    `timestamp` and an `as_dict()` method. Only `limit` entries are
+    retained, the rest are just counted. Safe to run in a parse pool worker
+    as long as `parse_lines` can be pickled.
+    """
+    predicate = compile_query(query) if query else None
+    counter = GraphCounter(*graph_range) if graph_range else None
+    group_names = GroupNames(group_by)
+    matched = 0
+    ts_ms: List[int] = []
+    names: List[str] = []
+
+    def matching():
+        nonlocal matched
+        for entry in parse_lines(raw_logs, meta):
+            data = None
+            if predicate is not None:
+                data = entry.as_dict()
+                if not predicate(data):
+                    continue
+            matched += 1
+            if counter is not None:
+                ts_ms.append(entry_unixtime(entry, tz))
+                names.append(
+                    group_names(data or entry.as_dict()) if group_by else "Rows"
+                )
+                if len(ts_ms) >= GRAPH_BATCH_SIZE:
+                    counter.add_many(ts_ms, names)
+                    ts_ms.clear()
+                    names.clear()
+            yield entry
+
+    entries = []
+    if limit > 0:
+        entries = heapq.nlargest(limit, matching(), key=lambda e: entry_unixtime(e, tz))
+    else:
+        for _ in matching():
+            pass
+    if counter is not None:
+        counter.add_many(ts_ms, names)
+    return ContainerResult(entries=entries, matched=matched, counter=counter)
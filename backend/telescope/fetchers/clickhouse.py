@@ -1,15 +1,19 @@
 import os
+import time
 import logging
 import tempfile
-from typing import Dict
+from functools import partial
+from threading import Lock
+from typing import Dict, Optional, Tuple
 
 import clickhouse_connect
+from cachetools import LRUCache
+from clickhouse_connect.driver.exceptions import OperationalError
 
-from flyql.core.parser import parse, ParserError
-from flyql.core.exceptions import FlyqlError
-from flyql.generators.clickhouse.generator import to_sql, Column
+from flyql.core.parser import parse
+from flyql.generators.clickhouse import Column, to_sql_where
 
-from telescope.models import SourceColumn
+from telescope.models import Source, SourceColumn, SourceColumns
 
 from telescope.fetchers.request import (
     AutocompleteRequest,
@@ -22,9 +26,12 @@ from telescope.fetchers.response import (
     GraphDataResponse,
 )
 from telescope.fetchers.fetcher import BaseFetcher
-from telescope.fetchers.models import Row
+from telescope.fetchers.query import CompiledQuery
+from telescope.fetchers.health import get_health_registry
+from telescope.fetchers.scheduler import get_remaining_time
+from telescope.fetchers.models import RowBatch
 
-from telescope.utils import convert_to_base_ch, get_telescope_column
+from telescope.utils import get_telescope_column
 
 
 logger = logging.getLogger("telescope.fetchers.clickhouse")
@@ -32,6 +39,12 @@ logger = logging.getLogger("telescope.fetchers.clickhouse")
 
 SSL_CERTS_PARAMS = ["ca_cert", "client_cert", "client_cert_key"]
 OPTIONAL_SSL_PARAMS = ["server_host_name", "tls_mode"]
+# seconds the http client waits past the request deadline
+DEADLINE_GRACE = 10
+
+# fetch_data SELECT lists by (source columns, time column)
+_select_columns: LRUCache = LRUCache(maxsize=1024)
+_select_columns_lock = Lock()
 
 ESCAPE_CHARS_MAP = {
     "\b": "\\b",
@@ -63,12 +76,83 @@ def build_time_clause(time_column, date_column, time_from, time_to):
     return f"{date_clause}{time_column} BETWEEN fromUnixTimestamp64Milli({time_from}) and fromUnixTimestamp64Milli({time_to})"
 
 
+def is_clickhouse_unavailable_error(err: Exception) -> bool:
+    # query errors are returned with a 5xx status too, only connection
+    # problems count against the host
+    return isinstance(err, (OperationalError, OSError))
+
+
+def get_deadline_settings(deadline: Optional[float], server_settings: dict) -> dict:
+    """
+    Query settings bounding execution by the time left until the deadline.
+    With timeout_overflow_mode=break ClickHouse returns what it has read so
+    far instead of failing.
+
+    Users that may not change these settings (e.g. readonly=1) get none, the
+    client side send_receive_timeout bounds their queries alone.
+    """
+    remaining = get_remaining_time(deadline)
+    if remaining is None:
+        return {}
+    settings = {
+        "max_execution_time": max(1, int(remaining)),
+        "timeout_overflow_mode": "break",
+    }
+    for name in settings:
+        # SettingDef rows of system.settings, loaded by the client
+        setting = server_settings.get(name)
+        if setting is None or setting.readonly:
+            return {}
+    return settings
+
+
+def is_time_limited(settings: dict, elapsed: float, summary: dict) -> bool:
+    """
+    Whether max_execution_time may have cut the query short. ClickHouse does
+    not report a break, so this is a guess from the elapsed time, ruled out
+    when the summary of the query shows that every row to read was read.
+    """
+    limit = settings.get("max_execution_time")
+    if limit is None or elapsed < limit:
+        return False
+    read_rows = summary.get("read_rows")
+    total_rows = summary.get("total_rows_to_read")
+    if read_rows is not None and total_rows:
+        return int(read_rows) < int(total_rows)
+    return True
+
+
+def probe_clickhouse(data: dict):
+    with ClickhouseConnect(data, check_health=False) as c:
+        c.client.query("SELECT 1")
+
+
 class ClickhouseConnect:
-    def __init__(self, data: dict):
+    """
+    Unless `check_health` is False, entering fails right away with
+    CircuitOpenError while the host is considered unavailable, and errors
+    leaving the block are recorded against the host.
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        check_health: bool = True,
+        deadline: Optional[float] = None,
+    ):
         self.data = data
+        self.check_health = check_health
+        self.deadline = deadline
         self.temp_dir = None
         self._client = None
         self.client_kwargs = {}
+        self.started_at = 0.0
+        self.target: Tuple[str, str] = ("clickhouse", f"{data['host']}:{data['port']}")
+        get_health_registry().register_probe(
+            self.target,
+            partial(probe_clickhouse, data),
+            is_failure=is_clickhouse_unavailable_error,
+        )
 
     @property
     def client(self):
@@ -79,6 +163,9 @@ class ClickhouseConnect:
         return self._client
 
     def __enter__(self, *args, **kwargs):
+        if self.check_health:
+            get_health_registry().check(self.target)
+        self.started_at = time.monotonic()
         client_kwargs = {
             "host": self.data["host"],
             "port": self.data["port"],
@@ -90,6 +177,10 @@ class ClickhouseConnect:
         for name in OPTIONAL_SSL_PARAMS:
             if self.data.get(name) and self.data[name] != "":
                 client_kwargs[name] = self.data[name]
+        remaining = get_remaining_time(self.deadline)
+        if remaining is not None:
+            # leave the server time to stop on max_execution_time first
+            client_kwargs["send_receive_timeout"] = remaining + DEADLINE_GRACE
 
         self.temp_dir = tempfile.TemporaryDirectory()
 
@@ -102,7 +193,11 @@ class ClickhouseConnect:
         self.client_kwargs = client_kwargs
         return self
 
-    def __exit__(self, *args, **kwargs):
+    def __exit__(self, exc_type, exc, tb):
+        if self.check_health:
+            get_health_registry().record(
+                self.target, time.monotonic() - self.started_at, exc
+            )
         try:
             if self.temp_dir:
                 self.temp_dir.cleanup()
@@ -114,25 +209,61 @@ def flyql_clickhouse_columns(source_columns: Dict[str, SourceColumn]):
     return {
         column.name: Column(
             name=column.name,
-            jsonstring=column.jsonstring,
-            _type=column.type,
+            # flyql treats String columns holding JSON as their own type
+            _type="jsonstring" if column.jsonstring else column.type,
             values=column.values,
         )
         for _, column in source_columns.items()
     }
 
 
+def utc_time_column(column: str, base_type: str) -> str:
+    if base_type in ["datetime", "datetime64"]:
+        return f"toTimeZone({column}, 'UTC')"
+    if base_type in ["timestamp", "uint64", "int64"]:
+        return f"toTimeZone(toDateTime({column}), 'UTC')"
+    return ""
+
+
+def get_select_columns(source: Source) -> str:
+    """
+    SELECT list of fetch_data for the columns of `source`, in
+    `source_columns.names` order, built once per columns version.
+    """
+    source_columns = source.source_columns
+    key = (source_columns, source.time_column)
+    with _select_columns_lock:
+        select = _select_columns.get(key)
+    if select is not None:
+        return select
+
+    columns = []
+    for name in source_columns.names:
+        if name == source.time_column:
+            column = utc_time_column(name, source_columns.columns[name].base_type)
+            if column:
+                columns.append(column)
+        else:
+            columns.append(name)
+    select = ", ".join(columns)
+    with _select_columns_lock:
+        _select_columns[key] = select
+    return select
+
+
 class ConnectionTestResponseNg:
     def __init__(
         self,
     ):
         self.result = False
         self.error = ""
+        self.health = {}
 
     def as_dict(self) -> dict:
         return {
             "result": self.result,
             "error": self.error,
+            "health": self.health,
         }
 
 
@@ -150,52 +281,54 @@ class ConnectionTestResponse:
             "data": [],
             "raw": "",
         }
+        self.health = {}
 
     def as_dict(self) -> dict:
         return {
             "reachability": self.reachability,
             "schema": self.schema,
+            "health": self.health,
         }
 
 
 class Fetcher(BaseFetcher):
     @classmethod
-    def validate_query(cls, source, query):
-        if not query:
-            return True, None
-
-        try:
-            parser = parse(query)
-        except ParserError as err:
-            return False, err.message
-        else:
-            try:
-                to_sql(parser.root, columns=flyql_clickhouse_columns(source._columns))
-            except FlyqlError as err:
-                return False, err.message
+    def get_query_version(cls, source) -> SourceColumns:
+        # SQL generation depends on the columns only, their metadata is
+        # shared until the source is saved
+        return source.source_columns
 
-        return True, None
+    @classmethod
+    def compile_query(cls, source, query: str) -> CompiledQuery:
+        root = parse(query).root
+        sql = to_sql_where(root, columns=flyql_clickhouse_columns(source._columns))
+        return CompiledQuery(query, root, sql=sql)
 
     @classmethod
     def test_connection_ng(cls, data: dict) -> ConnectionTestResponseNg:
         response = ConnectionTestResponseNg()
-        with ClickhouseConnect(data) as c:
+        with ClickhouseConnect(data, check_health=False) as c:
+            health = get_health_registry()
             try:
-                c.client.query("SELECT now()")
+                health.run_probe(c.target, lambda: c.client.query("SELECT now()"))
             except Exception as err:
                 response.error = str(err)
                 logger.exception("connection test failed: %s", err)
             else:
                 response.result = True
+            response.health = health.state(c.target)
         return response
 
     @classmethod
     def test_connection(cls, data: dict) -> ConnectionTestResponse:
         response = ConnectionTestResponse()
         target = f"`{data['database']}`.`{data['table']}`"
-        with ClickhouseConnect(data) as c:
+        with ClickhouseConnect(data, check_health=False) as c:
+            health = get_health_registry()
             try:
-                c.client.query(f"SELECT 1 FROM {target} LIMIT 1")
+                health.run_probe(
+                    c.target, lambda: c.client.query(f"SELECT 1 FROM {target} LIMIT 1")
+                )
             except Exception as err:
                 response.reachability["error"] = str(err)
                 response.schema["error"] = "Skipped due to reachability test failed"
@@ -220,6 +353,7 @@ class Fetcher(BaseFetcher):
                     logger.exception(
                         "failed to get raw table schema (ignoring): %s", err
                     )
+            response.health = health.state(c.target)
 
         return response
 
@@ -263,13 +397,8 @@ class Fetcher(BaseFetcher):
         cls,
         request: GraphDataRequest,
     ):
-        if request.query:
-            parser = parse(request.query)
-            filter_clause = to_sql(
-                parser.root, columns=flyql_clickhouse_columns(request.source._columns)
-            )
-        else:
-            filter_clause = "1 = 1"
+        query = cls.get_request_query(request)
+        filter_clause = query.sql if query is not None else "1 = 1"
 
         raw_where_clause = request.raw_query or "1 = 1"
 
@@ -306,24 +435,8 @@ class Fetcher(BaseFetcher):
             f"{request.source.data['database']}.{request.source.data['table']}"
         )
 
-        time_column_type = convert_to_base_ch(
-            request.source._columns[request.source.time_column].type.lower()
-        )
-        to_time_zone = ""
-        if time_column_type in ["datetime", "datetime64"]:
-            to_time_zone = f"toTimeZone({request.source.time_column}, 'UTC')"
-        elif time_column_type in ["timestamp", "uint64", "int64"]:
-            to_time_zone = (
-                f"toTimeZone(toDateTime({request.source.time_column}), 'UTC')"
-            )
-
-        columns_names = sorted(request.source._columns.keys())
-        columns_to_select = []
-        for column in columns_names:
-            if column == request.source.time_column:
-                columns_to_select.append(to_time_zone)
-            else:
-                columns_to_select.append(column)
+        time_column_type = request.source._columns[request.source.time_column].base_type
+        to_time_zone = utc_time_column(request.source.time_column, time_column_type)
 
         stats = {}
         stats_by_ts = {}
@@ -343,7 +456,12 @@ class Fetcher(BaseFetcher):
             elif time_column_type == "datetime64":
                 stats_time_selector = f"toUnixTimestamp64Milli({to_time_zone})"
 
-        with ClickhouseConnect(request.source.conn.data) as c:
+        with ClickhouseConnect(
+            request.source.conn.data, deadline=request.deadline
+        ) as c:
+            query_settings = get_deadline_settings(
+                request.deadline, c.client.server_settings
+            )
             stat_sql = f"SELECT {stats_time_selector} as t, COUNT() as Count"
             if group_by_value:
                 stat_sql += f", {group_by_value} as `{group_by.name}`"
@@ -355,7 +473,10 @@ class Fetcher(BaseFetcher):
             if request.source.data.get("settings"):
                 stat_sql += f" SETTINGS {request.source.data['settings']}"
 
-            for item in c.client.query(stat_sql).result_rows:
+            started = time.monotonic()
+            result = c.client.query(stat_sql, settings=query_settings)
+            elapsed = time.monotonic() - started
+            for item in result.result_rows:
                 if group_by_value:
                     ts, count, groupper = item
                     if not groupper:
@@ -386,10 +507,15 @@ class Fetcher(BaseFetcher):
                 value = stats_by_ts.get(name, {}).get(ts, 0)
                 stats["data"][name].append(value)
 
+        message = None
+        if is_time_limited(query_settings, elapsed, result.summary):
+            message = "Request deadline reached, the histogram may only cover part of the data."
+
         return GraphDataResponse(
             timestamps=stats["timestamps"],
             data=stats["data"],
             total=total,
+            message=message,
         )
 
     @classmethod
@@ -398,13 +524,8 @@ class Fetcher(BaseFetcher):
         request: DataRequest,
         tz,
     ):
-        if request.query:
-            parser = parse(request.query)
-            filter_clause = to_sql(
-                parser.root, columns=flyql_clickhouse_columns(request.source._columns)
-            )
-        else:
-            filter_clause = "1 = 1"
+        query = self.get_request_query(request)
+        filter_clause = query.sql if query is not None else "1 = 1"
 
         order_by_clause = f"ORDER BY {request.source.time_column} DESC"
         raw_where_clause = request.raw_query or "1 = 1"
@@ -419,20 +540,8 @@ class Fetcher(BaseFetcher):
             f"{request.source.data['database']}.{request.source.data['table']}"
         )
 
-        columns_names = sorted(request.source._columns.keys())
-        columns_to_select = []
-        for column in columns_names:
-            if column == request.source.time_column:
-                time_column_type = convert_to_base_ch(
-                    request.source._columns[request.source.time_column].type.lower()
-                )
-                if time_column_type in ["datetime", "datetime64"]:
-                    columns_to_select.append(f"toTimeZone({column}, 'UTC')")
-                elif time_column_type in ["timestamp", "uint64", "int64"]:
-                    columns_to_select.append(f"toTimeZone(toDateTime({column}), 'UTC')")
-            else:
-                columns_to_select.append(column)
-        columns_to_select = ", ".join(columns_to_select)
+        columns_names = request.source.source_columns.names
+        columns_to_select = get_select_columns(request.source)
 
         settings_clause = ""
         if request.source.data.get("settings"):
@@ -440,17 +549,19 @@ class Fetcher(BaseFetcher):
 
         select_query = f"SELECT generateUUIDv4(),{columns_to_select} FROM {from_db_table} WHERE {time_clause} AND {filter_clause} AND {raw_where_clause} {order_by_clause} LIMIT {request.limit}{settings_clause}"
 
-        rows = []
-
-        with ClickhouseConnect(request.source.conn.data) as c:
-            selected_columns = [request.source._record_pseudo_id_column] + columns_names
-            for item in c.client.query(select_query).result_rows:
-                rows.append(
-                    Row(
-                        source=request.source,
-                        selected_columns=selected_columns,
-                        values=item,
-                        tz=tz,
-                    )
-                )
-        return DataResponse(rows=rows)
+        with ClickhouseConnect(
+            request.source.conn.data, deadline=request.deadline
+        ) as c:
+            query_settings = get_deadline_settings(
+                request.deadline, c.client.server_settings
+            )
+            selected_columns = [request.source._record_pseudo_id_column, *columns_names]
+            started = time.monotonic()
+            result = c.client.query(select_query, settings=query_settings)
+            elapsed = time.monotonic() - started
+            rows = RowBatch(request.source, selected_columns, result.result_rows, tz)
+
+        message = None
+        if is_time_limited(query_settings, elapsed, result.summary):
+            message = "Request deadline reached, rows may only have been searched in part of the data."
+        return DataResponse(rows=rows, message=message)
@@ -0,0 +1,11 @@
+from telescope.fetchers.docker.fetcher import Fetcher
+from telescope.fetchers.docker.models import (
+    ConnectionTestResponse,
+    ConnectionTestResponseNg,
+)
+
+__all__ = [
+    "Fetcher",
+    "ConnectionTestResponse",
+    "ConnectionTestResponseNg",
+]
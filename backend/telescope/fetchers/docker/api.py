@@ -0,0 +1,323 @@
+import re
+import struct
+from datetime import datetime
+from functools import partial
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import docker
+from cachetools import LRUCache
+from dateutil import parser as duparser
+
+from telescope.fetchers.health import get_health_registry, is_unavailable_error
+from telescope.fetchers.scheduler import get_remaining_time
+
+# seconds, same as the docker SDK default
+DEFAULT_TIMEOUT = 60
+DEFAULT_MAX_CONCURRENT_REQUESTS = 10
+# connections kept alive per daemon
+CLIENT_POOL_SIZE = 32
+
+STATUS_TO_INT = {
+    "runnig": 0,
+    "restarting": 1,
+    "removing": 2,
+    "paused": 3,
+    "dead": 4,
+    "exited": 5,
+    "created": 6,
+}
+
+ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+
+# multiplexed log frames start with an 8 byte header: stream type, three
+# zero bytes and the big-endian payload size
+FRAME_HEADER = struct.Struct(">BxxxL")
+FRAME_STREAMS = {0: "stdout", 1: "stdout", 2: "stderr"}
+
+_clients: LRUCache = LRUCache(maxsize=32)
+_clients_lock = Lock()
+
+
+def is_docker_unavailable_error(err: Exception) -> bool:
+    # the SDK wraps connection errors into a plain DockerException
+    if isinstance(err, docker.errors.DockerException) and not isinstance(
+        err, docker.errors.APIError
+    ):
+        return True
+    return is_unavailable_error(err)
+
+
+def get_client(address: str) -> docker.APIClient:
+    """
+    Returns the pooled API client of the daemon at `address`. Clients keep
+    their connections alive and negotiate the API version only once.
+    """
+    with _clients_lock:
+        client = _clients.get(address)
+    if client is None:
+        # version negotiation connects to the daemon, so not under the lock
+        client = docker.APIClient(
+            base_url=address, timeout=DEFAULT_TIMEOUT, max_pool_size=CLIENT_POOL_SIZE
+        )
+        with _clients_lock:
+            client = _clients.setdefault(address, client)
+    return client
+
+
+def get_call_timeout(
+    deadline: Optional[float] = None, timeout: float = DEFAULT_TIMEOUT
+) -> float:
+    remaining = get_remaining_time(deadline)
+    if remaining is not None:
+        timeout = max(1, min(timeout, remaining))
+    return timeout
+
+
+def api_get(api: docker.APIClient, path: str, *args: str, params: dict, timeout: float):
+    """
+    GET on the daemon API for what docker-py has no public call for: a
+    per-call timeout and the raw /logs body. This is the only place relying
+    on APIClient internals (_url, _get, _raise_for_status), checked against
+    the pinned docker version by the tests.
+    """
+    res = api._get(api._url(path, *args), params=params, timeout=timeout)
+    api._raise_for_status(res)
+    return res
+
+
+def ping_unchecked(address: str):
+    return get_client(address).ping()
+
+
+def list_containers_unchecked(
+    address: str, timeout: float = DEFAULT_TIMEOUT
+) -> List["ContainerMeta"]:
+    api = get_client(address)
+    # the summaries are all we need, like containers.list(sparse=True) it
+    # does not inspect every container
+    res = api_get(api, "/containers/json", params={"all": 1}, timeout=timeout)
+    return [ContainerMeta.from_summary(item) for item in res.json()]
+
+
+class DockerHost:
+    """
+    A daemon of a connection. `label` names it in the host column and in
+    messages, `timeout` bounds each call to it.
+    """
+
+    __slots__ = ("address", "label", "timeout")
+
+    def __init__(self, address: str, label: str = "", timeout: Optional[float] = None):
+        self.address = address
+        self.label = label or address
+        self.timeout = timeout or DEFAULT_TIMEOUT
+
+
+def get_hosts(conn_data: dict) -> List[DockerHost]:
+    """
+    Daemons of a connection: `address` followed by the optional `hosts`
+    list of {"address", "label", "timeout"} items.
+    """
+    hosts = []
+    if conn_data.get("address"):
+        hosts.append(DockerHost(conn_data["address"]))
+    seen = {host.address for host in hosts}
+    for item in conn_data.get("hosts") or []:
+        if item["address"] in seen:
+            continue
+        seen.add(item["address"])
+        hosts.append(
+            DockerHost(item["address"], item.get("label", ""), item.get("timeout"))
+        )
+    return hosts
+
+
+def get_docker_target(address: str) -> Tuple[str, str]:
+    target = ("docker", address)
+    get_health_registry().register_probe(
+        target,
+        partial(ping_unchecked, address),
+        is_failure=is_docker_unavailable_error,
+    )
+    return target
+
+
+class ContainerMeta:
+    """
+    Container attributes shared by every log line of a container.
+    """
+
+    __slots__ = ("id", "short_id", "name", "status", "labels", "tty", "host")
+
+    def __init__(
+        self,
+        id: str,
+        short_id: str,
+        name: str,
+        status: str = "",
+        labels: Optional[dict] = None,
+        tty: Optional[bool] = None,
+        host: str = "",
+    ):
+        self.id = id
+        self.short_id = short_id
+        self.name = name
+        self.status = status
+        self.labels = labels or {}
+        # None when unknown, the log output is then sniffed for frame headers
+        self.tty = tty
+        self.host = host
+
+    def for_host(self, host: str) -> "ContainerMeta":
+        # inventories are per daemon, host labels per connection
+        return ContainerMeta(
+            id=self.id,
+            short_id=self.short_id,
+            name=self.name,
+            status=self.status,
+            labels=self.labels,
+            tty=self.tty,
+            host=host,
+        )
+
+    @classmethod
+    def from_summary(cls, item: dict) -> "ContainerMeta":
+        """
+        Builds the meta from an item of the /containers/json listing. The
+        listing does not tell whether the container has a TTY.
+        """
+        names = item.get("Names") or []
+        return cls(
+            id=item["Id"],
+            short_id=item["Id"][:12],
+            name=names[0].lstrip("/") if names else item["Id"][:12],
+            status=item.get("State", ""),
+            labels=item.get("Labels") or {},
+        )
+
+
+class LogEntry:
+    """
+    A single log line of a container, read through its shared ContainerMeta.
+    """
+
+    __slots__ = ("meta", "timestamp", "stream", "message")
+
+    COLUMNS = (
+        "time",
+        "host",
+        "stream",
+        "status",
+        "labels",
+        "container_id",
+        "container_short_id",
+        "container_name",
+        "message",
+    )
+
+    def __init__(
+        self, timestamp: datetime, stream: str, message: str, meta: ContainerMeta
+    ):
+        self.meta = meta
+        self.timestamp = timestamp
+        self.stream = stream
+        self.message = message
+
+    def values(self) -> List[Any]:
+        meta = self.meta
+        return [
+            self.timestamp,
+            meta.host,
+            self.stream,
+            meta.status,
+            meta.labels,
+            meta.id,
+            meta.short_id,
+            meta.name,
+            self.message,
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.COLUMNS, self.values()))
+
+
+def read_container_logs(
+    address: str,
+    container_id: str,
+    since: float,
+    until: float,
+    deadline: Optional[float] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> bytes:
+    """
+    Reads stdout and stderr of a container with a single /logs call. The
+    body is returned as is: unless the container has a TTY it is still
+    multiplexed, see demux_log_streams. The SDK's container.logs() strips
+    the frame headers, losing the stream of each line, and inspects the
+    container on every call to find out whether it has a TTY.
+    """
+    api = get_client(address)
+    params = {"stdout": 1, "stderr": 1, "timestamps": 1, "follow": 0, "tail": "all"}
+    if since > 0:
+        params["since"] = since
+    if until > 0:
+        params["until"] = until
+    res = api_get(
+        api,
+        "/containers/{0}/logs",
+        container_id,
+        params=params,
+        timeout=get_call_timeout(deadline, timeout),
+    )
+    return res.content
+
+
+def is_multiplexed(raw: bytes) -> bool:
+    return (
+        len(raw) >= FRAME_HEADER.size
+        and raw[0] in FRAME_STREAMS
+        and raw[1:4] == b"\0\0\0"
+    )
+
+
+def demux_log_streams(raw: bytes, tty: Optional[bool] = None) -> Dict[str, bytes]:
+    """
+    Splits /logs output into the payload of each stream. Output of TTY
+    containers is not multiplexed and is all stdout.
+    """
+    if tty is None:
+        tty = not is_multiplexed(raw)
+    if tty:
+        return {"stdout": raw}
+
+    chunks: Dict[str, List[bytes]] = {"stdout": [], "stderr": []}
+    view = memoryview(raw)
+    pos = 0
+    while pos + FRAME_HEADER.size <= len(raw):
+        stream_type, size = FRAME_HEADER.unpack_from(raw, pos)
+        pos += FRAME_HEADER.size
+        stream = FRAME_STREAMS.get(stream_type, "stdout")
+        chunks[stream].append(view[pos : pos + size])
+        pos += size
+    return {stream: b"".join(parts) for stream, parts in chunks.items() if parts}
+
+
+def parse_log_lines(raw: bytes, meta: ContainerMeta) -> Iterator[LogEntry]:
+    """
+    Parses `timestamps=True` log output of both streams into entries. Lines
+    without a timestamp keep the one of the previous line.
+    """
+    for stream, data in demux_log_streams(raw, meta.tty).items():
+        ts = None
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            if not line:
+                continue
+            timestamp, _, message = line.partition(" ")
+            try:
+                ts = duparser.isoparse(timestamp)
+            except ValueError:
+                message = line
+            message = ANSI_ESCAPE.sub("", message)
+            if ts and message:
+                yield LogEntry(timestamp=ts, stream=stream, message=message, meta=meta)
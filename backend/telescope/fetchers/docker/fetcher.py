@@ -0,0 +1,504 @@
+import heapq
+import logging
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from telescope.utils import get_telescope_column
+
+from telescope.fetchers.request import (
+    AutocompleteRequest,
+    DataRequest,
+    GraphDataRequest,
+)
+from telescope.fetchers.response import (
+    AutocompleteResponse,
+    DataResponse,
+    GraphDataResponse,
+    DataAndGraphDataResponse,
+    DataAndGraphDataBatch,
+    DataAndGraphDataSummary,
+)
+from telescope.fetchers.fetcher import BaseFetcher
+from telescope.fetchers.graph_utils import GraphCounter
+from telescope.fetchers.health import get_health_registry
+from telescope.fetchers.parse_pool import get_parse_pool
+from telescope.fetchers.scheduler import (
+    DeadlineExceededError,
+    FetchTask,
+    get_scheduler,
+)
+from telescope.fetchers.models import RowBatch, UTC_ZONE
+from telescope.fetchers.docker.api import (
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    STATUS_TO_INT,
+    ContainerMeta,
+    DockerHost,
+    LogEntry,
+    get_docker_target,
+    get_hosts,
+    parse_log_lines,
+    read_container_logs,
+)
+from telescope.fetchers.docker.index import get_value_index, is_indexed_column
+from telescope.fetchers.docker.inventory import list_containers, peek_containers
+from telescope.fetchers.docker.models import (
+    ConnectionTestResponse,
+    ConnectionTestResponseNg,
+)
+from telescope.fetchers.aggregate import (
+    ContainerResult,
+    aggregate_container_log,
+    entry_unixtime,
+)
+
+
+logger = logging.getLogger("telescope.fetchers.docker")
+
+
+def get_deadline_message(skipped: Set[str]) -> Optional[str]:
+    if not skipped:
+        return None
+    return (
+        "Request deadline exceeded, results are incomplete: logs of "
+        f"{', '.join(sorted(skipped))} were not read."
+    )
+
+
+def format_errors(errors: Dict[str, Exception]) -> str:
+    failed = [f"{name} ({errors[name]})" for name in sorted(errors)[:5]]
+    if len(errors) > 5:
+        failed.append(f"{len(errors) - 5} more")
+    return ", ".join(failed)
+
+
+def get_log_errors_message(errors: Dict[str, Exception]) -> Optional[str]:
+    if not errors:
+        return None
+    return f"Failed to read logs of {format_errors(errors)}."
+
+
+def get_host_errors_message(errors: Dict[str, Exception]) -> Optional[str]:
+    if not errors:
+        return None
+    return f"Failed to list containers of {format_errors(errors)}."
+
+
+def get_max_concurrent_requests(conn_data: dict) -> int:
+    return conn_data.get("max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS)
+
+
+def join_messages(*messages: Optional[str]) -> Optional[str]:
+    return " ".join(m for m in messages if m) or None
+
+
+class Fetcher(BaseFetcher):
+    @staticmethod
+    def _list_host_containers(
+        hosts: List[DockerHost],
+        max_concurrent_requests: int,
+        deadline: Optional[float] = None,
+        names: Optional[List[str]] = None,
+    ) -> Tuple[List[Tuple[DockerHost, ContainerMeta]], Dict[str, Exception]]:
+        """
+        Lists containers of all hosts concurrently. Returns (host, container)
+        pairs and listing errors by host label. Fails with the first error
+        when no host could be listed.
+        """
+        tasks = [
+            FetchTask(
+                key=i,
+                target=get_docker_target(host.address),
+                func=partial(
+                    list_containers,
+                    host.address,
+                    deadline=deadline,
+                    names=names,
+                    timeout=host.timeout,
+                ),
+            )
+            for i, host in enumerate(hosts)
+        ]
+        results, task_errors, _ = get_scheduler().run(
+            tasks, default_target_limit=max_concurrent_requests, deadline=deadline
+        )
+        if task_errors and not results:
+            raise next(iter(task_errors.values()))
+
+        containers = []
+        for i in sorted(results):
+            host = hosts[i]
+            containers.extend(
+                (host, container.for_host(host.label)) for container in results[i]
+            )
+        errors = {hosts[i].label: err for i, err in task_errors.items()}
+        if errors:
+            logger.warning("Failed to list containers: %s", errors)
+        return containers, errors
+
+    @classmethod
+    def _get_containers_data(cls, source) -> List[dict]:
+        conn_data = source.conn.data
+        host_containers, _ = cls._list_host_containers(
+            get_hosts(conn_data), get_max_concurrent_requests(conn_data)
+        )
+        containers = [
+            {
+                "name": container.name,
+                "short_id": container.short_id,
+                "status": container.status,
+                "labels": container.labels,
+                "host": host.label,
+            }
+            for host, container in host_containers
+        ]
+        return sorted(
+            containers,
+            key=lambda c: STATUS_TO_INT.get(c["status"], 10),
+            reverse=True,
+        )
+
+    @classmethod
+    def get_all_context_columns_data(cls, source):
+        return {"containers": cls._get_containers_data(source)}
+
+    @classmethod
+    def get_context_column_data(cls, source, column, params=None):
+        if column == "container":
+            return cls._get_containers_data(source)
+        else:
+            raise ValueError
+
+    @staticmethod
+    def _probe_hosts(data: dict) -> Tuple[Dict[str, Exception], List[dict]]:
+        """
+        Probes every host of a connection, returns errors by host label and
+        the health of each host.
+        """
+        health = get_health_registry()
+        errors = {}
+        targets = []
+        for host in get_hosts(data):
+            target = get_docker_target(host.address)
+            targets.append(target)
+            try:
+                health.run_probe(target)
+            except Exception as err:
+                errors[host.label] = err
+        return errors, health.states(targets)
+
+    @classmethod
+    def test_connection_ng(cls, data: dict) -> ConnectionTestResponseNg:
+        response = ConnectionTestResponseNg()
+        errors, response.health = cls._probe_hosts(data)
+        if errors:
+            response.error = format_errors(errors)
+        else:
+            response.result = True
+        return response
+
+    @classmethod
+    def get_schema(cls, data: dict):
+        """Get schema without testing connection"""
+        return [
+            get_telescope_column("time", "datetime"),
+            get_telescope_column("host", "string"),
+            get_telescope_column("container_id", "string"),
+            get_telescope_column("container_name", "string"),
+            get_telescope_column("container_short_id", "string"),
+            get_telescope_column("message", "string"),
+            get_telescope_column("status", "string"),
+            get_telescope_column("stream", "string"),
+            get_telescope_column("labels", "json"),
+        ]
+
+    @classmethod
+    def test_connection(cls, data: dict) -> ConnectionTestResponse:
+        response = ConnectionTestResponse()
+        errors, response.health = cls._probe_hosts(data)
+        if errors:
+            response.reachability["result"] = False
+            response.reachability["error"] = format_errors(errors)
+        else:
+            response.reachability["result"] = True
+
+        try:
+            response.schema["result"] = True
+            response.schema["data"] = cls.get_schema(data)
+        except Exception as err:
+            response.schema["result"] = False
+            response.schema["error"] = str(err)
+        return response
+
+    @classmethod
+    def autocomplete(cls, source, column, time_from, time_to, value):
+        """
+        Serves values of container columns and labels from the connection's
+        value index, without calling the daemons. The time range is not
+        applied.
+        """
+        if not is_indexed_column(column):
+            return AutocompleteResponse(items=[], incomplete=False)
+
+        index = get_value_index(source.conn.id)
+        for host in get_hosts(source.conn.data):
+            index.add_containers(
+                container.for_host(host.label)
+                for container in peek_containers(host.address)
+            )
+        items, incomplete = index.search(column, value)
+        return AutocompleteResponse(items=items, incomplete=incomplete)
+
+    @staticmethod
+    def _entries_to_rows(request, entries: List[LogEntry], tz) -> RowBatch:
+        return RowBatch(
+            request.source, LogEntry.COLUMNS, [entry.values() for entry in entries], tz
+        )
+
+    @staticmethod
+    def _limited_message(limit: int, total_rows: int) -> Optional[str]:
+        if total_rows > limit:
+            return f"Displaying limited results: Only {limit} out of {total_rows} matching entries are shown."
+        return None
+
+    @classmethod
+    def _list_containers(
+        cls, request
+    ) -> Tuple[List[Tuple[DockerHost, ContainerMeta]], Dict[str, Exception]]:
+        conn_data = request.source.conn.data
+        return cls._list_host_containers(
+            get_hosts(conn_data),
+            get_max_concurrent_requests(conn_data),
+            deadline=request.deadline,
+            names=request.context_columns.get("container", []),
+        )
+
+    @staticmethod
+    def _aggregate_container(
+        host: DockerHost,
+        container: ContainerMeta,
+        since: float,
+        until: float,
+        aggregate,
+        deadline: Optional[float],
+    ) -> ContainerResult:
+        raw_logs = read_container_logs(
+            host.address, container.id, since, until, deadline, host.timeout
+        )
+        try:
+            return get_parse_pool().run(
+                aggregate, raw_logs, container, deadline=deadline
+            )
+        except TimeoutError as err:
+            # not a daemon failure, keep it out of the health statistics
+            raise DeadlineExceededError("deadline exceeded while parsing logs") from err
+
+    @classmethod
+    def _iter_container_results(
+        cls,
+        request,
+        containers: List[Tuple[DockerHost, ContainerMeta]],
+        tz,
+        limit: int = 0,
+        with_graph: bool = False,
+    ) -> Iterator[Tuple[str, Optional[ContainerResult], Optional[Exception]]]:
+        """
+        Reads both log streams of each container with a single call and
+        yields a ContainerResult per container as it finishes. Containers of
+        all hosts are read concurrently on the shared scheduler, at most
+        max_concurrent_requests at a time per host across all requests.
+        Parsing, filtering and aggregation run in the parse pool when it is
+        enabled, in the fetching thread otherwise. Containers that failed or
+        were not read before the deadline are yielded with their error.
+        Containers are named "<host>/<name>" when there are several hosts.
+        """
+        since = request.time_from / 1000
+        until = request.time_to / 1000
+        group_by = request.group_by[0] if getattr(request, "group_by", None) else None
+        aggregate = partial(
+            aggregate_container_log,
+            parse_log_lines,
+            query=request.query,
+            limit=limit,
+            graph_range=(request.time_from, request.time_to) if with_graph else None,
+            group_by=group_by,
+            tz=tz,
+        )
+
+        multi_host = len({host.address for host, _ in containers}) > 1
+        tasks = [
+            FetchTask(
+                key=f"{host.label}/{container.name}" if multi_host else container.name,
+                target=get_docker_target(host.address),
+                func=partial(
+                    cls._aggregate_container,
+                    host,
+                    container,
+                    since,
+                    until,
+                    aggregate,
+                    request.deadline,
+                ),
+            )
+            for host, container in containers
+        ]
+        # parsed rows keep the index up to date with containers that are
+        # no longer in the inventory
+        index = get_value_index(request.source.conn.id)
+        metas = {task.key: container for task, (_, container) in zip(tasks, containers)}
+        for task, result, err in get_scheduler().iter_run(
+            tasks,
+            default_target_limit=get_max_concurrent_requests(request.source.conn.data),
+            deadline=request.deadline,
+            health=get_health_registry(),
+        ):
+            if result is not None:
+                index.add_rows(
+                    metas[task.key], {entry.stream for entry in result.entries}
+                )
+            yield task.key, result, err
+
+    @classmethod
+    def _collect_results(
+        cls, request, tz, limit: int = 0, with_graph: bool = False
+    ) -> Tuple[List[LogEntry], int, Optional[GraphCounter], Optional[str]]:
+        """
+        Merges per-container results into the newest `limit` entries overall,
+        the number of matching entries, the graph counts and a message about
+        containers whose logs are missing from the results.
+        """
+        containers, host_errors = cls._list_containers(request)
+        candidates: List[LogEntry] = []
+        total = 0
+        counter = (
+            GraphCounter(request.time_from, request.time_to) if with_graph else None
+        )
+        skipped = set()
+        errors: Dict[str, Exception] = {}
+        for name, result, err in cls._iter_container_results(
+            request, containers, tz, limit=limit, with_graph=with_graph
+        ):
+            if isinstance(err, DeadlineExceededError):
+                skipped.add(name)
+                continue
+            if err is not None:
+                errors[name] = err
+                continue
+            candidates.extend(result.entries)
+            total += result.matched
+            if counter is not None:
+                counter.merge(result.counter)
+
+        if errors:
+            logger.warning("Log fetch errors: %s", errors)
+
+        entries = heapq.nlargest(limit, candidates, key=lambda e: entry_unixtime(e, tz))
+        message = join_messages(
+            get_host_errors_message(host_errors),
+            get_deadline_message(skipped),
+            get_log_errors_message(errors),
+        )
+        return entries, total, counter, message
+
+    @classmethod
+    def fetch_graph_data(
+        cls,
+        request: GraphDataRequest,
+    ):
+        _, _, counter, message = cls._collect_results(
+            request, UTC_ZONE, with_graph=True
+        )
+        timestamps, data, total = counter.result()
+        return GraphDataResponse(
+            timestamps=timestamps,
+            data=data,
+            total=total,
+            message=message,
+        )
+
+    @classmethod
+    def fetch_data(
+        cls,
+        request: DataRequest,
+        tz,
+    ):
+        entries, _, _, message = cls._collect_results(request, tz, limit=request.limit)
+        return DataResponse(
+            rows=cls._entries_to_rows(request, entries, tz),
+            message=message,
+        )
+
+    @classmethod
+    def fetch_data_and_graph(
+        cls,
+        request,
+        tz,
+    ):
+        entries, _, counter, message = cls._collect_results(
+            request, tz, limit=request.limit, with_graph=True
+        )
+        graph_timestamps, graph_data, graph_total = counter.result()
+        return DataAndGraphDataResponse(
+            rows=cls._entries_to_rows(request, entries, tz),
+            graph_timestamps=graph_timestamps,
+            graph_data=graph_data,
+            graph_total=graph_total,
+            message=message,
+        )
+
+    @classmethod
+    def stream_data_and_graph(
+        cls,
+        request,
+        tz,
+    ) -> Iterator[Union[DataAndGraphDataBatch, DataAndGraphDataSummary]]:
+        errors = []
+        try:
+            containers, host_errors = cls._list_containers(request)
+        except Exception as err:
+            logger.exception("Failed to list containers: %s", err)
+            yield DataAndGraphDataSummary(total=0, errors=errors, error=str(err))
+            return
+        for host, err in host_errors.items():
+            errors.append(
+                {"operation": "list_containers", "target": host, "error": str(err)}
+            )
+
+        total = 0
+        skipped = set()
+        for name, result, err in cls._iter_container_results(
+            request, containers, tz, limit=request.limit, with_graph=True
+        ):
+            if isinstance(err, DeadlineExceededError):
+                skipped.add(name)
+                continue
+            if err is not None:
+                logger.warning("Failed to fetch logs of %s: %s", name, err)
+                errors.append(
+                    {
+                        "operation": "get_logs",
+                        "target": name,
+                        "error": str(err),
+                    }
+                )
+                continue
+            if not result.matched:
+                continue
+
+            total += result.matched
+            graph_timestamps, graph_data, graph_total = result.counter.result()
+            yield DataAndGraphDataBatch(
+                rows=cls._entries_to_rows(request, result.entries, tz),
+                graph_timestamps=graph_timestamps,
+                graph_data=graph_data,
+                graph_total=graph_total,
+                origin=name,
+            )
+
+        yield DataAndGraphDataSummary(
+            total=total,
+            errors=errors,
+            message=join_messages(
+                get_deadline_message(skipped),
+                cls._limited_message(request.limit, total),
+            ),
+        )
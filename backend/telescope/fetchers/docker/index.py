@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+from cachetools import LRUCache
+
+from telescope.fetchers.docker.api import ContainerMeta
+from telescope.fetchers.kubernetes.inventory import AUTOCOMPLETE_LIMIT, SortedValues
+
+NAME_COLUMNS = ("host", "container_name", "container_short_id", "status", "stream")
+MAP_COLUMNS = ("labels",)
+# values kept per column and per label key, the least recently seen are
+# dropped first
+MAX_VALUES = 1000
+MAX_LABEL_KEYS = 500
+
+_indexes: LRUCache = LRUCache(maxsize=256)
+_indexes_lock = Lock()
+
+
+class RecentValues:
+    """
+    At most `maxsize` unique strings, ordered from least to most recently
+    seen.
+    """
+
+    __slots__ = ("maxsize", "values")
+
+    def __init__(self, maxsize: int = MAX_VALUES):
+        self.maxsize = maxsize
+        self.values: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value: str):
+        if not value:
+            return
+        self.values[value] = None
+        self.values.move_to_end(value)
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+    def search(self, value: str, limit: int) -> Tuple[List[str], bool]:
+        return SortedValues(self.values).search(value, limit)
+
+
+class ValueIndex:
+    """
+    Rolling autocomplete index of a Docker connection: recently seen values
+    of the name columns and label key -> values maps. It is fed with the
+    containers of the daemons' inventories and with the containers and
+    streams of parsed log rows, so values of removed containers stay
+    available until they are pushed out by newer ones.
+    """
+
+    def __init__(self):
+        self.names: Dict[str, RecentValues] = {
+            column: RecentValues() for column in NAME_COLUMNS
+        }
+        self.label_keys = RecentValues(MAX_LABEL_KEYS)
+        self.labels: Dict[str, RecentValues] = {}
+        self._lock = Lock()
+
+    def _add_container(self, container: ContainerMeta):
+        self.names["host"].add(container.host)
+        self.names["container_name"].add(container.name)
+        self.names["container_short_id"].add(container.short_id)
+        self.names["status"].add(container.status)
+        for key, value in container.labels.items():
+            self.label_keys.add(key)
+            values = self.labels.get(key)
+            if values is None:
+                values = self.labels[key] = RecentValues()
+            values.add(str(value))
+        if len(self.labels) > len(self.label_keys):
+            # drop values of the keys pushed out of label_keys
+            for key in set(self.labels) - set(self.label_keys.values):
+                del self.labels[key]
+
+    def add_containers(self, containers: Iterable[ContainerMeta]):
+        with self._lock:
+            for container in containers:
+                self._add_container(container)
+
+    def add_rows(self, container: ContainerMeta, streams: Iterable[str]):
+        with self._lock:
+            self._add_container(container)
+            for stream in streams:
+                self.names["stream"].add(stream)
+
+    def search(
+        self, column: str, value: str, limit: int = AUTOCOMPLETE_LIMIT
+    ) -> Tuple[List[str], bool]:
+        """
+        Returns (items, incomplete) for `column`, which is a name column,
+        `labels` (completes keys) or `labels.<key>`.
+        """
+        with self._lock:
+            if column in self.names:
+                return self.names[column].search(value, limit)
+            if column in MAP_COLUMNS:
+                return self.label_keys.search(value, limit)
+
+            root, _, key = column.partition(".")
+            values = self.labels.get(key) if root in MAP_COLUMNS else None
+            if values is None:
+                return [], False
+            return values.search(value, limit)
+
+
+def is_indexed_column(column: str) -> bool:
+    root = column.split(".", 1)[0]
+    return column in NAME_COLUMNS or root in MAP_COLUMNS
+
+
+def get_value_index(conn_id) -> ValueIndex:
+    with _indexes_lock:
+        index = _indexes.get(conn_id)
+        if index is None:
+            index = _indexes[conn_id] = ValueIndex()
+        return index
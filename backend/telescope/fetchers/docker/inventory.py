@@ -0,0 +1,291 @@
+import re
+import time
+import logging
+from functools import partial
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from telescope.fetchers.docker.api import (
+    DEFAULT_TIMEOUT,
+    ContainerMeta,
+    get_call_timeout,
+    get_client,
+    get_docker_target,
+    list_containers_unchecked,
+)
+from telescope.fetchers.health import get_health_registry
+
+logger = logging.getLogger("telescope.fetchers.docker.inventory")
+
+# seconds a listing is trusted when the daemon is not watched
+CONTAINERS_CACHE_TTL = 10
+# seconds between attempts to watch a daemon after the event stream failed
+RETRY_INTERVAL = 5
+# seconds subtracted from the time events are replayed from, in case the
+# daemon clock is behind; replaying an event twice is harmless
+CLOCK_SKEW_MARGIN = 5
+
+STATUS_BY_ACTION = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+}
+EVENT_FILTERS = {
+    "type": ["container"],
+    "event": [*STATUS_BY_ACTION, "destroy", "rename"],
+}
+# attributes of container events that are not labels of the container
+EVENT_ATTRIBUTES = {"image", "name", "oldName", "exitCode", "signal", "execDuration"}
+
+
+def match_container_name(name: str, patterns: List[str]) -> bool:
+    # same as the daemon's name filter: a regexp search in "/<name>"
+    for pattern in patterns:
+        try:
+            if re.search(pattern, f"/{name}"):
+                return True
+        except re.error:
+            if pattern in name:
+                return True
+    return False
+
+
+class ContainerInventory:
+    """
+    Containers of one Docker daemon.
+
+    The daemon is listed once, then a background thread follows its /events
+    stream and applies container create, start, die, destroy (and pause,
+    rename) events as they happen. Every `resync_interval` seconds the stream
+    is reopened after a full listing, which also corrects anything missed.
+    The thread stops after `idle_timeout` seconds without reads.
+
+    While the daemon is not watched (events disabled, stream failed), reads
+    fall back to listings cached for CONTAINERS_CACHE_TTL seconds.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        watch_events: bool = True,
+        resync_interval: float = 300,
+        idle_timeout: float = 900,
+    ):
+        self.address = address
+        self.watch_events = watch_events
+        self.resync_interval = resync_interval
+        self.idle_timeout = idle_timeout
+        self.containers: Dict[str, ContainerMeta] = {}
+        # time.time() at which the last successful listing started
+        self.synced_at: Optional[float] = None
+        self.watching = False
+        self.last_used = time.monotonic()
+        self._lock = Lock()
+        self._sync_lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._stream = None
+
+    def is_fresh(self) -> bool:
+        if self.watching:
+            return True
+        return (
+            self.synced_at is not None
+            and time.time() - self.synced_at < CONTAINERS_CACHE_TTL
+        )
+
+    def get_containers(
+        self, deadline: Optional[float] = None, timeout: float = DEFAULT_TIMEOUT
+    ) -> List[ContainerMeta]:
+        """
+        Fails with CircuitOpenError while the daemon is considered
+        unavailable and no fresh listing is at hand.
+        """
+        self.last_used = time.monotonic()
+        if self.watch_events:
+            self._start_watching()
+        if not self.is_fresh():
+            self.sync(deadline, timeout, max_age=CONTAINERS_CACHE_TTL)
+        with self._lock:
+            return list(self.containers.values())
+
+    def snapshot(self) -> List[ContainerMeta]:
+        """
+        The containers as last seen, without calling the daemon.
+        """
+        with self._lock:
+            return list(self.containers.values())
+
+    def sync(
+        self,
+        deadline: Optional[float] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_age: Optional[float] = None,
+    ):
+        """
+        Replaces the inventory with a full listing, unless one that started
+        less than `max_age` seconds ago is already in place.
+        """
+        with self._sync_lock:
+            if (
+                max_age is not None
+                and self.synced_at is not None
+                and time.time() - self.synced_at < max_age
+            ):
+                return
+            started = time.time()
+            containers = get_health_registry().call(
+                get_docker_target(self.address),
+                partial(
+                    list_containers_unchecked,
+                    self.address,
+                    timeout=get_call_timeout(deadline, timeout),
+                ),
+            )
+            with self._lock:
+                self.containers = {c.id: c for c in containers}
+                self.synced_at = started
+
+    def apply_event(self, event: dict):
+        action = event.get("Action")
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID")
+        if not container_id:
+            return
+        attributes = actor.get("Attributes") or {}
+
+        with self._lock:
+            if action == "destroy":
+                self.containers.pop(container_id, None)
+                return
+            current = self.containers.get(container_id)
+            if current is None and action not in STATUS_BY_ACTION:
+                return
+            # entries are replaced, not changed in place: fetches in
+            # progress keep the meta they started with
+            if current is None:
+                name = ""
+                status = ""
+                labels = {
+                    key: value
+                    for key, value in attributes.items()
+                    if key not in EVENT_ATTRIBUTES
+                }
+            else:
+                name = current.name
+                status = current.status
+                labels = current.labels
+            self.containers[container_id] = ContainerMeta(
+                id=container_id,
+                short_id=container_id[:12],
+                name=attributes.get("name") or name,
+                status=STATUS_BY_ACTION.get(action, status),
+                labels=labels,
+            )
+
+    def _start_watching(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = Thread(
+                target=self._watch,
+                name=f"telescope-docker-events-{self.address}",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _watch(self):
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - self.last_used > self.idle_timeout:
+                    logger.info("stopped watching idle daemon %s", self.address)
+                    return
+                try:
+                    # a reader may have just listed the daemon
+                    self.sync(max_age=RETRY_INTERVAL)
+                    api = get_client(self.address)
+                    until = time.time() + self.resync_interval
+                    self._stream = api.events(
+                        since=int(self.synced_at) - CLOCK_SKEW_MARGIN,
+                        until=int(until),
+                        filters=EVENT_FILTERS,
+                        decode=True,
+                    )
+                    self.watching = True
+                    for event in self._stream:
+                        self.apply_event(event)
+                    if time.time() < until and not self._stop.is_set():
+                        raise ConnectionError("event stream closed by the daemon")
+                except Exception as err:
+                    self.watching = False
+                    if self._stop.is_set():
+                        return
+                    logger.warning(
+                        "failed to watch docker daemon %s: %s", self.address, err
+                    )
+                    self._stop.wait(RETRY_INTERVAL)
+                finally:
+                    self.watching = False
+                    self._stream = None
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def stop(self):
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            stream.close()
+
+
+_inventories: Dict[str, ContainerInventory] = {}
+_inventories_lock = Lock()
+
+
+def get_inventory(address: str) -> ContainerInventory:
+    with _inventories_lock:
+        inventory = _inventories.get(address)
+        if inventory is None:
+            config = settings.CONFIG["fetchers"]["docker_inventory"]
+            inventory = ContainerInventory(
+                address,
+                watch_events=config["watch_events"],
+                resync_interval=config["resync_interval"],
+                idle_timeout=config["idle_timeout"],
+            )
+            _inventories[address] = inventory
+        return inventory
+
+
+def list_containers(
+    address: str,
+    deadline: Optional[float] = None,
+    names: Optional[List[str]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> List[ContainerMeta]:
+    """
+    Lists all containers of the daemon at `address` from its inventory, or
+    those matching any of `names`.
+    """
+    containers = get_inventory(address).get_containers(deadline, timeout)
+    if names:
+        return [c for c in containers if match_container_name(c.name, names)]
+    return containers
+
+
+def peek_containers(address: str) -> List[ContainerMeta]:
+    """
+    Containers last seen on the daemon at `address`, empty when it was
+    never listed. Never calls the daemon.
+    """
+    with _inventories_lock:
+        inventory = _inventories.get(address)
+    if inventory is None:
+        return []
+    return inventory.snapshot()
@@ -0,0 +1,37 @@
+class ConnectionTestResponseNg:
+    def __init__(
+        self,
+    ):
+        self.result = False
+        self.error = ""
+        self.health = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "result": self.result,
+            "error": self.error,
+            "health": self.health,
+        }
+
+
+class ConnectionTestResponse:
+    def __init__(
+        self,
+    ):
+        self.reachability = {
+            "result": False,
+            "error": "",
+        }
+        self.schema = {
+            "result": False,
+            "error": "",
+            "data": [],
+        }
+        self.health = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "reachability": self.reachability,
+            "schema": self.schema,
+            "health": self.health,
+        }
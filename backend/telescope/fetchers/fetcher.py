@@ -1,5 +1,10 @@
-from typing import Optional
+from typing import Hashable, Iterator, Optional, Tuple, Union
 import zoneinfo
+
+from flyql.core.exceptions import FlyqlError
+from flyql.core.parser import ParserError, parse
+
+from telescope.fetchers.query import CompiledQuery, get_cached_query
 from telescope.fetchers.request import (
     AutocompleteRequest,
     DataRequest,
@@ -11,13 +16,56 @@ from telescope.fetchers.response import (
     DataResponse,
     GraphDataResponse,
     DataAndGraphDataResponse,
+    DataAndGraphDataBatch,
+    DataAndGraphDataSummary,
 )
 
 
 class BaseFetcher:
     @classmethod
-    def validate_query(cls, query) -> bool:
-        raise NotImplementedError
+    def get_query_version(cls, source) -> Hashable:
+        """
+        Identifies the source configuration compile_query depends on.
+        Cached queries are reused until it changes.
+        """
+        return None
+
+    @classmethod
+    def compile_query(cls, source, query: str) -> CompiledQuery:
+        """
+        Parses and compiles `query` for `source`, raises ParserError or
+        FlyqlError when it is not valid.
+        """
+        return CompiledQuery(query, parse(query).root)
+
+    @classmethod
+    def get_query(cls, source, query: str) -> Optional[CompiledQuery]:
+        """
+        Returns the compiled `query`, None when it is empty. Compiled queries
+        are cached by (fetcher, source configuration version, query text).
+        """
+        if not query:
+            return None
+        return get_cached_query(
+            (cls, cls.get_query_version(source), query),
+            lambda: cls.compile_query(source, query),
+        )
+
+    @classmethod
+    def get_request_query(cls, request) -> Optional[CompiledQuery]:
+        if not request.query:
+            return None
+        if request.compiled_query is not None:
+            return request.compiled_query
+        return cls.get_query(request.source, request.query)
+
+    @classmethod
+    def validate_query(cls, source, query: str) -> Tuple[bool, Optional[str]]:
+        try:
+            cls.get_query(source, query)
+        except (ParserError, FlyqlError) as err:
+            return False, err.message
+        return True, None
 
     @classmethod
     def autocomplete(cls, request: AutocompleteRequest) -> AutocompleteResponse:
@@ -40,3 +88,15 @@ class BaseFetcher:
         tz: Optional[zoneinfo.ZoneInfo] = None,
     ) -> DataAndGraphDataResponse:
         raise NotImplementedError("Combined fetch not supported for this source type")
+
+    @classmethod
+    def stream_data_and_graph(
+        cls,
+        request: DataAndGraphDataRequest,
+        tz: Optional[zoneinfo.ZoneInfo] = None,
+    ) -> Iterator[Union[DataAndGraphDataBatch, DataAndGraphDataSummary]]:
+        """
+        Yields DataAndGraphDataBatch items as parts of the result become
+        available, followed by exactly one DataAndGraphDataSummary.
+        """
+        raise NotImplementedError("Streaming fetch not supported for this source type")
@@ -1,74 +1,141 @@
 import json
-from typing import List, Dict, Tuple, Optional
-from telescope.fetchers.models import Row
+from collections import Counter
+from typing import Iterable, List, Dict, Tuple, Optional
 from flyql.columns import ParsedColumn
 
+# group names kept per GroupNames, per distinct raw value
+MAX_CACHED_GROUP_NAMES = 10000
 
-def generate_graph_from_rows(
-    rows: List[Row],
-    time_from: int,
-    time_to: int,
-    group_by: Optional[ParsedColumn] = None,
-) -> Tuple[List[int], Dict[str, List[int]], int]:
+_MISSING = object()
 
-    stats_by_ts = {}
-    unique_ts = {time_from, time_to}
-    total = len(rows)
 
+def get_bucket_interval_ms(time_from: int, time_to: int) -> int:
     seconds = int(time_to - time_from) / 1000
     if seconds > 15:
         max_points = 150
         stats_interval_seconds = round(seconds / max_points)
         if stats_interval_seconds == 0:
             stats_interval_seconds = 1
-        bucket_interval_ms = stats_interval_seconds * 1000
-    else:
-        bucket_interval_ms = 1000
-
-    groupper_name = "Rows" if not group_by else None
-
-    for row in rows:
-        ts_ms = row.time["unixtime"]
-        if bucket_interval_ms > 1000:
-            ts_key = int(ts_ms / bucket_interval_ms) * bucket_interval_ms
-        else:
-            ts_key = int(ts_ms / 1000) * 1000
-        unique_ts.add(ts_key)
-
-        if group_by:
-            if "." in group_by.name:
-                spl = group_by.name.split(".")
-                json_path = spl[1:]
-                try:
-                    data = json.loads(row.data[spl[0]])
-                    for key in json_path:
-                        data = data.get(key, {})
-                    if not data:
-                        groupper_name = "__none__"
-                    else:
-                        groupper_name = str(data)
-                except (json.JSONDecodeError, KeyError, TypeError):
-                    groupper_name = "__none__"
-            else:
-                groupper_name = str(row.data.get(group_by.name, "__none__"))
-
-        if groupper_name not in stats_by_ts:
-            stats_by_ts[groupper_name] = {}
-
-        if ts_key not in stats_by_ts[groupper_name]:
-            stats_by_ts[groupper_name][ts_key] = 1
-        else:
-            stats_by_ts[groupper_name][ts_key] += 1
-
-    timestamps = sorted(unique_ts)
-    data = {}
-
-    for name in stats_by_ts.keys():
-        data[name] = []
-
-    for ts in timestamps:
-        for name in stats_by_ts.keys():
-            value = stats_by_ts.get(name, {}).get(ts, 0)
-            data[name].append(value)
-
-    return timestamps, data, total
+        return stats_interval_seconds * 1000
+    return 1000
+
+
+def get_group_name(data: dict, group_by: Optional[ParsedColumn]) -> str:
+    if not group_by:
+        return "Rows"
+    if "." in group_by.name:
+        spl = group_by.name.split(".")
+        json_path = spl[1:]
+        try:
+            value = data[spl[0]]
+            # json columns are strings, except e.g. docker labels
+            if isinstance(value, str):
+                value = json.loads(value)
+            for key in json_path:
+                value = value.get(key, {})
+            if not value:
+                return "__none__"
+            return str(value)
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            return "__none__"
+    return str(data.get(group_by.name, "__none__"))
+
+
+class GroupNames:
+    """
+    get_group_name() for many rows: the name is derived from the value of
+    the group_by root column, and for string values (JSON columns) it is
+    computed once per distinct value instead of parsing the JSON per row.
+    """
+
+    def __init__(self, group_by: Optional[ParsedColumn]):
+        self.group_by = group_by
+        self.column = group_by.name.split(".")[0] if group_by else None
+        self._names: Dict[str, str] = {}
+
+    def __call__(self, data: dict) -> str:
+        if self.group_by is None:
+            return "Rows"
+        return self.of_value(data.get(self.column, _MISSING))
+
+    def of_value(self, value=_MISSING) -> str:
+        """
+        Group name of a row whose group_by root column is `value`, or is
+        missing.
+        """
+        if self.group_by is None:
+            return "Rows"
+        # only strings: equal values of other types may not have equal names
+        if type(value) is not str:
+            return self._get_name(value)
+        name = self._names.get(value)
+        if name is None:
+            name = self._get_name(value)
+            if len(self._names) < MAX_CACHED_GROUP_NAMES:
+                self._names[value] = name
+        return name
+
+    def _get_name(self, value) -> str:
+        data = {} if value is _MISSING else {self.column: value}
+        return get_group_name(data, self.group_by)
+
+
+class GraphCounter:
+    """
+    One-pass histogram: points are counted into their buckets as they come,
+    nothing else is retained. Counters over the same time range can be
+    merged, e.g. one per container.
+    """
+
+    def __init__(self, time_from: int, time_to: int):
+        self.time_from = time_from
+        self.time_to = time_to
+        self.bucket_interval_ms = get_bucket_interval_ms(time_from, time_to)
+        self.stats_by_ts: Dict[str, Dict[int, int]] = {}
+        self.total = 0
+
+    def add(self, ts_ms: int, groupper_name: str = "Rows"):
+        ts_key = int(ts_ms) // self.bucket_interval_ms * self.bucket_interval_ms
+        stats = self.stats_by_ts.get(groupper_name)
+        if stats is None:
+            stats = self.stats_by_ts[groupper_name] = {}
+        stats[ts_key] = stats.get(ts_key, 0) + 1
+        self.total += 1
+
+    def add_many(self, ts_ms: Iterable[int], groupper_names: Iterable[str]):
+        """
+        Counts the points (ts_ms[i], groupper_names[i]), bucketing and
+        counting them in bulk.
+        """
+        interval = self.bucket_interval_ms
+        counts = Counter(
+            zip(groupper_names, [int(ts) // interval * interval for ts in ts_ms])
+        )
+        for (name, ts_key), count in counts.items():
+            stats = self.stats_by_ts.get(name)
+            if stats is None:
+                stats = self.stats_by_ts[name] = {}
+            stats[ts_key] = stats.get(ts_key, 0) + count
+            self.total += count
+
+    def merge(self, other: "GraphCounter"):
+        for name, other_stats in other.stats_by_ts.items():
+            stats = self.stats_by_ts.setdefault(name, {})
+            for ts_key, count in other_stats.items():
+                stats[ts_key] = stats.get(ts_key, 0) + count
+        self.total += other.total
+
+    def result(self) -> Tuple[List[int], Dict[str, List[int]], int]:
+        unique_ts = {self.time_from, self.time_to}
+        for stats in self.stats_by_ts.values():
+            unique_ts.update(stats.keys())
+        timestamps = sorted(unique_ts)
+        positions = {ts: i for i, ts in enumerate(timestamps)}
+
+        data = {}
+        for name, stats in self.stats_by_ts.items():
+            series = data[name] = [0] * len(timestamps)
+            for ts, count in stats.items():
+                series[positions[ts]] = count
+
+        return timestamps, data, self.total
@@ -0,0 +1,334 @@
+import time
+import logging
+from collections import OrderedDict, deque
+from threading import Lock, Thread
+from typing import Any, Callable, Hashable, List, Optional
+
+import urllib3
+from django.conf import settings
+
+logger = logging.getLogger("telescope.fetchers.health")
+
+CLOSED = "closed"
+OPEN = "open"
+# targets come and go with kubeconfigs, contexts and docker addresses, the
+# least recently used ones are forgotten
+MAX_TARGETS = 10000
+
+
+def format_target(target: Hashable) -> str:
+    # targets are tuples like ("kubernetes", kubeconfig_hash, context),
+    # the last item is the human readable name
+    if isinstance(target, tuple):
+        return str(target[-1])
+    return str(target)
+
+
+def is_unavailable_error(err: Exception) -> bool:
+    """
+    Whether an error means the backend could not be reached or failed to
+    serve the call, as opposed to a response rejecting it (e.g. 404 or 403).
+    """
+    for attr in ("status", "status_code"):
+        status = getattr(err, attr, None)
+        if isinstance(status, int):
+            return status >= 500
+    return isinstance(err, (OSError, urllib3.exceptions.HTTPError))
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, target: Hashable, failures: int, last_error: str):
+        self.target = target
+        message = f"{format_target(target)} is unavailable, skipped after {failures} failed calls"
+        if last_error:
+            message += f" (last error: {last_error})"
+        super().__init__(message)
+
+
+class TargetHealth:
+    def __init__(self, target: Hashable, window: int):
+        self.target = target
+        self.state = CLOSED
+        # (failed, latency) of the most recent calls
+        self.outcomes: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.calls = 0
+        self.failures = 0
+        self.last_error = ""
+        self.opened_at: Optional[float] = None
+        self.probed_at: Optional[float] = None
+        self.probe: Optional[Callable[[], Any]] = None
+        self.is_failure: Callable[[Exception], bool] = is_unavailable_error
+
+    def add(self, failed: bool, latency: float, error: Optional[Exception]):
+        self.outcomes.append((failed, latency))
+        self.calls += 1
+        if failed:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+        else:
+            self.consecutive_failures = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for failed, _ in self.outcomes if failed) / len(self.outcomes)
+
+    def as_dict(self) -> dict:
+        latencies = [latency for _, latency in self.outcomes]
+        return {
+            "target": format_target(self.target),
+            "state": self.state,
+            "error_rate": self.error_rate,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_max": max(latencies, default=0.0),
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "opened_at": self.opened_at,
+            "probed_at": self.probed_at,
+        }
+
+
+class HealthRegistry:
+    """
+    Process-wide health of backend targets (kubernetes contexts, docker
+    daemons, clickhouse hosts).
+
+    Every call outcome and its latency is recorded per target. After
+    `failure_threshold` consecutive failures, or once `error_rate_threshold`
+    of the last `window` calls failed, the circuit of the target opens and
+    calls to it fail immediately with CircuitOpenError. Open targets are
+    probed in a background thread every `probe_interval` seconds and closed
+    again by the first successful probe. Targets without a probe are let
+    through after one interval, and a single further failure reopens them.
+    At most `max_targets` targets are tracked, the least recently used ones
+    are dropped.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        error_rate_threshold: float,
+        window: int,
+        probe_interval: float,
+        enabled: bool = True,
+        max_targets: int = MAX_TARGETS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window = window
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self.max_targets = max_targets
+        # least recently used first
+        self._targets: "OrderedDict[Hashable, TargetHealth]" = OrderedDict()
+        self._lock = Lock()
+        self._prober: Optional[Thread] = None
+
+    def _get(self, target: Hashable) -> TargetHealth:
+        item = self._targets.get(target)
+        if item is None:
+            item = TargetHealth(target, self.window)
+            self._targets[target] = item
+            if len(self._targets) > self.max_targets:
+                self._targets.popitem(last=False)
+        else:
+            self._targets.move_to_end(target)
+        return item
+
+    def register_probe(
+        self,
+        target: Hashable,
+        probe: Callable[[], Any],
+        is_failure: Callable[[Exception], bool] = is_unavailable_error,
+    ):
+        """
+        Sets how the target is probed while its circuit is open and how its
+        errors are classified. The latest registration wins, so probes follow
+        changes of the connection settings.
+        """
+        with self._lock:
+            item = self._get(target)
+            item.probe = probe
+            item.is_failure = is_failure
+
+    def allow(self, target: Hashable) -> bool:
+        if not self.enabled:
+            return True
+        item = self._targets.get(target)
+        return item is None or item.state != OPEN
+
+    def get_error(self, target: Hashable) -> CircuitOpenError:
+        item = self._targets.get(target)
+        if item is None:
+            return CircuitOpenError(target, 0, "")
+        return CircuitOpenError(target, item.consecutive_failures, item.last_error)
+
+    def check(self, target: Hashable):
+        if not self.allow(target):
+            raise self.get_error(target)
+
+    def record(
+        self,
+        target: Hashable,
+        latency: float,
+        error: Optional[Exception] = None,
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ):
+        if not self.enabled:
+            return
+
+        opened = False
+        with self._lock:
+            item = self._get(target)
+            is_failure = is_failure or item.is_failure
+            failed = error is not None and is_failure(error)
+            item.add(failed, latency, error)
+            if failed and item.state == CLOSED and self._should_open(item):
+                item.state = OPEN
+                item.opened_at = time.time()
+                opened = True
+
+        if opened:
+            logger.warning(
+                "circuit opened for %s: %s", format_target(target), item.last_error
+            )
+            self._start_prober()
+
+    def _should_open(self, item: TargetHealth) -> bool:
+        if item.consecutive_failures >= self.failure_threshold:
+            return True
+        return (
+            len(item.outcomes) >= self.window
+            and item.error_rate >= self.error_rate_threshold
+        )
+
+    def call(
+        self,
+        target: Hashable,
+        func: Callable[[], Any],
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ) -> Any:
+        """
+        Calls func unless the circuit of the target is open and records the
+        outcome.
+        """
+        self.check(target)
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as err:
+            self.record(target, time.monotonic() - started, err, is_failure)
+            raise
+        self.record(target, time.monotonic() - started)
+        return result
+
+    def run_probe(
+        self,
+        target: Hashable,
+        func: Optional[Callable[[], Any]] = None,
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ) -> Any:
+        """
+        Calls func (the registered probe by default) whatever the state of
+        the circuit. Any answer from the backend closes the circuit, errors
+        are re-raised. Connection tests go through here as well.
+        """
+        with self._lock:
+            item = self._get(target)
+            func = func or item.probe
+            is_failure = is_failure or item.is_failure
+
+        started = time.monotonic()
+        result = error = None
+        try:
+            result = func()
+        except Exception as err:
+            error = err
+        latency = time.monotonic() - started
+
+        with self._lock:
+            item.probed_at = time.time()
+        if error is not None and is_failure(error):
+            self.record(target, latency, error, is_failure)
+            raise error
+
+        # the backend answered, even if it was to reject the call
+        with self._lock:
+            item.add(False, latency, None)
+            if item.state == OPEN:
+                logger.info("circuit closed for %s", format_target(target))
+            item.state = CLOSED
+            item.opened_at = None
+            item.outcomes.clear()
+        if error is not None:
+            raise error
+        return result
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is not None:
+                return
+            self._prober = Thread(
+                target=self._probe_loop, name="telescope-health-probe", daemon=True
+            )
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                targets = [i for i in self._targets.values() if i.state == OPEN]
+                if not targets:
+                    self._prober = None
+                    return
+
+            for item in targets:
+                if item.probe is None:
+                    with self._lock:
+                        # half-open: the next call decides
+                        item.state = CLOSED
+                        item.opened_at = None
+                        item.outcomes.clear()
+                        item.consecutive_failures = self.failure_threshold - 1
+                    continue
+                try:
+                    self.run_probe(item.target)
+                except Exception as err:
+                    logger.debug(
+                        "probe of %s failed: %s", format_target(item.target), err
+                    )
+
+    def state(self, target: Hashable) -> dict:
+        with self._lock:
+            item = self._targets.get(target)
+            if item is None:
+                item = TargetHealth(target, self.window)
+            return item.as_dict()
+
+    def states(self, targets: List[Hashable]) -> List[dict]:
+        return [self.state(target) for target in targets]
+
+
+_registry: Optional[HealthRegistry] = None
+_registry_lock = Lock()
+
+
+def get_health_registry() -> HealthRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                config = settings.CONFIG["fetchers"]["health"]
+                _registry = HealthRegistry(
+                    failure_threshold=config["failure_threshold"],
+                    error_rate_threshold=config["error_rate_threshold"],
+                    window=config["window"],
+                    probe_interval=config["probe_interval"],
+                    enabled=config["enabled"],
+                )
+    return _registry
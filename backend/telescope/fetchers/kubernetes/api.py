@@ -1,13 +1,22 @@
 import os
 import re
-import tempfile
+import time
 import hashlib
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from functools import partial
 from datetime import datetime
 from threading import Lock
-from typing import List, Dict, Set, Callable, TypeVar, Optional, Tuple, Any
+from typing import (
+    List,
+    Dict,
+    Set,
+    Callable,
+    TypeVar,
+    Optional,
+    Tuple,
+    Any,
+    Iterator,
+)
 
 from cachetools import LRUCache
 
@@ -16,37 +25,167 @@ from django.core.cache import cache
 T = TypeVar("T")
 
 from flyql.core.parser import parse
-from flyql.matcher.evaluator import Evaluator
-from flyql.matcher.record import Record
 
 from kubernetes.config.kube_config import KubeConfigLoader
-from kubernetes import config as kubernetes_config
 from kubernetes import client as kubernetes_client
 
 import yaml
 
+from telescope.fetchers.scheduler import (
+    FetchTask,
+    SchedulerStats,
+    DeadlineExceededError,
+    get_scheduler,
+    get_deadline,
+    get_remaining_time,
+)
+from telescope.fetchers.health import get_health_registry, is_unavailable_error
+from telescope.fetchers.matcher import compile_predicate
+from telescope.fetchers.kubernetes.pushdown import QueryConstraints
+
 logger = logging.getLogger("telescope.fetchers.kubernetes.api")
 
 CACHE_TTL = 30
+# (connect, read) timeouts of API server calls, reduced to what is left of
+# the request deadline
+REQUEST_TIMEOUT = (5, 60)
 ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
 
 
-@dataclass
+class ContainerMeta:
+    """
+    Pod and container attributes shared by every log line of a container.
+    """
+
+    __slots__ = (
+        "context",
+        "namespace",
+        "pod",
+        "container",
+        "node",
+        "labels",
+        "annotations",
+        "status",
+    )
+
+    def __init__(
+        self,
+        context: str,
+        namespace: str,
+        pod: str,
+        container: str,
+        node: str = "",
+        labels: Optional[dict] = None,
+        annotations: Optional[dict] = None,
+        status: str = "",
+    ):
+        self.context = context
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self.node = node
+        self.labels = labels
+        self.annotations = annotations
+        self.status = status
+
+
 class LogEntry:
-    context: str
-    namespace: str
-    pod: str
-    container: str
-    timestamp: datetime
-    message: str
-    node: str = ""
-    labels: dict = None
-    annotations: dict = None
-    status: str = ""
+    """
+    A single log line. Container attributes are not copied into each entry,
+    they are read through a ContainerMeta shared by all lines of a container.
+    """
+
+    __slots__ = ("meta", "timestamp", "message")
+
+    COLUMNS = (
+        "time",
+        "context",
+        "namespace",
+        "pod",
+        "container",
+        "node",
+        "labels",
+        "annotations",
+        "message",
+        "status",
+    )
+
+    def __init__(
+        self,
+        timestamp: datetime,
+        message: str,
+        meta: Optional[ContainerMeta] = None,
+        **meta_fields,
+    ):
+        self.meta = meta if meta is not None else ContainerMeta(**meta_fields)
+        self.timestamp = timestamp
+        self.message = message
+
+    context = property(lambda self: self.meta.context)
+    namespace = property(lambda self: self.meta.namespace)
+    pod = property(lambda self: self.meta.pod)
+    container = property(lambda self: self.meta.container)
+    node = property(lambda self: self.meta.node)
+    labels = property(lambda self: self.meta.labels)
+    annotations = property(lambda self: self.meta.annotations)
+    status = property(lambda self: self.meta.status)
+
+    def values(self) -> List[Any]:
+        meta = self.meta
+        return [
+            self.timestamp,
+            meta.context,
+            meta.namespace,
+            meta.pod,
+            meta.container,
+            meta.node,
+            meta.labels,
+            meta.annotations,
+            self.message,
+            meta.status,
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.COLUMNS, self.values()))
 
 
 _client_cache: LRUCache = LRUCache(maxsize=100)
 _client_cache_lock = Lock()
+_client_init_locks: Dict[str, Lock] = {}
+
+
+def parse_log_lines(
+    raw_logs: str,
+    meta: ContainerMeta,
+    time_from: datetime,
+    time_to: datetime,
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterator[LogEntry]:
+    """
+    Parses `timestamps=True` container log output into entries within
+    [time_from, time_to]. Line statistics are accumulated into `counts`.
+    """
+    if counts is None:
+        counts = {"total": 0, "kept": 0, "filtered_by_ts": 0}
+    for line in raw_logs.splitlines():
+        counts["total"] += 1
+        if not line:
+            continue
+
+        parts = line.split(" ", 1)
+        ts = KubeHelper._parse_k8s_timestamp(parts[0])
+        if not ts:
+            continue
+
+        if ts < time_from or ts > time_to:
+            counts["filtered_by_ts"] += 1
+            continue
+
+        message = parts[1] if len(parts) > 1 else ""
+        message = ANSI_ESCAPE.sub("", message)
+
+        counts["kept"] += 1
+        yield LogEntry(timestamp=ts, message=message, meta=meta)
 
 
 class KubeHelperError(Exception):
@@ -72,17 +211,20 @@ class KubeConfigHelper:
                 self.data = yaml.safe_load(fd)
         else:
             self.data = yaml.safe_load(kubeconfig)
-        
+
         # Try multiple ways to get current-context
         self.current_context = self.data.get("current-context")
         if not self.current_context and "current_context" in self.data:
             self.current_context = self.data.get("current_context")
-            
+
         self.loader = KubeConfigLoader(config_dict=self.data)
         if not self.current_context:
             self.current_context = self.loader.current_context
-            
-        logger.debug("KubeConfigHelper initialized with current_context: %s", self.current_context)
+
+        logger.debug(
+            "KubeConfigHelper initialized with current_context: %s",
+            self.current_context,
+        )
 
     def list_contexts(self) -> List[Dict]:
         result = []
@@ -107,32 +249,43 @@ class KubeClient:
 
 
 class KubeClientHelper:
-    def __init__(self, config: KubeConfigHelper):
+    def __init__(self, config: KubeConfigHelper, pool_size: int = 0):
         self.config = config
-        self._temp_file = None
-        self._config_path = None
+        self.pool_size = pool_size
 
     def _get_cache_key(self, context_name: str) -> str:
-        return f"{self.config.kubeconfig_hash}:{context_name}"
-
-    def _get_config_path(self) -> str:
-        if self._config_path is not None:
-            return self._config_path
+        return f"{self.config.kubeconfig_hash}:{context_name}:{self.pool_size}"
 
+    def _get_config_base_path(self) -> str:
+        # relative certificate paths in a local kubeconfig are resolved
+        # against the file location, same as kubectl does
         if self.config.is_local:
-            self._config_path = os.path.expanduser(self.config.kubeconfig_path)
-        else:
-            self._temp_file = tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".yaml",
-                prefix="kubeconfig_",
-                delete=False,
-            )
-            yaml.safe_dump(self.config.data, self._temp_file)
-            self._temp_file.close()
-            self._config_path = self._temp_file.name
-
-        return self._config_path
+            return os.path.dirname(os.path.expanduser(self.config.kubeconfig_path))
+        return ""
+
+    def _create_client(self, context_name: str) -> KubeClient:
+        # Build a dedicated Configuration instead of load_kube_config(), which
+        # mutates the process-wide default configuration.
+        cfg = kubernetes_client.Configuration()
+        loader = KubeConfigLoader(
+            config_dict=self.config.data,
+            active_context=context_name,
+            config_base_path=self._get_config_base_path(),
+        )
+        loader.load_and_set(cfg)
+        # Set timeout on the configuration object.
+        # In some versions of the client, this is used by ApiClient.
+        cfg.timeout = 5
+        if self.pool_size > 0:
+            cfg.connection_pool_maxsize = self.pool_size
+        api_client = kubernetes_client.ApiClient(cfg)
+        # Also set it directly on the api_client if possible
+        if hasattr(api_client, "request_timeout"):
+            api_client.request_timeout = (5, 10)
+
+        apps = kubernetes_client.AppsV1Api(api_client)
+        core = kubernetes_client.CoreV1Api(api_client)
+        return KubeClient(core, apps)
 
     def get_client_for_context(self, context_name: str) -> KubeClient:
         cache_key = self._get_cache_key(context_name)
@@ -140,37 +293,28 @@ class KubeClientHelper:
             client = _client_cache.get(cache_key)
             if client is not None:
                 return client
+            key_lock = _client_init_locks.setdefault(cache_key, Lock())
 
-            config_path = self._get_config_path()
-            kubernetes_config.load_kube_config(
-                config_file=config_path, context=context_name
-            )
-            cfg = kubernetes_client.Configuration.get_default_copy()
-            # Set timeout on the configuration object. 
-            # In some versions of the client, this is used by ApiClient.
-            cfg.timeout = 5 
-            api_client = kubernetes_client.ApiClient(cfg)
-            # Also set it directly on the api_client if possible
-            if hasattr(api_client, 'request_timeout'):
-                api_client.request_timeout = (5, 10)
-            
-            apps = kubernetes_client.AppsV1Api(api_client)
-            core = kubernetes_client.CoreV1Api(api_client)
-            client = KubeClient(core, apps)
-            _client_cache[cache_key] = client
+        # Only callers of the same context wait for each other, a slow or
+        # unreachable context does not block client creation for others.
+        with key_lock:
+            with _client_cache_lock:
+                client = _client_cache.get(cache_key)
+            if client is not None:
+                return client
+            try:
+                client = self._create_client(context_name)
+                with _client_cache_lock:
+                    _client_cache[cache_key] = client
+            finally:
+                with _client_cache_lock:
+                    _client_init_locks.pop(cache_key, None)
             return client
 
-    def cleanup(self):
-        if self._temp_file is not None:
-            try:
-                os.unlink(self._temp_file.name)
-            except Exception as e:
-                logger.warning("Failed to cleanup temp kubeconfig: %s", e)
-            self._temp_file = None
-            self._config_path = None
 
-    def __del__(self):
-        self.cleanup()
+def probe_context(client_helper: KubeClientHelper, context_name: str):
+    client = client_helper.get_client_for_context(context_name)
+    client.core.list_namespace(limit=1, _request_timeout=REQUEST_TIMEOUT)
 
 
 class KubeHelper:
@@ -189,11 +333,19 @@ class KubeHelper:
         pods_flyql_filter: str = "",
         selected_contexts: List[str] = [],
         selected_namespaces: List[str] = [],
+        list_page_size: int = 0,
+        list_from_cache: bool = False,
+        deadline: Optional[float] = None,
+        query_constraints: Optional[QueryConstraints] = None,
     ):
         self.conn_id = conn_id
         self.source_id = source_id
         self.max_concurrent_requests = max_concurrent_requests
         self.config = config
+        self.list_page_size = list_page_size
+        self.list_from_cache = list_from_cache
+        self.deadline = deadline if deadline is not None else get_deadline()
+        self.scheduler_stats = SchedulerStats()
         self.context_flyql_filter = context_flyql_filter
         self.namespace_label_selector = namespace_label_selector
         self.namespace_field_selector = namespace_field_selector
@@ -203,20 +355,34 @@ class KubeHelper:
         self.pods_flyql_filter = pods_flyql_filter
         self.selected_contexts = set(selected_contexts)
         self.selected_namespaces = set(selected_namespaces)
+        self.query_constraints = query_constraints or QueryConstraints()
+        self.pods_label_selector = self._join_selectors(
+            self.pods_label_selector, self.query_constraints.label_selector
+        )
+        self.pods_field_selector = self._join_selectors(
+            self.pods_field_selector, self.query_constraints.field_selector
+        )
 
-        self.context_flyql_filter_ast = None
-        self.namespace_flyql_filter_ast = None
-        self.pods_flyql_filter_ast = None
-        self.flyql_evaluator = Evaluator()
+        self.context_flyql_filter_predicate = None
+        self.namespace_flyql_filter_predicate = None
+        self.pods_flyql_filter_predicate = None
 
-        self.client_helper = KubeClientHelper(self.config)
+        self.client_helper = KubeClientHelper(
+            self.config, pool_size=self.max_concurrent_requests
+        )
 
         if self.context_flyql_filter:
-            self.context_flyql_filter_ast = parse(self.context_flyql_filter).root
+            self.context_flyql_filter_predicate = compile_predicate(
+                parse(self.context_flyql_filter).root
+            )
         if self.namespace_flyql_filter:
-            self.namespace_flyql_filter_ast = parse(self.namespace_flyql_filter).root
+            self.namespace_flyql_filter_predicate = compile_predicate(
+                parse(self.namespace_flyql_filter).root
+            )
         if self.pods_flyql_filter:
-            self.pods_flyql_filter_ast = parse(self.pods_flyql_filter).root
+            self.pods_flyql_filter_predicate = compile_predicate(
+                parse(self.pods_flyql_filter).root
+            )
 
         self.contexts_cache_key = self._make_cache_key(
             "k8s_contexts",
@@ -233,6 +399,7 @@ class KubeHelper:
             self.namespace_field_selector,
             self.namespace_flyql_filter,
             ",".join(sorted(selected_contexts)) if selected_contexts else "",
+            self.query_constraints.cache_key,
             self.config.kubeconfig_hash,
         )
         self.pods_cache_key = self._make_cache_key(
@@ -247,6 +414,7 @@ class KubeHelper:
             self.pods_flyql_filter,
             ",".join(sorted(selected_contexts)) if selected_contexts else "",
             ",".join(sorted(selected_namespaces)) if selected_namespaces else "",
+            self.query_constraints.cache_key,
             self.config.kubeconfig_hash,
         )
         self._contexts = None
@@ -262,6 +430,17 @@ class KubeHelper:
         key_str = ":".join(str(arg) for arg in args)
         return hashlib.md5(key_str.encode()).hexdigest()
 
+    def get_request_timeout(self) -> Tuple[float, float]:
+        remaining = max(get_remaining_time(self.deadline), 0.001)
+        return (
+            min(REQUEST_TIMEOUT[0], remaining),
+            min(REQUEST_TIMEOUT[1], remaining),
+        )
+
+    @staticmethod
+    def _join_selectors(*selectors: str) -> str:
+        return ",".join(s for s in selectors if s)
+
     @property
     def allowed_contexts(self) -> List[str]:
         if self._allowed_contexts is None:
@@ -271,11 +450,9 @@ class KubeHelper:
             else:
                 contexts = self.config.list_contexts()
                 matched = []
-                if self.context_flyql_filter_ast is not None:
+                if self.context_flyql_filter_predicate is not None:
                     for context in contexts:
-                        if self.flyql_evaluator.evaluate(
-                            self.context_flyql_filter_ast, Record(data=context)
-                        ):
+                        if self.context_flyql_filter_predicate(context):
                             matched.append(context)
                     self._allowed_contexts = matched
                 else:
@@ -291,6 +468,12 @@ class KubeHelper:
 
     @property
     def contexts(self) -> Set[str]:
+        contexts = self._base_contexts()
+        if self.query_constraints:
+            contexts = set(self.query_constraints.filter_names("context", contexts))
+        return contexts
+
+    def _base_contexts(self) -> Set[str]:
         if self.selected_contexts:
             if not self._validation_called:
                 raise ValueError(
@@ -302,14 +485,19 @@ class KubeHelper:
         if self.config.current_context:
             for ctx in self.allowed_contexts:
                 if ctx["name"] == self.config.current_context:
-                    logger.debug("Using current_context: %s", self.config.current_context)
+                    logger.debug(
+                        "Using current_context: %s", self.config.current_context
+                    )
                     return {self.config.current_context}
 
-        # If we have multiple contexts and no current-context/filter, 
+        # If we have multiple contexts and no current-context/filter,
         # return ONLY the first one to avoid mass connection timeouts
         if not self.context_flyql_filter and self.allowed_contexts_set:
             first_ctx = self.allowed_contexts[0]["name"]
-            logger.debug("No current_context or filter, falling back to first context: %s", first_ctx)
+            logger.debug(
+                "No current_context or filter, falling back to first context: %s",
+                first_ctx,
+            )
             return {first_ctx}
 
         return self.allowed_contexts_set
@@ -330,38 +518,65 @@ class KubeHelper:
     @property
     def namespaces(self):
         if self._namespaces is None:
-            all_namespaces = self._get_all_namespaces()
-            if self.selected_namespaces:
-                self._namespaces = {
-                    ctx: [n for n in ns if n in self.selected_namespaces]
-                    for ctx, ns in all_namespaces.items()
-                }
-            else:
-                self._namespaces = all_namespaces
+            self._namespaces = {
+                ctx: self._filter_namespaces(ns)
+                for ctx, ns in self._get_all_namespaces().items()
+            }
         return self._namespaces
 
+    def _filter_namespaces(self, namespaces: List[str]) -> List[str]:
+        if self.selected_namespaces:
+            namespaces = [ns for ns in namespaces if ns in self.selected_namespaces]
+        if self.query_constraints:
+            namespaces = self.query_constraints.filter_names("namespace", namespaces)
+        return namespaces
+
     def store_error(self, operation: str, sev: str, data: Dict[str, Any]):
         self.errors.append({"operation": operation, "sev": sev, "data": data})
 
     def get_namespaces(self) -> Tuple[Dict[str, T], Dict[str, Exception]]:
         return self.execute_parallel(
             self.get_namespaces_from_client,
-            max_workers=50,
             contexts=self.contexts,
         )
 
+    def iter_list(self, list_func: Callable, **kwargs) -> Iterator[Any]:
+        """
+        Iterates over items returned by a kubernetes list_* call.
+        When list_page_size is set, items are requested in chunks of that size
+        following the `_continue` token, so the API server and the client never
+        have to hold the whole collection in one response. When list_from_cache
+        is set, the first request is sent with resourceVersion=0 to be served
+        from the API server watch cache instead of etcd.
+        """
+        if self.list_from_cache:
+            kwargs["resource_version"] = "0"
+        if self.list_page_size > 0:
+            kwargs["limit"] = self.list_page_size
+
+        while True:
+            response = list_func(**kwargs, _request_timeout=self.get_request_timeout())
+            yield from response.items
+            if self.list_page_size <= 0:
+                return
+            token = getattr(response.metadata, "_continue", None)
+            if not token:
+                return
+            # resourceVersion is not allowed together with a continue token,
+            # the token already pins the snapshot
+            kwargs.pop("resource_version", None)
+            kwargs["_continue"] = token
+
     def get_namespaces_from_client(self, client: KubeClient) -> List[str]:
         result = []
-        namespaces = client.core.list_namespace(
+        namespaces = self.iter_list(
+            client.core.list_namespace,
             field_selector=self.namespace_field_selector,
             label_selector=self.namespace_label_selector,
         )
-        for ns in namespaces.items:
-            if self.namespace_flyql_filter_ast:
-                ns_dict = ns.to_dict()
-                if self.flyql_evaluator.evaluate(
-                    self.namespace_flyql_filter_ast, Record(data=ns_dict)
-                ):
+        for ns in namespaces:
+            if self.namespace_flyql_filter_predicate is not None:
+                if self.namespace_flyql_filter_predicate(ns.to_dict()):
                     result.append(ns.metadata.name)
             else:
                 result.append(ns.metadata.name)
@@ -391,75 +606,53 @@ class KubeHelper:
 
         all_namespaces = self._get_all_namespaces()
 
-        def get_pods_for_context(
-            context_name: str,
-        ) -> Tuple[Dict[str, Dict[str, Dict]], Dict[str, Exception]]:
-            namespaces = all_namespaces.get(context_name, [])
-            if self.selected_namespaces:
-                namespaces = [ns for ns in namespaces if ns in self.selected_namespaces]
-            client = self.client_helper.get_client_for_context(context_name)
-            return self._get_pods_for_namespaces(client, namespaces)
-
-        contexts_to_fetch = self.contexts
+        tasks = []
+        for context_name in self.contexts:
+            results[context_name] = {}
+            namespaces = self._filter_namespaces(all_namespaces.get(context_name, []))
+            for ns in namespaces:
+                tasks.append(
+                    FetchTask(
+                        key=(context_name, ns),
+                        target=self._get_target(context_name),
+                        func=partial(self._get_pods_for_namespace, context_name, ns),
+                    )
+                )
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_context = {
-                executor.submit(get_pods_for_context, ctx): ctx
-                for ctx in contexts_to_fetch
-            }
-            for future in as_completed(future_to_context):
-                ctx = future_to_context[future]
-                try:
-                    ctx_results, ctx_errors = future.result()
-                    results[ctx] = ctx_results
-                    if ctx_errors:
-                        errors[ctx] = ctx_errors
-                except Exception as e:
-                    errors[ctx] = e
+        task_results, task_errors, _ = self.run_tasks(tasks)
+        for (context_name, ns), pods in task_results.items():
+            results[context_name][ns] = pods
+        for (context_name, ns), err in task_errors.items():
+            errors.setdefault(context_name, {})[ns] = err
 
         return results, errors
 
-    def _get_pods_for_namespaces(
-        self, client: KubeClient, namespaces: List[str]
-    ) -> Tuple[Dict[str, Dict[str, Dict]], Dict[str, Exception]]:
-        results: Dict[str, Dict[str, Dict]] = {}
-        errors: Dict[str, Exception] = {}
-
-        def get_pods_for_namespace(ns: str) -> Tuple[str, Dict[str, Dict]]:
-            pods: Dict[str, Dict] = {}
-            for pod in client.core.list_namespaced_pod(
-                namespace=ns,
-                field_selector=self.pods_field_selector,
-                label_selector=self.pods_label_selector,
-            ).items:
-                if self.pods_flyql_filter_ast:
-                    pod_dict = pod.to_dict()
-                    if not self.flyql_evaluator.evaluate(
-                        self.pods_flyql_filter_ast, Record(data=pod_dict)
-                    ):
-                        continue
-                pods[pod.metadata.name] = {
-                    "containers": [c.name for c in pod.spec.containers],
-                    "status": pod.status.phase,
-                    "node": pod.spec.node_name or "",
-                    "labels": pod.metadata.labels or {},
-                    "annotations": pod.metadata.annotations or {},
-                }
-            return ns, pods
-
-        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
-            future_to_ns = {
-                executor.submit(get_pods_for_namespace, ns): ns for ns in namespaces
+    def _get_pods_for_namespace(self, context_name: str, ns: str) -> Dict[str, Dict]:
+        client = self.client_helper.get_client_for_context(context_name)
+        pods: Dict[str, Dict] = {}
+        for pod in self.iter_list(
+            client.core.list_namespaced_pod,
+            namespace=ns,
+            field_selector=self.pods_field_selector,
+            label_selector=self.pods_label_selector,
+        ):
+            # field selectors only take single values, the rest of the
+            # query constraints are checked here
+            if not self.query_constraints.matches_pod(
+                pod.metadata.name, pod.spec.node_name or "", pod.status.phase
+            ):
+                continue
+            if self.pods_flyql_filter_predicate is not None:
+                if not self.pods_flyql_filter_predicate(pod.to_dict()):
+                    continue
+            pods[pod.metadata.name] = {
+                "containers": [c.name for c in pod.spec.containers],
+                "status": pod.status.phase,
+                "node": pod.spec.node_name or "",
+                "labels": pod.metadata.labels or {},
+                "annotations": pod.metadata.annotations or {},
             }
-            for future in as_completed(future_to_ns):
-                ns = future_to_ns[future]
-                try:
-                    _, pods = future.result()
-                    results[ns] = pods
-                except Exception as e:
-                    errors[ns] = e
-
-        return results, errors
+        return pods
 
     def validate(self):
         if not self.allowed_contexts_set:
@@ -479,36 +672,69 @@ class KubeHelper:
 
         self._validation_called = True
 
+    def _get_target(self, context_name: str) -> Tuple[str, str, str]:
+        target = ("kubernetes", self.config.kubeconfig_hash, context_name)
+        get_health_registry().register_probe(
+            target, partial(probe_context, self.client_helper, context_name)
+        )
+        return target
+
+    def run_tasks(
+        self, tasks: List[FetchTask]
+    ) -> Tuple[Dict[Any, Any], Dict[Any, Exception], SchedulerStats]:
+        """
+        Runs tasks on the shared scheduler, each context is a separate target
+        limited to max_concurrent_requests across all requests.
+        """
+        results, errors, stats = get_scheduler().run(
+            tasks,
+            default_target_limit=self.max_concurrent_requests,
+            deadline=self.deadline,
+            health=get_health_registry(),
+        )
+        self.scheduler_stats.merge(stats)
+        return results, errors, stats
+
+    def iter_tasks(
+        self, tasks: List[FetchTask], stats: SchedulerStats
+    ) -> Iterator[Tuple[FetchTask, Any, Optional[Exception]]]:
+        """
+        Like run_tasks, but yields (task, result, error) as tasks finish.
+        """
+        try:
+            yield from get_scheduler().iter_run(
+                tasks,
+                default_target_limit=self.max_concurrent_requests,
+                deadline=self.deadline,
+                stats=stats,
+                health=get_health_registry(),
+            )
+        finally:
+            self.scheduler_stats.merge(stats)
+
     def execute_parallel(
         self,
         func: Callable[[KubeClient], T],
-        max_workers: Optional[int] = None,
         contexts: Optional[Set[str]] = None,
     ) -> Tuple[Dict[str, T], Dict[str, Exception]]:
 
-        results: Dict[str, T] = {}
-        errors: Dict[str, Exception] = {}
-
         def wrapper(context_name: str) -> T:
             client = self.client_helper.get_client_for_context(context_name)
             return func(client)
 
-        if max_workers is None:
-            max_workers = self.max_concurrent_requests
-
         if contexts is None:
             contexts = self.contexts
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_context = {executor.submit(wrapper, ctx): ctx for ctx in contexts}
-
-            for future in as_completed(future_to_context):
-                ctx = future_to_context[future]
-                try:
-                    results[ctx] = future.result()
-                except Exception as e:
-                    errors[ctx] = e
-
+        results, errors, _ = self.run_tasks(
+            [
+                FetchTask(
+                    key=ctx,
+                    target=self._get_target(ctx),
+                    func=partial(wrapper, ctx),
+                )
+                for ctx in contexts
+            ]
+        )
         return results, errors
 
     def get_logs(
@@ -521,215 +747,227 @@ class KubeHelper:
         all_logs: List[LogEntry] = []
         errors: Dict[str, Any] = {}
 
-        def get_logs_for_context(
-            context_name: str,
-        ) -> Tuple[List[LogEntry], Dict[str, Exception]]:
-            pods_by_ns = self.pods.get(context_name, {})
-            client = self.client_helper.get_client_for_context(context_name)
-            return self._get_logs_for_context(
-                client,
-                context_name,
-                pods_by_ns,
-                since_seconds,
-                time_from,
-                time_to,
-                tail_lines,
-            )
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_context = {
-                executor.submit(get_logs_for_context, ctx): ctx
-                for ctx in self.pods.keys()
-            }
-            for future in as_completed(future_to_context):
-                ctx = future_to_context[future]
-                try:
-                    ctx_logs, ctx_errors = future.result()
-                    all_logs.extend(ctx_logs)
-                    if ctx_errors:
-                        errors[ctx] = ctx_errors
-                except Exception as e:
-                    errors[ctx] = e
+        for (context_name, ns, pod, cont), entries, err in self.iter_logs(
+            since_seconds, time_from, time_to, tail_lines
+        ):
+            if err is not None:
+                errors.setdefault(context_name, {})[f"{ns}/{pod}/{cont}"] = err
+            else:
+                all_logs.extend(entries)
 
         return all_logs, errors
 
-    def _get_logs_for_context(
+    def iter_logs(
+        self,
+        since_seconds: int,
+        time_from: datetime,
+        time_to: datetime,
+        tail_lines: int = 0,
+        consumer: Callable[[Iterator[LogEntry]], T] = list,
+        raw_consumer: Optional[Callable[[str, ContainerMeta], T]] = None,
+    ) -> Iterator[Tuple[Tuple[str, str, str, str], T, Optional[Exception]]]:
+        """
+        Yields ((context, namespace, pod, container), result, error) for
+        every container as soon as its logs are fetched. `result` is what
+        `consumer` returned for the container's entries, by default a list,
+        or what `raw_consumer` returned for its unparsed logs.
+        """
+        tasks = []
+        for context_name, pods_by_ns in self.pods.items():
+            for namespace, pods in pods_by_ns.items():
+                for pod_name, pod_data in pods.items():
+                    containers = self.query_constraints.filter_names(
+                        "container", pod_data.get("containers", [])
+                    )
+                    for container in containers:
+                        tasks.append(
+                            FetchTask(
+                                key=(context_name, namespace, pod_name, container),
+                                target=self._get_target(context_name),
+                                func=partial(
+                                    self._fetch_container_logs,
+                                    context_name,
+                                    namespace,
+                                    pod_name,
+                                    container,
+                                    pod_data,
+                                    since_seconds,
+                                    time_from,
+                                    time_to,
+                                    tail_lines,
+                                    consumer,
+                                    raw_consumer,
+                                ),
+                            )
+                        )
+
+        stats = SchedulerStats()
+        for task, entries, err in self.iter_tasks(tasks, stats):
+            yield task.key, entries, err
+
+        logger.info("Log fetch scheduling stats: %s", stats.as_dict())
+
+    def _fetch_container_logs(
+        self,
+        context_name: str,
+        namespace: str,
+        pod_name: str,
+        container: str,
+        pod_data: Dict,
+        since_seconds: int,
+        time_from: datetime,
+        time_to: datetime,
+        tail_lines: int = 0,
+        consumer: Callable[[Iterator[LogEntry]], T] = list,
+        raw_consumer: Optional[Callable[[str, ContainerMeta], T]] = None,
+    ) -> T:
+        client = self.client_helper.get_client_for_context(context_name)
+        return self._fetch_single_container_logs(
+            client,
+            context_name,
+            namespace,
+            pod_name,
+            container,
+            pod_data,
+            since_seconds,
+            time_from,
+            time_to,
+            tail_lines,
+            consumer,
+            raw_consumer,
+        )
+
+    def _fetch_single_container_logs(
         self,
         client: KubeClient,
         context_name: str,
-        pods_by_ns: Dict[str, Dict[str, Dict]],
+        namespace: str,
+        pod_name: str,
+        container: str,
+        pod_data: Dict,
         since_seconds: int,
         time_from: datetime,
         time_to: datetime,
         tail_lines: int = 0,
-    ) -> Tuple[List[LogEntry], Dict[str, Exception]]:
-        all_logs: List[LogEntry] = []
-        errors: Dict[str, Exception] = {}
-
-        fetch_tasks = []
-        for namespace, pods in pods_by_ns.items():
-            for pod_name, pod_data in pods.items():
-                for container in pod_data.get("containers", []):
-                    fetch_tasks.append((namespace, pod_name, container, pod_data))
-
-        def fetch_container_logs(
-            namespace: str, pod_name: str, container: str, pod_data: Dict
-        ) -> Tuple[str, str, str, List[LogEntry]]:
-            entries = self._fetch_single_container_logs(
+        consumer: Callable[[Iterator[LogEntry]], T] = list,
+        raw_consumer: Optional[Callable[[str, ContainerMeta], T]] = None,
+    ) -> T:
+        """
+        Reads logs of a single container. Parsed entries are handed to
+        `consumer` as an iterator, so it can aggregate them without keeping
+        them around; by default they are collected into a list. When
+        `raw_consumer` is set, the unparsed log text is handed to it instead.
+        """
+        status = pod_data.get("status", "")
+        meta = ContainerMeta(
+            context=context_name,
+            namespace=namespace,
+            pod=pod_name,
+            container=container,
+            node=pod_data.get("node", ""),
+            labels=pod_data.get("labels", {}),
+            annotations=pod_data.get("annotations", {}),
+            status=status,
+        )
+
+        try:
+            raw_logs = self._read_container_log(
                 client,
-                context_name,
                 namespace,
                 pod_name,
                 container,
-                pod_data,
+                status,
                 since_seconds,
-                time_from,
-                time_to,
                 tail_lines,
+                request_timeout=self.get_request_timeout(),
+            )
+        except Exception as e:
+            logger.error(
+                "Error fetching logs for %s/%s/%s/%s: %s",
+                context_name,
+                namespace,
+                pod_name,
+                container,
+                e,
+            )
+            if time.monotonic() >= self.deadline:
+                raise DeadlineExceededError("deadline exceeded while reading logs")
+            # let the scheduler count it against the context
+            if is_unavailable_error(e):
+                raise
+            raw_logs = ""
+
+        if raw_consumer is not None:
+            return raw_consumer(raw_logs, meta)
+
+        counts = {"total": 0, "kept": 0, "filtered_by_ts": 0}
+        entries = consumer(parse_log_lines(raw_logs, meta, time_from, time_to, counts))
+
+        if counts["total"] > 0:
+            logger.debug(
+                "Pod %s/%s/%s: fetched %d lines, %d kept, %d filtered by time range (%s to %s)",
+                context_name,
+                namespace,
+                pod_name,
+                counts["total"],
+                counts["kept"],
+                counts["filtered_by_ts"],
+                time_from.isoformat(),
+                time_to.isoformat(),
             )
-            return namespace, pod_name, container, entries
-
-        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
-            future_to_task = {
-                executor.submit(fetch_container_logs, ns, pod, cont, pod_data): (
-                    ns,
-                    pod,
-                    cont,
-                )
-                for ns, pod, cont, pod_data in fetch_tasks
-            }
-            for future in as_completed(future_to_task):
-                ns, pod, cont = future_to_task[future]
-                try:
-                    _, _, _, entries = future.result()
-                    all_logs.extend(entries)
-                except Exception as e:
-                    error_key = f"{ns}/{pod}/{cont}"
-                    errors[error_key] = e
 
-        return all_logs, errors
+        return entries
 
-    def _fetch_single_container_logs(
-        self,
+    @staticmethod
+    def _read_container_log(
         client: KubeClient,
-        context_name: str,
         namespace: str,
         pod_name: str,
         container: str,
-        pod_data: Dict,
+        status: str,
         since_seconds: int,
-        time_from: datetime,
-        time_to: datetime,
         tail_lines: int = 0,
-    ) -> List[LogEntry]:
-        entries = []
-
-        node = pod_data.get("node", "")
-        labels = pod_data.get("labels", {})
-        annotations = pod_data.get("annotations", {})
-        status = pod_data.get("status", "")
-
+        request_timeout: Optional[Tuple[float, float]] = None,
+    ) -> str:
         log_params = {
             "name": pod_name,
             "namespace": namespace,
             "container": container,
             "timestamps": True,
         }
+        if request_timeout is not None:
+            log_params["_request_timeout"] = request_timeout
         if since_seconds > 0:
             log_params["since_seconds"] = since_seconds
         if tail_lines > 0:
             log_params["tail_lines"] = tail_lines
 
         try:
-            try:
-                raw_logs = client.core.read_namespaced_pod_log(**log_params)
-            except Exception as e:
-                # If container is terminated, try fetching previous logs if it's a 400 error
-                if hasattr(e, 'status') and e.status == 400 and "terminated" in str(e).lower():
-                    log_params["previous"] = True
-                    try:
-                        raw_logs = client.core.read_namespaced_pod_log(**log_params)
-                    except Exception:
-                        # If still failing, it's likely no logs are available
-                        return entries
-                else:
-                    raise e
-
-            if not raw_logs and status in ("Succeeded", "Failed", "Error"):
+            raw_logs = client.core.read_namespaced_pod_log(**log_params)
+        except Exception as e:
+            # If container is terminated, try fetching previous logs if it's a 400 error
+            if (
+                hasattr(e, "status")
+                and e.status == 400
+                and "terminated" in str(e).lower()
+            ):
                 log_params["previous"] = True
                 try:
                     raw_logs = client.core.read_namespaced_pod_log(**log_params)
                 except Exception:
-                    return entries
-
-            if not raw_logs:
-                return entries
-
-            lines = raw_logs.splitlines()
-            total_lines = len(lines)
-            filtered_by_ts = 0
-            
-            if total_lines > 0:
-                first_line = lines[0]
-                last_line = lines[-1]
-                # logger.debug(
-                #     "Pod %s/%s/%s: Raw logs sample - First: %s, Last: %s",
-                #     context_name, namespace, pod_name,
-                #     first_line[:50], last_line[:50]
-                # )
-            
-            for line in lines:
-                if not line:
-                    continue
-
-                parts = line.split(" ", 1)
-                ts = self._parse_k8s_timestamp(parts[0])
-                if not ts:
-                    continue
-
-                if ts < time_from or ts > time_to:
-                    filtered_by_ts += 1
-                    continue
-
-                message = parts[1] if len(parts) > 1 else ""
-                message = ANSI_ESCAPE.sub("", message)
-                
-                entries.append(
-                    LogEntry(
-                        timestamp=ts,
-                        context=context_name,
-                        namespace=namespace,
-                        pod=pod_name,
-                        container=container,
-                        node=node,
-                        labels=labels,
-                        annotations=annotations,
-                        message=message,
-                        status=status,
-                    )
-                )
-
-            if total_lines > 0:
-                logger.debug(
-                    "Pod %s/%s/%s: fetched %d lines, %d kept, %d filtered by time range (%s to %s)",
-                    context_name, namespace, pod_name,
-                    total_lines, len(entries), filtered_by_ts,
-                    time_from.isoformat(), time_to.isoformat()
-                )
-            
-            return entries
+                    # If still failing, it's likely no logs are available
+                    return ""
+            else:
+                raise e
 
-        except Exception as e:
-            logger.error(
-                "Error fetching logs for %s/%s/%s/%s: %s",
-                context_name,
-                namespace,
-                pod_name,
-                container,
-                e,
-            )
+        if not raw_logs and status in ("Succeeded", "Failed", "Error"):
+            log_params["previous"] = True
+            try:
+                raw_logs = client.core.read_namespaced_pod_log(**log_params)
+            except Exception:
+                return ""
 
-        return entries
+        return raw_logs or ""
 
     @staticmethod
     def _parse_k8s_timestamp(timestamp_str: str) -> Optional[datetime]:
@@ -737,40 +975,43 @@ class KubeHelper:
             # Kubernetes timestamps can be:
             # 1. UTC: 2026-02-11T06:18:07.123456789Z
             # 2. With offset: 2026-02-11T14:18:07.123456789+08:00
-            
+
             # Use dateutil if available, otherwise fall back to manual parsing
             try:
                 from dateutil import parser
+
                 dt = parser.isoparse(timestamp_str)
                 # Ensure it's in UTC for comparison
                 from telescope.constants import UTC_ZONE
+
                 return dt.astimezone(UTC_ZONE)
             except ImportError:
                 from telescope.constants import UTC_ZONE
-                
+
                 # Manual parsing for common K8s formats
                 # 2026-02-11T14:18:02.219510151+08:00
-                t_parts = re.split(r'[TZ+-]', timestamp_str)
+                t_parts = re.split(r"[TZ+-]", timestamp_str)
                 year = int(t_parts[0])
                 month = int(t_parts[1])
                 day = int(t_parts[2])
                 hour = int(t_parts[3])
                 minute = int(t_parts[4])
                 second = int(t_parts[5][:2])
-                
+
                 dt = datetime(year, month, day, hour, minute, second, 0, UTC_ZONE)
-                
+
                 # Adjust for offset if present
-                if '+' in timestamp_str or '-' in timestamp_str:
-                    offset_str = re.search(r'[+-]\d{2}:?\d{2}$', timestamp_str)
+                if "+" in timestamp_str or "-" in timestamp_str:
+                    offset_str = re.search(r"[+-]\d{2}:?\d{2}$", timestamp_str)
                     if offset_str:
-                        offset_str = offset_str.group().replace(':', '')
-                        sign = 1 if offset_str[0] == '+' else -1
+                        offset_str = offset_str.group().replace(":", "")
+                        sign = 1 if offset_str[0] == "+" else -1
                         hours = int(offset_str[1:3])
                         minutes = int(offset_str[3:5])
                         from datetime import timedelta
-                        dt = dt - timedelta(hours=sign*hours, minutes=sign*minutes)
-                
+
+                        dt = dt - timedelta(hours=sign * hours, minutes=sign * minutes)
+
                 return dt
         except (ValueError, AttributeError, IndexError, Exception) as e:
             logger.error("Error parsing timestamp %s: %s", timestamp_str, e)
@@ -799,10 +1040,11 @@ class KubeHelper:
 
         for namespace in namespaces:
             try:
-                deployment_list = client.apps.list_namespaced_deployment(
-                    namespace=namespace
+                deployments_iter = self.iter_list(
+                    client.apps.list_namespaced_deployment,
+                    namespace=namespace,
                 )
-                for deployment in deployment_list.items:
+                for deployment in deployments_iter:
                     status = "Unknown"
                     if deployment.status.conditions:
                         for condition in deployment.status.conditions:
@@ -859,6 +1101,13 @@ class KubeHelper:
         if not context_to_test:
             context_to_test = self.allowed_contexts[0]["name"]
 
-        client = self.client_helper.get_client_for_context(context_to_test)
-        client.core.list_namespace()
+        get_health_registry().run_probe(
+            self._get_target(context_to_test),
+            partial(probe_context, self.client_helper, context_to_test),
+        )
         return True
+
+    def get_health(self) -> List[Dict[str, Any]]:
+        return get_health_registry().states(
+            [self._get_target(ctx["name"]) for ctx in self.allowed_contexts]
+        )
@@ -1,26 +1,44 @@
+import heapq
 import logging
 from datetime import datetime
-
-from flyql.core.parser import parse, ParserError
-from flyql.core.exceptions import FlyqlError
-from flyql.matcher.evaluator import Evaluator
-from flyql.matcher.record import Record
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from telescope.constants import UTC_ZONE
 from telescope.utils import get_telescope_column
 from telescope.fetchers.fetcher import BaseFetcher
-from telescope.fetchers.models import Row
+from telescope.fetchers.models import RowBatch
 from telescope.fetchers.request import DataRequest, GraphDataRequest
 from telescope.fetchers.response import (
     AutocompleteResponse,
     DataResponse,
     GraphDataResponse,
+    DataAndGraphDataResponse,
+    DataAndGraphDataBatch,
+    DataAndGraphDataSummary,
 )
+from telescope.fetchers.graph_utils import GraphCounter
+from telescope.fetchers.health import CircuitOpenError, format_target
+from telescope.fetchers.scheduler import DeadlineExceededError
+from telescope.fetchers.parse_pool import get_parse_pool
 from telescope.fetchers.kubernetes.api import (
     KubeConfigHelper,
     KubeHelper,
     KubeHelperError,
+    ContainerMeta,
+    LogEntry,
+    parse_log_lines,
+)
+from telescope.fetchers.aggregate import (
+    ContainerResult,
+    aggregate_container_log,
+    entry_unixtime,
+)
+from telescope.fetchers.kubernetes.inventory import (
+    get_inventory_index,
+    is_indexed_column,
 )
+from telescope.fetchers.kubernetes.pushdown import extract_constraints
 from telescope.fetchers.kubernetes.models import (
     ConnectionTestResponse,
     ConnectionTestResponseNg,
@@ -39,20 +57,81 @@ def ensure_list(val):
 
 logger = logging.getLogger("telescope.fetchers.kubernetes")
 
+DEFAULT_MAX_CONCURRENT_REQUESTS = 20
+DEFAULT_LIST_PAGE_SIZE = 500
+
+
+def get_connection_helper_kwargs(conn_data: dict) -> dict:
+    return {
+        "max_concurrent_requests": conn_data.get(
+            "max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS
+        ),
+        "config": KubeConfigHelper(
+            kubeconfig=conn_data["kubeconfig"],
+            kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
+            is_local=conn_data.get("kubeconfig_is_local", False),
+        ),
+        "context_flyql_filter": conn_data.get("context_filter", ""),
+        "list_page_size": conn_data.get("list_page_size", DEFAULT_LIST_PAGE_SIZE),
+        "list_from_cache": conn_data.get("list_from_cache", False),
+    }
+
+
+def iter_helper_errors(helper: KubeHelper) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Yields (operation, target, error) for errors stored on the helper,
+    e.g. target "ctx/ns/pod/container".
+    """
+
+    def walk(operation, target, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from walk(
+                    operation, f"{target}/{key}" if target else str(key), item
+                )
+        else:
+            yield operation, target, value
+
+    for err in helper.errors:
+        yield from walk(err["operation"], "", err["data"])
+
+
+def get_helper_errors(helper: KubeHelper) -> List[Dict[str, str]]:
+    return [
+        {"operation": operation, "target": target, "error": str(error)}
+        for operation, target, error in iter_helper_errors(helper)
+    ]
+
+
+def get_partial_message(helper: KubeHelper) -> Optional[str]:
+    """
+    Describes what is missing from the results because contexts were
+    unavailable or the request deadline was exceeded.
+    """
+    contexts = set()
+    unfinished = 0
+    for _, _, error in iter_helper_errors(helper):
+        if isinstance(error, CircuitOpenError):
+            contexts.add(format_target(error.target))
+        elif isinstance(error, DeadlineExceededError):
+            unfinished += 1
+
+    messages = []
+    if contexts:
+        messages.append(f"Skipped unavailable contexts: {', '.join(sorted(contexts))}.")
+    if unfinished:
+        messages.append(
+            f"Request deadline exceeded, results are incomplete: {unfinished} "
+            "calls to the API server did not finish."
+        )
+    return join_messages(*messages)
 
-class Fetcher(BaseFetcher):
-    @classmethod
-    def validate_query(cls, source, query):
-        if not query:
-            return True, None
-        try:
-            parse(query)
-            return True, None
-        except ParserError as err:
-            return False, err.message
-        except FlyqlError as err:
-            return False, err.message
 
+def join_messages(*messages: Optional[str]) -> Optional[str]:
+    return " ".join(m for m in messages if m) or None
+
+
+class Fetcher(BaseFetcher):
     @classmethod
     def test_connection_ng(cls, data: dict) -> ConnectionTestResponseNg:
         response = ConnectionTestResponseNg()
@@ -79,7 +158,10 @@ class Fetcher(BaseFetcher):
                 response.error = "No contexts matched the filter expression"
                 return response
 
-            helper.test_connection()
+            try:
+                helper.test_connection()
+            finally:
+                response.health = helper.get_health()
             response.result = True
 
         except Exception as err:
@@ -103,7 +185,10 @@ class Fetcher(BaseFetcher):
                 config=config,
                 context_flyql_filter=data.get("context_filter", ""),
             )
-            helper.test_connection()
+            try:
+                helper.test_connection()
+            finally:
+                response.health = helper.get_health()
             response.reachability["result"] = True
         except Exception as err:
             response.reachability["error"] = str(err)
@@ -120,15 +205,15 @@ class Fetcher(BaseFetcher):
     def get_schema(cls, data: dict):
         return [
             get_telescope_column("time", "datetime"),
-            get_telescope_column("context", "string", autocomplete=False),
-            get_telescope_column("namespace", "string", autocomplete=False),
-            get_telescope_column("pod", "string", autocomplete=False),
-            get_telescope_column("container", "string", autocomplete=False),
-            get_telescope_column("node", "string", autocomplete=False),
-            get_telescope_column("labels", "json", autocomplete=False),
-            get_telescope_column("annotations", "json", autocomplete=False),
+            get_telescope_column("context", "string"),
+            get_telescope_column("namespace", "string"),
+            get_telescope_column("pod", "string"),
+            get_telescope_column("container", "string"),
+            get_telescope_column("node", "string"),
+            get_telescope_column("labels", "json"),
+            get_telescope_column("annotations", "json"),
             get_telescope_column("message", "string", autocomplete=False),
-            get_telescope_column("status", "string", autocomplete=False),
+            get_telescope_column("status", "string"),
         ]
 
     @classmethod
@@ -139,13 +224,7 @@ class Fetcher(BaseFetcher):
         helper = KubeHelper(
             conn_id=source.conn.id,
             source_id=source.id,
-            max_concurrent_requests=conn_data.get("max_concurrent_requests", 20),
-            config=KubeConfigHelper(
-                kubeconfig=conn_data["kubeconfig"],
-                kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
-                is_local=conn_data.get("kubeconfig_is_local", False),
-            ),
-            context_flyql_filter=conn_data.get("context_filter", ""),
+            **get_connection_helper_kwargs(conn_data),
             namespace_label_selector=source_data.get("namespace_label_selector", ""),
             namespace_field_selector=source_data.get("namespace_field_selector", ""),
             namespace_flyql_filter=source_data.get("namespace", ""),
@@ -168,13 +247,7 @@ class Fetcher(BaseFetcher):
         helper = KubeHelper(
             conn_id=source.conn.id,
             source_id=source.id,
-            max_concurrent_requests=conn_data.get("max_concurrent_requests", 20),
-            config=KubeConfigHelper(
-                kubeconfig=conn_data["kubeconfig"],
-                kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
-                is_local=conn_data.get("kubeconfig_is_local", False),
-            ),
-            context_flyql_filter=conn_data.get("context_filter", ""),
+            **get_connection_helper_kwargs(conn_data),
             namespace_label_selector=source_data.get("namespace_label_selector", ""),
             namespace_field_selector=source_data.get("namespace_field_selector", ""),
             namespace_flyql_filter=source_data.get("namespace", ""),
@@ -220,13 +293,7 @@ class Fetcher(BaseFetcher):
         helper = KubeHelper(
             conn_id=source.conn.id,
             source_id=source.id,
-            max_concurrent_requests=conn_data.get("max_concurrent_requests", 20),
-            config=KubeConfigHelper(
-                kubeconfig=conn_data["kubeconfig"],
-                kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
-                is_local=conn_data.get("kubeconfig_is_local", False),
-            ),
-            context_flyql_filter=conn_data.get("context_filter", ""),
+            **get_connection_helper_kwargs(conn_data),
             namespace_label_selector=source_data.get("namespace_label_selector", ""),
             namespace_field_selector=source_data.get("namespace_field_selector", ""),
             namespace_flyql_filter=source_data.get("namespace", ""),
@@ -257,30 +324,39 @@ class Fetcher(BaseFetcher):
 
     @classmethod
     def autocomplete(cls, source, column, time_from, time_to, value):
-        return AutocompleteResponse(items=[], incomplete=False)
+        """
+        Serves values of pod inventory columns from an in-memory index,
+        without calling the API server. The time range is not applied.
+        """
+        if not is_indexed_column(column):
+            return AutocompleteResponse(items=[], incomplete=False)
 
-    @classmethod
-    def fetch_data(cls, request: DataRequest, tz):
-        conn_data = request.source.conn.data
-        source_data = request.source.data
+        conn_data = source.conn.data
+        source_data = source.data
+        helper = KubeHelper(
+            conn_id=source.conn.id,
+            source_id=source.id,
+            **get_connection_helper_kwargs(conn_data),
+            namespace_label_selector=source_data.get("namespace_label_selector", ""),
+            namespace_field_selector=source_data.get("namespace_field_selector", ""),
+            namespace_flyql_filter=source_data.get("namespace", ""),
+        )
+        items, incomplete = get_inventory_index(helper).search(column, value)
+        return AutocompleteResponse(items=items, incomplete=incomplete)
 
-        time_from_dt = datetime.fromtimestamp(request.time_from / 1000, UTC_ZONE)
-        time_to_dt = datetime.fromtimestamp(request.time_to / 1000, UTC_ZONE)
+    @staticmethod
+    def _get_since_seconds(time_from_dt: datetime) -> int:
         now = datetime.now(UTC_ZONE)
-        since_seconds = int((now - time_from_dt).total_seconds())
-        if since_seconds < 0:
-            since_seconds = 0
+        return max(0, int((now - time_from_dt).total_seconds()))
 
-        helper = KubeHelper(
+    @classmethod
+    def _get_data_helper(cls, request, query_ast) -> KubeHelper:
+        conn_data = request.source.conn.data
+        source_data = request.source.data
+        return KubeHelper(
             conn_id=request.source.conn.id,
             source_id=request.source.id,
-            max_concurrent_requests=conn_data.get("max_concurrent_requests", 20),
-            config=KubeConfigHelper(
-                kubeconfig=conn_data["kubeconfig"],
-                kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
-                is_local=conn_data.get("kubeconfig_is_local", False),
-            ),
-            context_flyql_filter=conn_data.get("context_filter", ""),
+            **get_connection_helper_kwargs(conn_data),
             namespace_label_selector=source_data.get("namespace_label_selector", ""),
             namespace_field_selector=source_data.get("namespace_field_selector", ""),
             namespace_flyql_filter=source_data.get("namespace", ""),
@@ -295,15 +371,23 @@ class Fetcher(BaseFetcher):
             selected_namespaces=ensure_list(
                 request.context_columns.get("namespaces", [])
             ),
+            query_constraints=extract_constraints(query_ast),
+            deadline=request.deadline,
         )
 
+    @staticmethod
+    def _check_selection(helper: KubeHelper) -> Tuple[Optional[str], int, int]:
+        """
+        Validates the helper and resolves contexts, namespaces and pods.
+        Returns (error, total_namespaces, total_pods).
+        """
         try:
             helper.validate()
         except KubeHelperError as e:
-            return DataResponse(rows=[], error=str(e))
+            return str(e), 0, 0
 
         if not helper.contexts:
-            return DataResponse(rows=[], error="No contexts available")
+            return "No contexts available", 0, 0
 
         total_namespaces = sum(len(ns) for ns in helper.namespaces.values())
         if total_namespaces == 0:
@@ -311,18 +395,14 @@ class Fetcher(BaseFetcher):
                 error_details = "; ".join(
                     f"{err['operation']}: {err['data']}" for err in helper.errors
                 )
-                return DataResponse(
-                    rows=[], error=f"Failed to fetch namespaces: {error_details}"
-                )
-            return DataResponse(
-                rows=[], error="No namespaces found matching the filters"
-            )
+                return f"Failed to fetch namespaces: {error_details}", 0, 0
+            return "No namespaces found matching the filters", 0, 0
 
         total_pods = sum(
             len(pods) for ns_pods in helper.pods.values() for pods in ns_pods.values()
         )
         if total_pods == 0:
-            return DataResponse(rows=[], error="No pods found matching the filters")
+            return "No pods found matching the filters", total_namespaces, 0
 
         logger.info(
             "Fetching logs: contexts=%d (%s), namespaces=%d, pods=%d",
@@ -331,247 +411,220 @@ class Fetcher(BaseFetcher):
             total_namespaces,
             total_pods,
         )
+        return None, total_namespaces, total_pods
+
+    @staticmethod
+    def _entries_to_rows(request, entries: List[LogEntry], tz) -> RowBatch:
+        return RowBatch(
+            request.source, LogEntry.COLUMNS, [entry.values() for entry in entries], tz
+        )
+
+    @staticmethod
+    def _limited_message(limit: int, total_rows: int) -> Optional[str]:
+        if total_rows > limit:
+            return f"Displaying limited results: Only {limit} out of {total_rows} matching entries are shown."
+        return None
 
-        if total_pods > 0:
-            for ctx, ns_pods in helper.pods.items():
-                for ns, pods in ns_pods.items():
-                    if pods:
-                        logger.info("Context %s, Namespace %s has %d pods", ctx, ns, len(pods))
-        
-        log_entries, log_errors = helper.get_logs(
-            since_seconds, time_from_dt, time_to_dt
+    @classmethod
+    def _iter_container_results(
+        cls, helper: KubeHelper, request, tz, limit: int = 0, with_graph: bool = False
+    ) -> Iterator[
+        Tuple[Tuple[str, str, str, str], ContainerResult, Optional[Exception]]
+    ]:
+        """
+        Fetches logs of all selected containers and yields a ContainerResult
+        per container as it finishes. Parsing, filtering and aggregation run
+        in the parse pool when it is enabled, in the fetching thread otherwise.
+        """
+        time_from_dt = datetime.fromtimestamp(request.time_from / 1000, UTC_ZONE)
+        time_to_dt = datetime.fromtimestamp(request.time_to / 1000, UTC_ZONE)
+        since_seconds = cls._get_since_seconds(time_from_dt)
+
+        group_by = request.group_by[0] if getattr(request, "group_by", None) else None
+        aggregate = partial(
+            aggregate_container_log,
+            partial(parse_log_lines, time_from=time_from_dt, time_to=time_to_dt),
+            query=request.query,
+            limit=limit,
+            graph_range=(request.time_from, request.time_to) if with_graph else None,
+            group_by=group_by,
+            tz=tz,
+        )
+        pool = get_parse_pool()
+
+        def raw_consumer(raw_logs: str, meta: ContainerMeta) -> ContainerResult:
+            try:
+                return pool.run(aggregate, raw_logs, meta, deadline=helper.deadline)
+            except TimeoutError as err:
+                # not a context failure, keep it out of the health statistics
+                raise DeadlineExceededError(
+                    "deadline exceeded while parsing logs"
+                ) from err
+
+        yield from helper.iter_logs(
+            since_seconds, time_from_dt, time_to_dt, raw_consumer=raw_consumer
         )
 
+    @classmethod
+    def _collect_results(
+        cls, helper: KubeHelper, request, tz, limit: int = 0, with_graph: bool = False
+    ) -> Tuple[List[LogEntry], int, Optional[GraphCounter]]:
+        """
+        Merges per-container results into the newest `limit` entries overall,
+        the number of matching entries and the graph counts.
+        """
+        candidates: List[LogEntry] = []
+        total = 0
+        counter = (
+            GraphCounter(request.time_from, request.time_to) if with_graph else None
+        )
+        log_errors: Dict[str, Dict[str, Exception]] = {}
+        for (ctx, ns, pod, container), result, err in cls._iter_container_results(
+            helper, request, tz, limit=limit, with_graph=with_graph
+        ):
+            if err is not None:
+                log_errors.setdefault(ctx, {})[f"{ns}/{pod}/{container}"] = err
+                continue
+            candidates.extend(result.entries)
+            total += result.matched
+            if counter is not None:
+                counter.merge(result.counter)
+
         if log_errors:
             logger.warning("Log fetch errors: %s", log_errors)
+            helper.store_error("get_logs", "warn", log_errors)
 
-        logger.info("Total log entries fetched: %d", len(log_entries))
-
-        evaluator = Evaluator()
-        query_ast = None
-        if request.query:
-            parser = parse(request.query)
-            query_ast = parser.root
-
-        rows = []
-        for entry in log_entries:
-            row = Row(
-                source=request.source,
-                selected_columns=[
-                    "time",
-                    "context",
-                    "namespace",
-                    "pod",
-                    "container",
-                    "node",
-                    "labels",
-                    "annotations",
-                    "message",
-                    "status",
-                ],
-                values=[
-                    entry.timestamp,
-                    entry.context,
-                    entry.namespace,
-                    entry.pod,
-                    entry.container,
-                    entry.node,
-                    entry.labels,
-                    entry.annotations,
-                    entry.message,
-                    entry.status,
-                ],
-                tz=tz,
-            )
+        logger.info("Total matching log entries: %d", total)
 
-            if query_ast:
-                if evaluator.evaluate(query_ast, Record(data=row.data)):
-                    rows.append(row)
-            else:
-                rows.append(row)
+        entries = heapq.nlargest(limit, candidates, key=lambda e: entry_unixtime(e, tz))
+        return entries, total, counter
 
-        rows = sorted(rows, key=lambda r: r.time["unixtime"], reverse=True)
-        total_rows = len(rows)
-        rows = rows[: request.limit]
+    @classmethod
+    def fetch_data(cls, request: DataRequest, tz):
+        query = cls.get_request_query(request)
+        query_ast = query.root if query is not None else None
+
+        helper = cls._get_data_helper(request, query_ast)
+        error, _, _ = cls._check_selection(helper)
+        if error:
+            return DataResponse(rows=[], error=error)
+
+        for ctx, ns_pods in helper.pods.items():
+            for ns, pods in ns_pods.items():
+                if pods:
+                    logger.info(
+                        "Context %s, Namespace %s has %d pods", ctx, ns, len(pods)
+                    )
 
-        message = None
-        if total_rows > request.limit:
-            message = f"Displaying limited results: Only {request.limit} out of {total_rows} matching entries are shown."
+        entries, total, _ = cls._collect_results(
+            helper, request, tz, limit=request.limit
+        )
 
-        return DataResponse(rows=rows, message=message)
+        return DataResponse(
+            rows=cls._entries_to_rows(request, entries, tz),
+            message=join_messages(
+                get_partial_message(helper),
+                cls._limited_message(request.limit, total),
+            ),
+        )
 
     @classmethod
     def fetch_graph_data(cls, request: GraphDataRequest):
+        query = cls.get_request_query(request)
+        query_ast = query.root if query is not None else None
+
+        helper = cls._get_data_helper(request, query_ast)
+        error, _, _ = cls._check_selection(helper)
+        if error:
+            logger.warning("Graph data not fetched: %s", error)
+            counter = GraphCounter(request.time_from, request.time_to)
+        else:
+            _, _, counter = cls._collect_results(
+                helper, request, UTC_ZONE, with_graph=True
+            )
+
+        timestamps, data, total = counter.result()
         return GraphDataResponse(
-            timestamps=[],
-            data={},
-            total=0,
+            timestamps=timestamps,
+            data=data,
+            total=total,
+            message=None if error else get_partial_message(helper),
         )
 
     @classmethod
     def fetch_data_and_graph(cls, request, tz):
-        from telescope.fetchers.graph_utils import generate_graph_from_rows
-        from telescope.fetchers.response import DataAndGraphDataResponse
-        from telescope.constants import UTC_ZONE
+        query = cls.get_request_query(request)
+        query_ast = query.root if query is not None else None
 
-        conn_data = request.source.conn.data
-        source_data = request.source.data
-
-        time_from_dt = datetime.fromtimestamp(request.time_from / 1000, UTC_ZONE)
-        time_to_dt = datetime.fromtimestamp(request.time_to / 1000, UTC_ZONE)
-        now = datetime.now(UTC_ZONE)
-        since_seconds = int((now - time_from_dt).total_seconds())
-        if since_seconds < 0:
-            since_seconds = 0
-
-        helper = KubeHelper(
-            conn_id=request.source.conn.id,
-            source_id=request.source.id,
-            max_concurrent_requests=conn_data.get("max_concurrent_requests", 20),
-            config=KubeConfigHelper(
-                kubeconfig=conn_data["kubeconfig"],
-                kubeconfig_hash=conn_data.get("kubeconfig_hash", ""),
-                is_local=conn_data.get("kubeconfig_is_local", False),
-            ),
-            context_flyql_filter=conn_data.get("context_filter", ""),
-            namespace_label_selector=source_data.get("namespace_label_selector", ""),
-            namespace_field_selector=source_data.get("namespace_field_selector", ""),
-            namespace_flyql_filter=source_data.get("namespace", ""),
-            pods_label_selector=request.context_columns.get(
-                "pods_label_selector", ""
-            ).strip(),
-            pods_field_selector=request.context_columns.get(
-                "pods_field_selector", ""
-            ).strip(),
-            pods_flyql_filter=request.context_columns.get("pods_flyql_filter", ""),
-            selected_contexts=ensure_list(request.context_columns.get("contexts", [])),
-            selected_namespaces=ensure_list(
-                request.context_columns.get("namespaces", [])
-            ),
-        )
-
-        try:
-            helper.validate()
-        except KubeHelperError as e:
-            return DataAndGraphDataResponse(
-                rows=[], graph_timestamps=[], graph_data={}, graph_total=0, error=str(e)
-            )
-
-        if not helper.contexts:
-            return DataAndGraphDataResponse(
-                rows=[],
-                graph_timestamps=[],
-                graph_data={},
-                graph_total=0,
-                error="No contexts available",
-            )
-
-        total_namespaces = sum(len(ns) for ns in helper.namespaces.values())
-        if total_namespaces == 0:
-            if helper.errors:
-                error_details = "; ".join(
-                    f"{err['operation']}: {err['data']}" for err in helper.errors
-                )
-                return DataAndGraphDataResponse(
-                    rows=[],
-                    graph_timestamps=[],
-                    graph_data={},
-                    graph_total=0,
-                    error=f"Failed to fetch namespaces: {error_details}",
-                )
+        helper = cls._get_data_helper(request, query_ast)
+        error, _, _ = cls._check_selection(helper)
+        if error:
             return DataAndGraphDataResponse(
                 rows=[],
                 graph_timestamps=[],
                 graph_data={},
                 graph_total=0,
-                error="No namespaces found matching the filters",
+                error=error,
             )
 
-        total_pods = sum(
-            len(pods) for ns_pods in helper.pods.values() for pods in ns_pods.values()
+        entries, total, counter = cls._collect_results(
+            helper, request, tz, limit=request.limit, with_graph=True
         )
-        if total_pods == 0:
-            return DataAndGraphDataResponse(
-                rows=[],
-                graph_timestamps=[],
-                graph_data={},
-                graph_total=0,
-                error="No pods found matching the filters",
-            )
+        graph_timestamps, graph_data, graph_total = counter.result()
 
-        logger.info(
-            "Fetching logs: contexts=%d, namespaces=%d, pods=%d",
-            len(helper.contexts),
-            total_namespaces,
-            total_pods,
+        return DataAndGraphDataResponse(
+            rows=cls._entries_to_rows(request, entries, tz),
+            graph_timestamps=graph_timestamps,
+            graph_data=graph_data,
+            graph_total=graph_total,
+            message=get_partial_message(helper),
         )
 
-        log_entries, log_errors = helper.get_logs(
-            since_seconds, time_from_dt, time_to_dt
-        )
+    @classmethod
+    def stream_data_and_graph(
+        cls, request, tz
+    ) -> Iterator[Union[DataAndGraphDataBatch, DataAndGraphDataSummary]]:
+        query = cls.get_request_query(request)
+        query_ast = query.root if query is not None else None
+
+        helper = cls._get_data_helper(request, query_ast)
+        error, _, _ = cls._check_selection(helper)
+        if error:
+            yield DataAndGraphDataSummary(
+                total=0, errors=get_helper_errors(helper), error=error
+            )
+            return
+
+        total = 0
+        log_errors: Dict[str, Dict[str, Exception]] = {}
+        for (ctx, ns, pod, container), result, err in cls._iter_container_results(
+            helper, request, tz, limit=request.limit, with_graph=True
+        ):
+            if err is not None:
+                log_errors.setdefault(ctx, {})[f"{ns}/{pod}/{container}"] = err
+                continue
+            if not result.matched:
+                continue
+
+            total += result.matched
+            graph_timestamps, graph_data, graph_total = result.counter.result()
+            yield DataAndGraphDataBatch(
+                rows=cls._entries_to_rows(request, result.entries, tz),
+                graph_timestamps=graph_timestamps,
+                graph_data=graph_data,
+                graph_total=graph_total,
+                origin=f"{ctx}/{ns}/{pod}/{container}",
+            )
 
         if log_errors:
             logger.warning("Log fetch errors: %s", log_errors)
-
-        logger.info("Total log entries fetched: %d", len(log_entries))
-
-        evaluator = Evaluator()
-        query_ast = None
-        if request.query:
-            parser = parse(request.query)
-            query_ast = parser.root
-
-        all_rows = []
-        for entry in log_entries:
-            row = Row(
-                source=request.source,
-                selected_columns=[
-                    "time",
-                    "context",
-                    "namespace",
-                    "pod",
-                    "container",
-                    "node",
-                    "labels",
-                    "annotations",
-                    "message",
-                    "status",
-                ],
-                values=[
-                    entry.timestamp,
-                    entry.context,
-                    entry.namespace,
-                    entry.pod,
-                    entry.container,
-                    entry.node,
-                    entry.labels,
-                    entry.annotations,
-                    entry.message,
-                    entry.status,
-                ],
-                tz=tz,
-            )
-
-            if query_ast:
-                if evaluator.evaluate(query_ast, Record(data=row.data)):
-                    all_rows.append(row)
-            else:
-                all_rows.append(row)
-
-        group_by_field = request.group_by[0] if request.group_by else None
-        graph_timestamps, graph_data, graph_total = generate_graph_from_rows(
-            all_rows,
-            request.time_from,
-            request.time_to,
-            group_by_field,
-        )
-
-        all_rows = sorted(all_rows, key=lambda r: r.time["unixtime"], reverse=True)
-        limited_rows = all_rows[: request.limit]
-
-        return DataAndGraphDataResponse(
-            rows=limited_rows,
-            graph_timestamps=graph_timestamps,
-            graph_data=graph_data,
-            graph_total=graph_total,
+            helper.store_error("get_logs", "warn", log_errors)
+
+        yield DataAndGraphDataSummary(
+            total=total,
+            errors=get_helper_errors(helper),
+            message=join_messages(
+                get_partial_message(helper),
+                cls._limited_message(request.limit, total),
+            ),
         )
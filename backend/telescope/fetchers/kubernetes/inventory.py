@@ -0,0 +1,124 @@
+import time
+from bisect import bisect_left
+from itertools import chain
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from telescope.fetchers.kubernetes.api import CACHE_TTL, KubeHelper
+
+NAME_COLUMNS = ("context", "namespace", "pod", "container", "node", "status")
+MAP_COLUMNS = ("labels", "annotations")
+AUTOCOMPLETE_LIMIT = 500
+
+_indexes: LRUCache = LRUCache(maxsize=256)
+_indexes_lock = Lock()
+
+
+class SortedValues:
+    """
+    Sorted unique strings. Prefix matches are found with a binary search,
+    the remaining substring matches with a scan.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[str]):
+        self.values = sorted(set(v for v in values if v))
+
+    def __len__(self):
+        return len(self.values)
+
+    def search(self, value: str, limit: int) -> Tuple[List[str], bool]:
+        if not value:
+            return self.values[:limit], len(self.values) > limit
+
+        matched = []
+        start = bisect_left(self.values, value)
+        end = start
+        while end < len(self.values) and self.values[end].startswith(value):
+            end += 1
+        matched.extend(self.values[start:end])
+        if len(matched) < limit:
+            for item in chain(self.values[:start], self.values[end:]):
+                if value in item:
+                    matched.append(item)
+                    if len(matched) > limit:
+                        break
+        return matched[:limit], len(matched) > limit
+
+
+class InventoryIndex:
+    """
+    Autocomplete index over the pod inventory of a KubeHelper: sorted
+    values of the name columns and key -> values maps of labels and
+    annotations.
+    """
+
+    def __init__(self, pods: Dict[str, Dict[str, Dict[str, Dict]]]):
+        names: Dict[str, List[str]] = {column: [] for column in NAME_COLUMNS}
+        maps: Dict[str, Dict[str, List[str]]] = {column: {} for column in MAP_COLUMNS}
+
+        for context, namespaces in pods.items():
+            names["context"].append(context)
+            for namespace, namespace_pods in namespaces.items():
+                names["namespace"].append(namespace)
+                for pod_name, pod_data in namespace_pods.items():
+                    names["pod"].append(pod_name)
+                    names["container"].extend(pod_data.get("containers", []))
+                    names["node"].append(pod_data.get("node") or "")
+                    names["status"].append(pod_data.get("status") or "")
+                    for column in MAP_COLUMNS:
+                        for key, value in (pod_data.get(column) or {}).items():
+                            maps[column].setdefault(key, []).append(str(value))
+
+        self.names = {column: SortedValues(values) for column, values in names.items()}
+        self.keys = {column: SortedValues(items) for column, items in maps.items()}
+        self.maps = {
+            column: {key: SortedValues(values) for key, values in items.items()}
+            for column, items in maps.items()
+        }
+
+    def search(
+        self, column: str, value: str, limit: int = AUTOCOMPLETE_LIMIT
+    ) -> Tuple[List[str], bool]:
+        """
+        Returns (items, incomplete) for `column`, which is a name column,
+        `labels`/`annotations` (completes keys) or `labels.<key>`.
+        """
+        if column in self.names:
+            return self.names[column].search(value, limit)
+        if column in self.keys:
+            return self.keys[column].search(value, limit)
+
+        root, _, key = column.partition(".")
+        values = self.maps.get(root, {}).get(key)
+        if values is None:
+            return [], False
+        return values.search(value, limit)
+
+
+def is_indexed_column(column: str) -> bool:
+    root = column.split(".", 1)[0]
+    return root in NAME_COLUMNS or root in MAP_COLUMNS
+
+
+def get_inventory_index(helper: KubeHelper) -> InventoryIndex:
+    """
+    Returns the index for the helper's inventory. Indexes are shared by
+    helpers with the same selection and rebuilt once the inventory cache
+    they were built from has expired.
+    """
+    now = time.monotonic()
+    with _indexes_lock:
+        item: Optional[Tuple[float, InventoryIndex]] = _indexes.get(
+            helper.pods_cache_key
+        )
+    if item is not None and now - item[0] < CACHE_TTL:
+        return item[1]
+
+    index = InventoryIndex(helper.pods)
+    with _indexes_lock:
+        _indexes[helper.pods_cache_key] = (now, index)
+    return index
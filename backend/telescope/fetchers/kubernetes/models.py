@@ -7,6 +7,7 @@ class ConnectionTestResponseNg:
         self.error = ""
         self.matched_contexts: List[Dict] = []
         self.total_contexts = 0
+        self.health: List[Dict] = []
 
     def as_dict(self) -> dict:
         return {
@@ -14,6 +15,7 @@ class ConnectionTestResponseNg:
             "error": self.error,
             "matched_contexts": self.matched_contexts,
             "total_contexts": self.total_contexts,
+            "health": self.health,
         }
 
 
@@ -21,6 +23,11 @@ class ConnectionTestResponse:
     def __init__(self):
         self.reachability = {"result": False, "error": ""}
         self.schema = {"result": False, "error": "", "data": []}
+        self.health: List[Dict] = []
 
     def as_dict(self) -> dict:
-        return {"reachability": self.reachability, "schema": self.schema}
+        return {
+            "reachability": self.reachability,
+            "schema": self.schema,
+            "health": self.health,
+        }
@@ -0,0 +1,273 @@
+import re
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+
+# Columns whose value is a property of the pod or container the line comes
+# from, so a constraint on them can be applied before any log is fetched.
+SELECTOR_COLUMNS = ("context", "namespace", "pod", "container", "node", "status")
+LABELS_COLUMN = "labels"
+KUBERNETES_COLUMNS = {
+    "time",
+    "context",
+    "namespace",
+    "pod",
+    "container",
+    "node",
+    "labels",
+    "annotations",
+    "message",
+    "status",
+}
+
+# pod field selectors for single-valued constraints
+FIELD_SELECTORS = {
+    "pod": "metadata.name",
+    "node": "spec.nodeName",
+    "status": "status.phase",
+}
+
+LABEL_KEY_RE = re.compile(
+    r"^([a-z0-9]([-a-z0-9]*[a-z0-9])?(\.[a-z0-9]([-a-z0-9]*[a-z0-9])?)*/)?"
+    r"[A-Za-z0-9]([-A-Za-z0-9_.]{0,61}[A-Za-z0-9])?$"
+)
+LABEL_VALUE_RE = re.compile(r"^([A-Za-z0-9]([-A-Za-z0-9_.]{0,61}[A-Za-z0-9])?)?$")
+
+EQUALS = "="
+NOT_EQUALS = "!="
+IN = "in"
+NOT_IN = "not in"
+
+
+def _intersect(first: Optional[Set[str]], second: Optional[Set[str]]):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return first & second
+
+
+def _union(first: Optional[Set[str]], second: Optional[Set[str]]):
+    if first is None or second is None:
+        return None
+    return first | second
+
+
+class ColumnConstraint:
+    """
+    Values a column is known to have (`allowed`, None when unconstrained)
+    or known not to have (`excluded`) for every row matching a query.
+    """
+
+    def __init__(
+        self,
+        allowed: Optional[Set[str]] = None,
+        excluded: Optional[Set[str]] = None,
+    ):
+        self.allowed = allowed
+        self.excluded = excluded or set()
+
+    def is_empty(self) -> bool:
+        return self.allowed is None and not self.excluded
+
+    def both(self, other: "ColumnConstraint") -> "ColumnConstraint":
+        return ColumnConstraint(
+            allowed=_intersect(self.allowed, other.allowed),
+            excluded=self.excluded | other.excluded,
+        )
+
+    def either(self, other: "ColumnConstraint") -> "ColumnConstraint":
+        return ColumnConstraint(
+            allowed=_union(self.allowed, other.allowed),
+            excluded=self.excluded & other.excluded,
+        )
+
+    def matches(self, value: str) -> bool:
+        if self.allowed is not None and value not in self.allowed:
+            return False
+        return value not in self.excluded
+
+    def filter(self, values: Iterable[str]) -> List[str]:
+        return [value for value in values if self.matches(value)]
+
+
+class QueryConstraints:
+    """
+    Conjunctive constraints extracted from a flyql query. They are only
+    ever used to narrow what is fetched: rows are still evaluated against the
+    full query afterwards.
+    """
+
+    def __init__(
+        self,
+        columns: Optional[Dict[str, ColumnConstraint]] = None,
+        labels: Optional[Dict[str, ColumnConstraint]] = None,
+    ):
+        self.columns = {
+            name: constraint
+            for name, constraint in (columns or {}).items()
+            if not constraint.is_empty()
+        }
+        self.labels = {
+            name: constraint
+            for name, constraint in (labels or {}).items()
+            if not constraint.is_empty()
+        }
+
+    def __bool__(self):
+        return bool(self.columns or self.labels)
+
+    def column(self, name: str) -> ColumnConstraint:
+        return self.columns.get(name) or ColumnConstraint()
+
+    def both(self, other: "QueryConstraints") -> "QueryConstraints":
+        return QueryConstraints(
+            columns=self._merge(self.columns, other.columns, "both", True),
+            labels=self._merge(self.labels, other.labels, "both", True),
+        )
+
+    def either(self, other: "QueryConstraints") -> "QueryConstraints":
+        return QueryConstraints(
+            columns=self._merge(self.columns, other.columns, "either", False),
+            labels=self._merge(self.labels, other.labels, "either", False),
+        )
+
+    @staticmethod
+    def _merge(first, second, method, keep_missing):
+        result = {}
+        for name in set(first) | set(second):
+            if name in first and name in second:
+                result[name] = getattr(first[name], method)(second[name])
+            elif keep_missing:
+                result[name] = first.get(name) or second.get(name)
+        return result
+
+    def filter_names(self, column: str, values: Iterable[str]) -> List[str]:
+        return self.column(column).filter(values)
+
+    @property
+    def label_selector(self) -> str:
+        terms = []
+        for key in sorted(self.labels):
+            constraint = self.labels[key]
+            if constraint.allowed is not None:
+                values = sorted(constraint.allowed)
+                if len(values) == 1:
+                    terms.append(f"{key}={values[0]}")
+                elif values:
+                    terms.append(f"{key} in ({','.join(values)})")
+                else:
+                    # nothing can match, keep the selector unsatisfiable
+                    terms.append(f"{key} in ()")
+            if constraint.excluded:
+                terms.append(f"{key} notin ({','.join(sorted(constraint.excluded))})")
+        return ",".join(terms)
+
+    @property
+    def field_selector(self) -> str:
+        terms = []
+        for column, field in FIELD_SELECTORS.items():
+            constraint = self.columns.get(column)
+            if constraint is None:
+                continue
+            # Values the selector syntax can't carry are left to matches_pod.
+            if constraint.allowed is not None and len(constraint.allowed) == 1:
+                value = next(iter(constraint.allowed))
+                if LABEL_VALUE_RE.match(value):
+                    terms.append(f"{field}={value}")
+            for value in sorted(constraint.excluded):
+                if LABEL_VALUE_RE.match(value):
+                    terms.append(f"{field}!={value}")
+        return ",".join(terms)
+
+    def matches_pod(self, name: str, node: str, status: str) -> bool:
+        return (
+            self.column("pod").matches(name)
+            and self.column("node").matches(node)
+            and self.column("status").matches(status)
+        )
+
+    @property
+    def cache_key(self) -> str:
+        parts = []
+        for prefix, items in (("c", self.columns), ("l", self.labels)):
+            for name in sorted(items):
+                constraint = items[name]
+                allowed = (
+                    "*"
+                    if constraint.allowed is None
+                    else ",".join(sorted(constraint.allowed))
+                )
+                excluded = ",".join(sorted(constraint.excluded))
+                parts.append(f"{prefix}:{name}:{allowed}:{excluded}")
+        if not parts:
+            return ""
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def _string_values(expression) -> Optional[Set[str]]:
+    operator = expression.operator
+    if operator in (IN, NOT_IN):
+        values = getattr(expression, "values", None) or []
+    else:
+        values = [expression.value]
+    result = set()
+    for value in values:
+        # numbers, booleans, nulls and references to other columns are
+        # compared differently by the evaluator, leave them to the post-filter
+        if not isinstance(value, str) or value in KUBERNETES_COLUMNS:
+            return None
+        result.add(value)
+    return result
+
+
+def _expression_constraints(expression) -> QueryConstraints:
+    if expression.operator not in (EQUALS, NOT_EQUALS, IN, NOT_IN):
+        return QueryConstraints()
+    if getattr(getattr(expression, "key", None), "transformers", None):
+        return QueryConstraints()
+
+    segments = list(expression.key.segments)
+    values = _string_values(expression)
+    if values is None:
+        return QueryConstraints()
+
+    if expression.operator in (EQUALS, IN):
+        constraint = ColumnConstraint(allowed=values)
+    else:
+        constraint = ColumnConstraint(excluded=values)
+
+    if len(segments) == 1 and segments[0] in SELECTOR_COLUMNS:
+        return QueryConstraints(columns={segments[0]: constraint})
+
+    if len(segments) > 1 and segments[0] == LABELS_COLUMN:
+        key = ".".join(segments[1:])
+        if not LABEL_KEY_RE.match(key):
+            return QueryConstraints()
+        if not all(LABEL_VALUE_RE.match(v) for v in values):
+            return QueryConstraints()
+        return QueryConstraints(labels={key: constraint})
+
+    return QueryConstraints()
+
+
+def extract_constraints(node) -> QueryConstraints:
+    """
+    Walks a parsed flyql tree and returns constraints that hold for every
+    matching row. `and` intersects both sides, `or` keeps only what both
+    sides constrain, negated subtrees are not analyzed.
+    """
+    if node is None or getattr(node, "negated", False):
+        return QueryConstraints()
+
+    if node.expression is not None:
+        return _expression_constraints(node.expression)
+
+    left = extract_constraints(node.left) if node.left is not None else None
+    right = extract_constraints(node.right) if node.right is not None else None
+    if left is None:
+        return right or QueryConstraints()
+    if right is None:
+        return left
+    if node.bool_operator == "or":
+        return left.either(right)
+    return left.both(right)
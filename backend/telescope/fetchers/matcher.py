@@ -0,0 +1,651 @@
+import json
+import operator
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flyql import (
+    BoolOperator,
+    Expression,
+    FlyqlError,
+    FunctionCall,
+    LiteralKind,
+    Node,
+    Operator,
+    Parameter,
+    TransformerRegistry,
+    default_registry,
+    parse,
+    parse_key,
+)
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+Predicate = Callable[[Dict[str, Any]], bool]
+Getter = Callable[[Dict[str, Any]], Any]
+
+IN_OPERATORS = (Operator.IN.value, Operator.NOT_IN.value)
+REGEX_OPERATORS = (Operator.REGEX.value, Operator.NOT_REGEX.value)
+LIKE_OPERATORS = {
+    Operator.LIKE.value: ("", False),
+    Operator.NOT_LIKE.value: ("", True),
+    Operator.ILIKE.value: ("(?i)", False),
+    Operator.NOT_ILIKE.value: ("(?i)", True),
+}
+ORDERING_OPERATORS = {
+    Operator.GREATER_THAN.value: operator.gt,
+    Operator.LOWER_THAN.value: operator.lt,
+    Operator.GREATER_OR_EQUALS_THAN.value: operator.ge,
+    Operator.LOWER_OR_EQUALS_THAN.value: operator.le,
+}
+TEMPORAL_KINDS = {
+    LiteralKind.STRING,
+    LiteralKind.FUNCTION,
+    LiteralKind.INTEGER,
+    LiteralKind.FLOAT,
+    LiteralKind.BIGINT,
+}
+DURATION_UNITS_MS = {
+    "s": 1_000,
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+# The helpers below follow flyql's schema-free Evaluator (flyql 1.4) with
+# its default UTC time zone, so that compiled predicates match the same
+# rows: regexes go through re2, like patterns are anchored regexes, dates
+# and datetimes are compared as ms since epoch or packed YYYYMMDD ints.
+
+
+@lru_cache(maxsize=1024)
+def _get_regex(pattern: str):
+    if re2 is None:
+        raise FlyqlError("regex matching requires the re2 package")
+    try:
+        return re2.compile(pattern)
+    except Exception as err:
+        raise FlyqlError(f"invalid regex given: {pattern} -> {err}") from err
+
+
+def _like_to_regex(pattern: str) -> str:
+    if re2 is None:
+        raise FlyqlError("regex matching requires the re2 package")
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            parts.append(re2.escape(pattern[i + 1]))
+            i += 2
+            continue
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re2.escape(char))
+        i += 1
+    return "^" + "".join(parts) + "$"
+
+
+def _is_truthy(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float, str, list, tuple, dict)):
+        return bool(value)
+    return True
+
+
+@lru_cache(maxsize=64)
+def _get_timezone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _pack_date(value) -> int:
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _to_ms(value: datetime) -> Optional[int]:
+    try:
+        return int(value.timestamp() * 1000)
+    except (OSError, OverflowError, ValueError):
+        return None
+
+
+def _ms_to_date(ms: Optional[int]) -> Optional[int]:
+    if ms is None:
+        return None
+    try:
+        return _pack_date(datetime.fromtimestamp(ms / 1000, timezone.utc))
+    except (OSError, OverflowError, ValueError):
+        return None
+
+
+def _evaluate_function_call(call: FunctionCall) -> int:
+    """
+    ms since epoch of a time function: now(), ago(), today(), startOf().
+    """
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    if call.name == "now":
+        return now_ms
+    if call.name == "ago":
+        total = 0
+        for duration in call.duration_args:
+            if duration.unit not in DURATION_UNITS_MS:
+                raise FlyqlError(f"unknown duration unit: {duration.unit}")
+            total += duration.value * DURATION_UNITS_MS[duration.unit]
+        return now_ms - total
+
+    now = datetime.now(_get_timezone(call.timezone))
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if call.name == "today":
+        return int(midnight.timestamp() * 1000)
+    if call.name == "startOf":
+        if call.unit == "day":
+            start = midnight
+        elif call.unit == "week":
+            start = midnight - timedelta(days=now.weekday())
+        elif call.unit == "month":
+            start = midnight.replace(day=1)
+        else:
+            raise FlyqlError(f"unsupported startOf unit: {call.unit}")
+        return int(start.timestamp() * 1000)
+    raise FlyqlError(f"unknown function: {call.name}")
+
+
+def _parse_iso_string_to_ms(value: str) -> Optional[int]:
+    if not value:
+        return None
+    if not any(char in value for char in "-:T/") and not value.lstrip("-").isdigit():
+        return None
+    text = value.replace("Z", "+00:00", 1) if value.endswith("Z") else value
+    dt = None
+    for candidate in (text, text.replace(" ", "T", 1)):
+        try:
+            dt = datetime.fromisoformat(candidate)
+            break
+        except ValueError:
+            pass
+    if dt is None:
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            return None
+        dt = datetime(day.year, day.month, day.day)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return _to_ms(dt)
+
+
+def _resolve_value_as_ms(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return _to_ms(value)
+    if isinstance(value, date):
+        return _to_ms(datetime(value.year, value.month, value.day, tzinfo=timezone.utc))
+    if isinstance(value, (int, float)):
+        try:
+            return int(value)
+        except (OverflowError, ValueError):
+            return None
+    if isinstance(value, str):
+        return _parse_iso_string_to_ms(value)
+    return None
+
+
+def _resolve_value_as_date(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return _pack_date(value)
+    if isinstance(value, date):
+        return _pack_date(value)
+    if isinstance(value, str) and len(value) == 10 and value[4] == value[7] == "-":
+        try:
+            return _pack_date(date.fromisoformat(value))
+        except ValueError:
+            pass
+    if isinstance(value, (int, float, str)):
+        return _ms_to_date(_resolve_value_as_ms(value))
+    return None
+
+
+def _coerce_record_value(value: Any, is_datetime: bool) -> Optional[int]:
+    if is_datetime:
+        return _resolve_value_as_ms(value)
+    return _resolve_value_as_date(value)
+
+
+def _coerce_literal(value: Any, kind: LiteralKind, is_datetime: bool) -> Optional[int]:
+    if kind == LiteralKind.FUNCTION and isinstance(value, FunctionCall):
+        ms = _evaluate_function_call(value)
+        return ms if is_datetime else _ms_to_date(ms)
+    return _coerce_record_value(value, is_datetime)
+
+
+def _split_key(raw: str) -> Tuple[str, Tuple[str, ...]]:
+    # column name and path within it
+    segments = parse_key(raw).segments
+    if not segments:
+        return raw, ()
+    return segments[0], tuple(segments[1:])
+
+
+def _strict_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    if a is None or b is None:
+        return a is b
+    return bool(a == b)
+
+
+def _as_index(segment: str) -> Optional[int]:
+    try:
+        return int(segment)
+    except (ValueError, TypeError):
+        return None
+
+
+def _compile_getter(key: Tuple[str, Tuple[str, ...]]) -> Getter:
+    """
+    Same lookup as flyql's Record.get_value for a (name, path) key, with
+    the path list indexes converted once.
+    """
+    name, path = key
+    if not path:
+        return lambda data: data.get(name)
+
+    steps = tuple((segment, _as_index(segment)) for segment in path)
+
+    def get(data: Dict[str, Any]) -> Any:
+        value = data.get(name)
+        if value is None:
+            return None
+        if isinstance(value, str):
+            if not (
+                (value.startswith("{") and value.endswith("}"))
+                or (value.startswith("[") and value.endswith("]"))
+            ):
+                return None
+            try:
+                value = json.loads(value)
+            except Exception:  # pylint: disable=broad-exception-caught
+                return None
+        elif not isinstance(value, (dict, list)):
+            return None
+        for segment, index in steps:
+            if isinstance(value, list):
+                if index is None or index < 0 or index >= len(value):
+                    return None
+                value = value[index]
+            elif isinstance(value, dict) and segment in value:
+                value = value[segment]
+            else:
+                return None
+        return value
+
+    return get
+
+
+def _parse_column_key(value: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    try:
+        return _split_key(value)
+    except Exception:  # pylint: disable=broad-exception-caught
+        return None
+
+
+def _make_contains(items: List[Any]) -> Callable[[Any], bool]:
+    """
+    Membership with flyql's strict equality (booleans never equal numbers,
+    None only equals None), through a set where the items are hashable.
+    """
+    has_none = any(item is None for item in items)
+    flags = {item for item in items if isinstance(item, bool)}
+    plain = set()
+    others = []
+    for item in items:
+        if item is None or isinstance(item, bool):
+            continue
+        try:
+            plain.add(item)
+        except TypeError:
+            others.append(item)
+
+    def contains(value: Any) -> bool:
+        if value is None:
+            return has_none
+        if isinstance(value, bool):
+            return value in flags
+        try:
+            if value in plain:
+                return True
+        except TypeError:
+            # unhashable record values, like dicts and lists
+            if any(_strict_equal(value, item) for item in plain):
+                return True
+        return any(_strict_equal(value, item) for item in others)
+
+    return contains
+
+
+def _make_comparison(op: str, literal: Any) -> Callable[[Any], bool]:
+    """
+    Compares record values against a literal known in advance. Not used for
+    in/not in, see _make_contains.
+    """
+    if op == Operator.EQUALS.value:
+        if isinstance(literal, bool) or literal is None:
+            return lambda value: value is literal
+        return lambda value: not isinstance(value, bool) and bool(value == literal)
+
+    if op == Operator.NOT_EQUALS.value:
+        if isinstance(literal, bool) or literal is None:
+            return lambda value: value is not literal
+
+        def not_equals(value: Any) -> bool:
+            if value is None:
+                return False
+            if isinstance(value, bool):
+                return True
+            return bool(value != literal)
+
+        return not_equals
+
+    if op in REGEX_OPERATORS or op in LIKE_OPERATORS:
+        if op in LIKE_OPERATORS:
+            flags, negated = LIKE_OPERATORS[op]
+            pattern = flags + _like_to_regex(str(literal))
+        else:
+            pattern = str(literal)
+            negated = op == Operator.NOT_REGEX.value
+        search = _get_regex(pattern).search
+        if negated:
+            return lambda value: value is not None and not search(str(value))
+        return lambda value: bool(search(str(value)))
+
+    if op in ORDERING_OPERATORS:
+        func = ORDERING_OPERATORS[op]
+
+        def compare(value: Any) -> bool:
+            try:
+                return bool(func(value, literal))
+            except TypeError:
+                return False
+
+        return compare
+
+    if op in (Operator.HAS.value, Operator.NOT_HAS.value):
+        text = str(literal)
+
+        def has(value: Any) -> bool:
+            if isinstance(value, (str, dict)):
+                return text in value
+            if isinstance(value, (list, tuple)):
+                return any(_strict_equal(item, literal) for item in value)
+            return False
+
+        if op == Operator.NOT_HAS.value:
+            return lambda value: value is not None and not has(value)
+        return has
+
+    raise FlyqlError(f"Unknown expression operator: {op}")
+
+
+def _check_bound(expression: Expression):
+    if expression.value_type == LiteralKind.PARAMETER:
+        if isinstance(expression.value, Parameter):
+            raise FlyqlError(
+                f"unbound parameter '${expression.value.name}' — call bind_params() before evaluating"
+            )
+        raise FlyqlError("unbound parameter — call bind_params() before evaluating")
+    for value in expression.values or []:
+        if isinstance(value, Parameter):
+            raise FlyqlError(
+                f"unbound parameter '${value.name}' in IN list — call bind_params() before evaluating"
+            )
+    if isinstance(expression.value, FunctionCall):
+        if expression.value.parameter_args:
+            raise FlyqlError(
+                f"unbound parameter(s) in function {expression.value.name}() — call bind_params() before evaluating"
+            )
+        # fails early on unknown functions and units
+        _evaluate_function_call(expression.value)
+
+
+def _compile_value(expression: Expression, registry: TransformerRegistry) -> Getter:
+    get_value = _compile_getter(_split_key(expression.key.raw))
+    transformers = []
+    for item in expression.key.transformers or []:
+        transformer = registry.get(item.name)
+        if transformer is None:
+            raise FlyqlError(f"unknown transformer: {item.name}")
+        transformers.append((transformer.apply, item.arguments))
+    if not transformers:
+        return get_value
+
+    def get_transformed(data: Dict[str, Any]) -> Any:
+        value = get_value(data)
+        for apply, arguments in transformers:
+            value = apply(value, arguments)
+        return value
+
+    return get_transformed
+
+
+def _compile_in(
+    expression: Expression, get_value: Getter
+) -> Tuple[Optional[Callable[[Any], bool]], Callable[[Any, Dict[str, Any]], bool]]:
+    """
+    Returns the membership test of record values against the literal list,
+    None when the list refers to other columns, and the full evaluation
+    for temporal record values or column references.
+    """
+    negated = expression.operator == Operator.NOT_IN.value
+    values = expression.values or []
+    kinds = expression.values_types or []
+    columns = [
+        _compile_getter(key) if key is not None else None
+        for key in (
+            (
+                _parse_column_key(v)
+                if i < len(kinds)
+                and kinds[i] == LiteralKind.COLUMN
+                and isinstance(v, str)
+                else None
+            )
+            for i, v in enumerate(values)
+        )
+    ]
+    column_names = [
+        _parse_column_key(v)[0] if getter is not None else None
+        for v, getter in zip(values, columns)
+    ]
+    has_columns = any(getter is not None for getter in columns)
+
+    def resolve(data: Dict[str, Any], temporal: bool, is_datetime: bool) -> List[Any]:
+        if not kinds or not values:
+            return values
+        resolved = []
+        for i, v in enumerate(values):
+            kind = kinds[i] if i < len(kinds) else None
+            if kind == LiteralKind.COLUMN and isinstance(v, str):
+                getter = columns[i]
+                if getter is not None and column_names[i] in data:
+                    resolved.append(getter(data))
+                else:
+                    resolved.append(v)
+            elif temporal and kind in TEMPORAL_KINDS:
+                coerced = _coerce_literal(v, kind, is_datetime)
+                if coerced is not None:
+                    resolved.append(coerced)
+            else:
+                resolved.append(v)
+        return resolved
+
+    def evaluate(value: Any, data: Dict[str, Any]) -> bool:
+        if not values:
+            return negated
+        if negated and value is None:
+            return False
+        is_datetime = isinstance(value, datetime)
+        temporal = is_datetime or isinstance(value, date)
+        items = resolve(data, temporal, is_datetime)
+        if temporal:
+            value = _coerce_record_value(value, is_datetime)
+            if value is None:
+                return False
+        return _make_contains(items)(value) != negated
+
+    if has_columns:
+        return None, evaluate
+    if not values:
+        return (lambda value: negated), evaluate
+
+    contains = _make_contains(resolve({}, False, False))
+    if negated:
+        return (lambda value: value is not None and not contains(value)), evaluate
+    return contains, evaluate
+
+
+def _compile_expression(
+    expression: Expression, registry: TransformerRegistry
+) -> Predicate:
+    _check_bound(expression)
+    get_value = _compile_value(expression, registry)
+    op = expression.operator
+
+    if op == Operator.TRUTHY.value:
+        return lambda data: _is_truthy(get_value(data))
+
+    if op in IN_OPERATORS:
+        compare, evaluate = _compile_in(expression, get_value)
+        if compare is None:
+            return lambda data: evaluate(get_value(data), data)
+
+        def member(data: Dict[str, Any]) -> bool:
+            value = get_value(data)
+            if isinstance(value, date):
+                return evaluate(value, data)
+            return compare(value)
+
+        return member
+
+    kind = expression.value_type
+    literal = expression.value
+    column_key = None
+    if kind == LiteralKind.COLUMN and isinstance(literal, str):
+        column_key = _parse_column_key(literal)
+    # time functions are compared by their value at matching time
+    compare = _make_comparison(op, literal) if kind != LiteralKind.FUNCTION else None
+    if column_key is None and kind not in TEMPORAL_KINDS:
+        # bool and null literals are never coerced
+        return lambda data: compare(get_value(data))
+
+    get_column = _compile_getter(column_key) if column_key is not None else None
+    # comparisons of dates and datetimes with constant literals, both
+    # sides coerced to ms or packed dates
+    temporal_compare = {}
+    if kind in TEMPORAL_KINDS and kind != LiteralKind.FUNCTION:
+        for is_datetime in (True, False):
+            coerced = _coerce_literal(literal, kind, is_datetime)
+            if coerced is not None:
+                temporal_compare[is_datetime] = _make_comparison(op, coerced)
+
+    def evaluate(value: Any, data: Dict[str, Any]) -> bool:
+        # record values that are dates or datetimes, literals that are time
+        # functions or refer to other columns
+        expr_value = literal
+        if get_column is not None and column_key[0] in data:
+            expr_value = get_column(data)
+        is_datetime = isinstance(value, datetime)
+        if (is_datetime or isinstance(value, date)) and kind in TEMPORAL_KINDS:
+            value = _coerce_record_value(value, is_datetime)
+            if value is None:
+                return False
+            if kind != LiteralKind.FUNCTION:
+                if is_datetime not in temporal_compare:
+                    return False
+                return temporal_compare[is_datetime](value)
+            expr_value = _coerce_literal(expr_value, kind, is_datetime)
+            if expr_value is None:
+                return False
+        elif kind == LiteralKind.FUNCTION:
+            expr_value = _evaluate_function_call(expr_value)
+            value = _resolve_value_as_ms(value)
+            if value is None:
+                return False
+        if expr_value is literal:
+            return compare(value)
+        return _make_comparison(op, expr_value)(value)
+
+    if get_column is not None or kind == LiteralKind.FUNCTION:
+        return lambda data: evaluate(get_value(data), data)
+
+    def match(data: Dict[str, Any]) -> bool:
+        value = get_value(data)
+        if isinstance(value, date):
+            return evaluate(value, data)
+        return compare(value)
+
+    return match
+
+
+def _compile_node(node: Node, registry: TransformerRegistry) -> Predicate:
+    if node.expression:
+        predicate = _compile_expression(node.expression, registry)
+    else:
+        left = _compile_node(node.left, registry) if node.left is not None else None
+        right = _compile_node(node.right, registry) if node.right is not None else None
+        if left is not None and right is not None:
+            if node.bool_operator == BoolOperator.AND.value:
+                predicate = lambda data: left(data) and right(data)
+            elif node.bool_operator == BoolOperator.OR.value:
+                predicate = lambda data: left(data) or right(data)
+            else:
+                raise FlyqlError(f"Unknown boolean operator: {node.bool_operator}")
+        elif left is not None or right is not None:
+            predicate = left or right
+        else:
+            raise FlyqlError("empty query node")
+
+    if getattr(node, "negated", False):
+        inner = predicate
+        return lambda data: not inner(data)
+    return predicate
+
+
+def compile_predicate(
+    root: Node, registry: Optional[TransformerRegistry] = None
+) -> Predicate:
+    """
+    Turns a parsed flyql query into a function of a row dict that returns
+    the same as Evaluator().evaluate(root, Record(data=row)): keys, paths,
+    transformers, literals and regexes are resolved once, rows are only
+    looked up and compared. Errors of the query itself (unbound parameters,
+    unknown transformers or functions, invalid regexes) are raised here
+    rather than while matching rows.
+
+    Rows are matched schema-free, as Evaluator does without columns: dates
+    and datetimes are recognized by their type.
+    """
+    return _compile_node(root, registry or default_registry())
+
+
+@lru_cache(maxsize=256)
+def compile_query(query: str) -> Predicate:
+    # predicates hold no state, one per query text is shared by all threads
+    return compile_predicate(parse(query).root)
@@ -1,5 +1,5 @@
 import json
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from zoneinfo import ZoneInfo
 
 from telescope.models import Source
@@ -10,7 +10,120 @@ import logging
 logger = logging.getLogger("telescope.models")
 
 
+def is_probably_jsonstring(value) -> bool:
+    # check before attempting json.load
+    if not isinstance(value, str):
+        return False
+    if value.startswith("{") and value.endswith("}"):
+        return True
+    if value.startswith("[") and value.endswith("["):
+        return True
+
+    return False
+
+
+def format_times(times: Sequence, tz: ZoneInfo = UTC_ZONE) -> List[Dict]:
+    """
+    Returns the "time" entry of serialized rows for datetimes `times`, naive
+    ones being in `tz`.
+    """
+    result = []
+    append = result.append
+    for dt in times:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=tz)
+        append(
+            {
+                "unixtime": int(dt.timestamp() * 1000),
+                # same as strftime("%Y-%m-%d %H:%M:%S"), several times faster
+                "datetime": dt.isoformat(" ", "seconds")[:19],
+                "microseconds": f"{dt.microsecond:06d}",
+            }
+        )
+    return result
+
+
+def load_jsonstring(name: str, value: str):
+    try:
+        return json.loads(value)
+    except Exception:
+        logger.error(
+            "Failed to json.loads(value) for JSON-treated column '%s', %s",
+            name,
+            type(value),
+        )
+        return value
+
+
+class RowBatch:
+    """
+    Rows of a fetch result as returned by the backend: one sequence of values
+    per row, ordered as `selected_columns`. Times are formatted for the
+    whole batch at once and rows are serialized straight from the values,
+    Row objects are only created for per-row access.
+    """
+
+    def __init__(
+        self,
+        source: Source,
+        selected_columns: Sequence[str],
+        values: Sequence[Sequence[Any]],
+        tz: ZoneInfo = UTC_ZONE,
+    ):
+        self.source = source
+        self.selected_columns = selected_columns
+        self.values = values
+        self.tz = tz
+        self.positions = {name: i for i, name in enumerate(selected_columns)}
+        self._times: Optional[List[Dict]] = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> "Row":
+        return Row.from_batch(self, index)
+
+    def __iter__(self) -> Iterator["Row"]:
+        for index in range(len(self.values)):
+            yield Row.from_batch(self, index)
+
+    @property
+    def times(self) -> List[Dict]:
+        if self._times is None:
+            position = self.positions[self.source.time_column]
+            self._times = format_times(
+                [values[position] for values in self.values], self.tz
+            )
+        return self._times
+
+    def _serialized_columns(self) -> List[Tuple[str, int, bool]]:
+        # (name, position, jsonstring) of the source columns, in source order
+        return [
+            (name, self.positions[name], column.jsonstring)
+            for name, column in self.source._columns.items()
+        ]
+
+    def as_dicts(self) -> List[Dict]:
+        columns = self._serialized_columns()
+        result = []
+        for values, time in zip(self.values, self.times):
+            data = {}
+            for name, position, jsonstring in columns:
+                value = values[position]
+                if jsonstring and is_probably_jsonstring(value):
+                    value = load_jsonstring(name, value)
+                data[name] = value
+            result.append({"time": time, "data": data})
+        return result
+
+
 class Row:
+    """
+    One row of a RowBatch.
+    """
+
+    __slots__ = ("batch", "index", "_data")
+
     def __init__(
         self,
         source: Source,
@@ -18,54 +131,58 @@ class Row:
         values: List[Any],
         tz: ZoneInfo = UTC_ZONE,
     ):
-        self.source = source
-        self.data = {}
-        for key, value in zip(selected_columns, values):
-            self.data[key] = value
+        self.batch = RowBatch(source, selected_columns, [values], tz)
+        self.index = 0
+        self._data: Optional[Dict] = None
+
+    @classmethod
+    def from_batch(cls, batch: RowBatch, index: int) -> "Row":
+        row = cls.__new__(cls)
+        row.batch = batch
+        row.index = index
+        row._data = None
+        return row
 
-        self.record_id = self.data.get(source.uniq_column) or self.data.get(
-            source._record_pseudo_id_column
+    @property
+    def source(self) -> Source:
+        return self.batch.source
+
+    @property
+    def data(self) -> Dict:
+        if self._data is None:
+            self._data = dict(
+                zip(self.batch.selected_columns, self.batch.values[self.index])
+            )
+        return self._data
+
+    @property
+    def time(self) -> Dict:
+        return self.batch.times[self.index]
+
+    @property
+    def record_id(self):
+        return self.data.get(self.source.uniq_column) or self.data.get(
+            self.source._record_pseudo_id_column
         )
-        dt = self.data[source.time_column]
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tz)
-        self.time = {
-            "unixtime": int(dt.timestamp() * 1000),
-            "datetime": dt.strftime("%Y-%m-%d %H:%M:%S"),
-            "microseconds": dt.strftime("%f"),
-        }
 
     @property
     def as_json(self) -> str:
         return json.dumps(self.as_dict(), default=str)
 
-    def is_propbably_jsonstring(self, value):
-        # check before attempting json.load
-        if not isinstance(value, str):
-            return False
-        if value.startswith("{") and value.endswith("}"):
-            return True
-        if value.startswith("[") and value.endswith("["):
-            return True
-
-        return False
-
     def as_dict(self) -> Dict:
         data = {}
-        for name, source_column in self.source._columns.items():
-            if source_column.jsonstring and self.is_propbably_jsonstring(
-                self.data[name]
-            ):
-                try:
-                    value = json.loads(self.data[name])
-                except Exception:
-                    value = self.data[name]
-                    logger.error(
-                        "Failed to json.loads(value) for JSON-treated column '%s', %s",
-                        name,
-                        type(self.data[name]),
-                    )
-            else:
-                value = self.data[name]
+        for name, column in self.source._columns.items():
+            value = self.data[name]
+            if column.jsonstring and is_probably_jsonstring(value):
+                value = load_jsonstring(name, value)
             data[name] = value
         return {"time": self.time, "data": data}
+
+
+def rows_as_dicts(rows) -> List[Dict]:
+    """
+    Serializes a RowBatch, or a list of rows.
+    """
+    if isinstance(rows, RowBatch):
+        return rows.as_dicts()
+    return [row.as_dict() for row in rows]
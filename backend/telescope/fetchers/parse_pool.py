@@ -0,0 +1,115 @@
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Callable, Optional, Union
+
+import django
+from django.conf import settings
+
+logger = logging.getLogger("telescope.fetchers.parse_pool")
+
+
+class ParsePool:
+    """
+    Optional process pool for CPU-bound parsing, filtering and aggregation of
+    fetched log chunks, so that it does not run under the GIL of the threads
+    doing network I/O.
+
+    Fetch threads call run() with the raw chunk and block until the worker
+    returns a compact result. Chunks smaller than `min_chunk_size` bytes
+    (UTF-8 encoded for str chunks) are not worth the pickling round trip and
+    are processed in the calling thread, as is everything when the pool is
+    disabled (max_workers=0).
+    """
+
+    def __init__(self, max_workers: int, min_chunk_size: int):
+        self.max_workers = max_workers
+        self.min_chunk_size = min_chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    # workers are spawned rather than forked from a threaded
+                    # server; they import telescope.fetchers, which needs the
+                    # app registry, so django.setup runs before any task
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=django.setup,
+                )
+            return self._executor
+
+    def _is_small(self, chunk: Union[str, bytes]) -> bool:
+        if len(chunk) >= self.min_chunk_size:
+            # an encoded str is never shorter than its character count
+            return False
+        if isinstance(chunk, str):
+            return len(chunk.encode("utf-8")) < self.min_chunk_size
+        return True
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        chunk: Union[str, bytes],
+        *args,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Returns func(chunk, *args, **kwargs). `func` and its arguments must be
+        picklable. `deadline` is a time.monotonic() value after which waiting
+        for the worker is given up with concurrent.futures.TimeoutError.
+        """
+        if not self.enabled or self._is_small(chunk):
+            return func(chunk, *args, **kwargs)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, chunk, *args, **kwargs)
+        except BrokenProcessPool:
+            self._reset(executor)
+            return func(chunk, *args, **kwargs)
+
+        timeout = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except BrokenProcessPool:
+            logger.exception("Parse pool is broken, processing in-thread")
+            self._reset(executor)
+            return func(chunk, *args, **kwargs)
+        finally:
+            future.cancel()
+
+
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_lock = Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                config = settings.CONFIG["fetchers"]["parse_pool"]
+                _parse_pool = ParsePool(
+                    max_workers=config["max_workers"],
+                    min_chunk_size=config["min_chunk_size"],
+                )
+    return _parse_pool
@@ -0,0 +1,57 @@
+from threading import Lock
+from typing import Callable, Hashable, Optional
+
+from cachetools import LRUCache
+from flyql.core.tree import Node
+
+from telescope.fetchers.matcher import Predicate, compile_query
+
+QUERY_CACHE_SIZE = 1024
+
+_queries: LRUCache = LRUCache(maxsize=QUERY_CACHE_SIZE)
+_queries_lock = Lock()
+
+
+class CompiledQuery:
+    """
+    A validated flyql query as fetchers use it: the AST, the SQL filter for
+    fetchers that generate SQL, and the row predicate for fetchers that
+    filter in-process, compiled on first use.
+    """
+
+    __slots__ = ("text", "root", "sql", "_predicate")
+
+    def __init__(self, text: str, root: Node, sql: Optional[str] = None):
+        self.text = text
+        self.root = root
+        self.sql = sql
+        self._predicate: Optional[Predicate] = None
+
+    @property
+    def predicate(self) -> Predicate:
+        if self._predicate is None:
+            # shared with the aggregation of parse pool workers, which only
+            # get the query text
+            self._predicate = compile_query(self.text)
+        return self._predicate
+
+
+def get_cached_query(
+    key: Hashable, compile: Callable[[], CompiledQuery]
+) -> CompiledQuery:
+    """
+    Returns the query cached under `key`, compiling it on a miss. Failed
+    compilations are not cached.
+    """
+    with _queries_lock:
+        query = _queries.get(key)
+    if query is None:
+        query = compile()
+        with _queries_lock:
+            _queries[key] = query
+    return query
+
+
+def clear_query_cache():
+    with _queries_lock:
+        _queries.clear()
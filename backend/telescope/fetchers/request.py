@@ -1,7 +1,9 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from telescope.models import Source
 from flyql.columns import ParsedColumn
 
+from telescope.fetchers.query import CompiledQuery
+
 
 class AutocompleteRequest:
     def __init__(
@@ -29,6 +31,8 @@ class DataRequest:
         time_to: int,
         limit: int,
         context_columns: Dict,
+        deadline: Optional[float] = None,
+        compiled_query: Optional[CompiledQuery] = None,
     ):
         self.source = source
         self.query = query
@@ -37,6 +41,10 @@ class DataRequest:
         self.time_to = time_to
         self.limit = limit
         self.context_columns = context_columns
+        # time.monotonic() value after which fetchers return partial results
+        self.deadline = deadline
+        # `query` as validated by the serializer, see BaseFetcher.get_query
+        self.compiled_query = compiled_query
 
 
 class GraphDataRequest:
@@ -49,6 +57,8 @@ class GraphDataRequest:
         time_to: int,
         group_by: List[ParsedColumn],
         context_columns: Dict,
+        deadline: Optional[float] = None,
+        compiled_query: Optional[CompiledQuery] = None,
     ):
         self.source = source
         self.query = query
@@ -57,6 +67,8 @@ class GraphDataRequest:
         self.time_to = time_to
         self.group_by = group_by
         self.context_columns = context_columns
+        self.deadline = deadline
+        self.compiled_query = compiled_query
 
 
 class DataAndGraphDataRequest:
@@ -70,6 +82,8 @@ class DataAndGraphDataRequest:
         limit: int,
         group_by: List[ParsedColumn],
         context_columns: Dict,
+        deadline: Optional[float] = None,
+        compiled_query: Optional[CompiledQuery] = None,
     ):
         self.source = source
         self.query = query
@@ -79,3 +93,5 @@ class DataAndGraphDataRequest:
         self.limit = limit
         self.group_by = group_by
         self.context_columns = context_columns
+        self.deadline = deadline
+        self.compiled_query = compiled_query
@@ -1,5 +1,5 @@
-from typing import List, Dict, Optional
-from telescope.fetchers.models import Row
+from typing import List, Dict, Optional, Union
+from telescope.fetchers.models import Row, RowBatch
 
 
 class AutocompleteResponse:
@@ -15,7 +15,7 @@ class AutocompleteResponse:
 class DataResponse:
     def __init__(
         self,
-        rows: List[Row],
+        rows: Union[RowBatch, List[Row]],
         error: Optional[str] = None,
         message: Optional[str] = None,
     ):
@@ -30,16 +30,18 @@ class GraphDataResponse:
         timestamps: List[int],
         data: Dict[str, List[int]],
         total: int,
+        message: Optional[str] = None,
     ):
         self.timestamps = timestamps
         self.data = data
         self.total = total
+        self.message = message
 
 
 class DataAndGraphDataResponse:
     def __init__(
         self,
-        rows: List[Row],
+        rows: Union[RowBatch, List[Row]],
         graph_timestamps: List[int],
         graph_data: Dict[str, List[int]],
         graph_total: int,
@@ -52,3 +54,39 @@ class DataAndGraphDataResponse:
         self.graph_total = graph_total
         self.error = error
         self.message = message
+
+
+class DataAndGraphDataBatch:
+    """
+    Partial result of a streamed data-and-graph request. Graph counts are
+    deltas over the same buckets as the full graph and are meant to be added
+    up by the client.
+    """
+
+    def __init__(
+        self,
+        rows: Union[RowBatch, List[Row]],
+        graph_timestamps: List[int],
+        graph_data: Dict[str, List[int]],
+        graph_total: int,
+        origin: str = "",
+    ):
+        self.rows = rows
+        self.graph_timestamps = graph_timestamps
+        self.graph_data = graph_data
+        self.graph_total = graph_total
+        self.origin = origin
+
+
+class DataAndGraphDataSummary:
+    def __init__(
+        self,
+        total: int,
+        errors: List[Dict[str, str]],
+        error: Optional[str] = None,
+        message: Optional[str] = None,
+    ):
+        self.total = total
+        self.errors = errors
+        self.error = error
+        self.message = message
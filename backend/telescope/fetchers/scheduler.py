@@ -0,0 +1,384 @@
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from django.conf import settings
+
+from telescope.fetchers.health import HealthRegistry
+
+logger = logging.getLogger("telescope.fetchers.scheduler")
+
+# how often the dispatcher re-checks targets that are saturated by other requests
+TARGET_POLL_INTERVAL = 0.05
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+class TargetLimiter:
+    """
+    Counts the tasks running against a target. Each acquire is checked
+    against the limit given with it, so a changed limit applies to the next
+    task while running tasks finish under the old one.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self._lock = Lock()
+
+    def acquire(self, limit: int) -> bool:
+        with self._lock:
+            if self.active >= limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class FetchTask:
+    def __init__(
+        self,
+        key: Hashable,
+        target: Hashable,
+        func: Callable[[], Any],
+    ):
+        self.key = key
+        self.target = target
+        self.func = func
+        self.queued_at = 0.0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    @property
+    def queue_time(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return self.started_at - self.queued_at
+
+    @property
+    def fetch_time(self) -> float:
+        if not self.finished_at:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.tasks = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.fetch_time_total = 0.0
+        self.fetch_time_max = 0.0
+
+    def add(self, task: FetchTask, failed: bool):
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.queue_time_total += task.queue_time
+        self.queue_time_max = max(self.queue_time_max, task.queue_time)
+        self.fetch_time_total += task.fetch_time
+        self.fetch_time_max = max(self.fetch_time_max, task.fetch_time)
+
+    def merge(self, other: "SchedulerStats"):
+        self.tasks += other.tasks
+        self.completed += other.completed
+        self.failed += other.failed
+        self.skipped += other.skipped
+        self.rejected += other.rejected
+        self.queue_time_total += other.queue_time_total
+        self.queue_time_max = max(self.queue_time_max, other.queue_time_max)
+        self.fetch_time_total += other.fetch_time_total
+        self.fetch_time_max = max(self.fetch_time_max, other.fetch_time_max)
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "tasks": self.tasks,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "queue_time_avg": self.queue_time_total / finished if finished else 0.0,
+            "queue_time_max": self.queue_time_max,
+            "fetch_time_avg": self.fetch_time_total / finished if finished else 0.0,
+            "fetch_time_max": self.fetch_time_max,
+        }
+
+
+class FetchScheduler:
+    """
+    Process-wide bounded executor for backend fetch tasks.
+
+    Concurrency is capped on three levels:
+      * globally, by the size of the shared thread pool;
+      * per target (e.g. a kubernetes context), shared by all requests;
+      * per request, by max_per_request.
+    Tasks are only handed to the pool once they fit all three limits, so a
+    saturated target never occupies pool threads, and targets of a request are
+    served round-robin.
+    """
+
+    def __init__(self, max_workers: int, max_per_request: int):
+        self.max_workers = max_workers
+        self.max_per_request = max_per_request
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="telescope-fetch"
+        )
+        self._targets: Dict[Hashable, TargetLimiter] = {}
+        self._targets_lock = Lock()
+        self._stats_lock = Lock()
+        self.stats = SchedulerStats()
+
+    def _target_limiter(self, target: Hashable) -> TargetLimiter:
+        with self._targets_lock:
+            limiter = self._targets.get(target)
+            if limiter is None:
+                limiter = self._targets[target] = TargetLimiter()
+            return limiter
+
+    @staticmethod
+    def _execute(
+        task: FetchTask,
+        limiter: TargetLimiter,
+        deadline,
+        health: Optional[HealthRegistry] = None,
+    ):
+        task.started_at = time.monotonic()
+        try:
+            if deadline is not None and task.started_at >= deadline:
+                raise DeadlineExceededError("deadline exceeded before start")
+            try:
+                result = task.func()
+            except Exception as err:
+                if health is not None:
+                    health.record(task.target, time.monotonic() - task.started_at, err)
+                raise
+            if health is not None:
+                health.record(task.target, time.monotonic() - task.started_at)
+            return result
+        finally:
+            task.finished_at = time.monotonic()
+            limiter.release()
+
+    def run(
+        self,
+        tasks: List[FetchTask],
+        target_limits: Optional[Dict[Hashable, int]] = None,
+        default_target_limit: int = 1,
+        max_per_request: Optional[int] = None,
+        deadline: Optional[float] = None,
+        health: Optional[HealthRegistry] = None,
+    ) -> Tuple[Dict[Hashable, Any], Dict[Hashable, Exception], SchedulerStats]:
+        """
+        Runs tasks and returns (results, errors, stats), both keyed by task key.
+        `deadline` is a time.monotonic() value: tasks not started by then are
+        skipped with DeadlineExceededError, running ones are abandoned.
+        With `health`, outcomes are recorded per target and tasks of targets
+        with an open circuit fail with CircuitOpenError without running.
+        """
+        results: Dict[Hashable, Any] = {}
+        errors: Dict[Hashable, Exception] = {}
+        stats = SchedulerStats()
+        for task, result, error in self.iter_run(
+            tasks,
+            target_limits=target_limits,
+            default_target_limit=default_target_limit,
+            max_per_request=max_per_request,
+            deadline=deadline,
+            stats=stats,
+            health=health,
+        ):
+            if error is None:
+                results[task.key] = result
+            else:
+                errors[task.key] = error
+        return results, errors, stats
+
+    def iter_run(
+        self,
+        tasks: List[FetchTask],
+        target_limits: Optional[Dict[Hashable, int]] = None,
+        default_target_limit: int = 1,
+        max_per_request: Optional[int] = None,
+        deadline: Optional[float] = None,
+        stats: Optional[SchedulerStats] = None,
+        health: Optional[HealthRegistry] = None,
+    ) -> Iterator[Tuple[FetchTask, Any, Optional[Exception]]]:
+        """
+        Same as run(), but yields (task, result, error) as soon as each task
+        finishes. Closing the iterator early cancels tasks that have not
+        started yet.
+        """
+        target_limits = target_limits or {}
+        if max_per_request is None:
+            max_per_request = self.max_per_request
+        max_per_request = max(1, min(max_per_request, self.max_workers))
+
+        if stats is None:
+            stats = SchedulerStats()
+        stats.tasks += len(tasks)
+
+        queued_at = time.monotonic()
+        pending: Dict[Hashable, deque] = {}
+        for task in tasks:
+            task.queued_at = queued_at
+            pending.setdefault(task.target, deque()).append(task)
+        order = deque(pending.keys())
+        in_flight: Dict[Any, Tuple[FetchTask, TargetLimiter]] = {}
+        rejected: List[FetchTask] = []
+
+        try:
+            while pending or in_flight:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+
+                blocked = False
+                progress = True
+                while progress and pending and len(in_flight) < max_per_request:
+                    progress = False
+                    for _ in range(len(order)):
+                        target = order[0]
+                        order.rotate(-1)
+                        if len(in_flight) >= max_per_request:
+                            break
+                        if health is not None and not health.allow(target):
+                            rejected.extend(pending.pop(target))
+                            order.remove(target)
+                            progress = True
+                            continue
+                        limiter = self._target_limiter(target)
+                        if not limiter.acquire(
+                            target_limits.get(target, default_target_limit)
+                        ):
+                            blocked = True
+                            continue
+                        task = pending[target].popleft()
+                        if not pending[target]:
+                            del pending[target]
+                            order.remove(target)
+                        future = self.executor.submit(
+                            self._execute, task, limiter, deadline, health
+                        )
+                        in_flight[future] = (task, limiter)
+                        progress = True
+
+                for task in rejected:
+                    stats.rejected += 1
+                    yield task, None, health.get_error(task.target)
+                rejected.clear()
+
+                timeout = None
+                if blocked or not in_flight:
+                    timeout = TARGET_POLL_INTERVAL
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+
+                if not in_flight:
+                    if pending:
+                        time.sleep(timeout)
+                    continue
+
+                done, _ = wait(
+                    in_flight.keys(), timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    task, _ = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as err:
+                        stats.add(task, failed=True)
+                        yield task, None, err
+                    else:
+                        stats.add(task, failed=False)
+                        yield task, result, None
+
+            skipped = []
+            for future, (task, limiter) in list(in_flight.items()):
+                if future.cancel():
+                    # never started, so _execute will not release it
+                    limiter.release()
+                del in_flight[future]
+                skipped.append((task, "deadline exceeded"))
+            for target_tasks in pending.values():
+                for task in target_tasks:
+                    skipped.append((task, "deadline exceeded before start"))
+            pending.clear()
+            for task, reason in skipped:
+                stats.skipped += 1
+                yield task, None, DeadlineExceededError(reason)
+        finally:
+            # reached when the consumer stops iterating early
+            for future, (task, limiter) in in_flight.items():
+                if future.cancel():
+                    limiter.release()
+
+            with self._stats_lock:
+                self.stats.merge(stats)
+            logger.debug("scheduler run finished: %s", stats.as_dict())
+
+
+_scheduler: Optional[FetchScheduler] = None
+_scheduler_lock = Lock()
+
+
+def get_scheduler() -> FetchScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                config = settings.CONFIG["fetchers"]["scheduler"]
+                _scheduler = FetchScheduler(
+                    max_workers=config["max_workers"],
+                    max_per_request=config["max_per_request"],
+                )
+    return _scheduler
+
+
+def get_deadline(timeout: Optional[float] = None) -> float:
+    if timeout is None:
+        timeout = settings.CONFIG["fetchers"]["scheduler"]["timeout"]
+    return time.monotonic() + timeout
+
+
+def get_request_deadline(timeout: Optional[float] = None) -> float:
+    """
+    Deadline of a data request: `timeout` asked for by the client, capped by
+    fetchers.deadline.max_timeout, or the configured default.
+    """
+    config = settings.CONFIG["fetchers"]["deadline"]
+    if timeout is None:
+        timeout = config["timeout"]
+    return get_deadline(min(timeout, config["max_timeout"]))
+
+
+def get_remaining_time(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def is_deadline_exceeded(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
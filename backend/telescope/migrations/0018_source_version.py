@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telescope", "0017_migrate_savedview_data_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="source",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
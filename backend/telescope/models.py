@@ -1,16 +1,37 @@
 import logging
 import secrets
-from typing import List, Dict
+from threading import Lock
+from types import MappingProxyType
+from typing import List, Mapping, Tuple
 
+from cachetools import LRUCache
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User, Group
 
 from telescope.constants import VIEW_SCOPE_SOURCE, VIEW_SCOPE_PERSONAL
+from telescope.utils import convert_to_base_ch
 
 logger = logging.getLogger("telescope.models")
 
+# columns of the most recently used sources, by source id
+_source_columns: LRUCache = LRUCache(maxsize=1024)
+_source_columns_lock = Lock()
+
 
 class SourceColumn:
+    __slots__ = (
+        "name",
+        "display_name",
+        "type",
+        "base_type",
+        "jsonstring",
+        "autocomplete",
+        "suggest",
+        "group_by",
+        "values",
+    )
+
     def __init__(
         self,
         name: str,
@@ -25,6 +46,7 @@ class SourceColumn:
         self.name = name
         self.display_name = display_name
         self.type = type
+        self.base_type = convert_to_base_ch(type.lower())
         self.jsonstring = jsonstring
         self.autocomplete = autocomplete
         self.suggest = suggest
@@ -32,6 +54,34 @@ class SourceColumn:
         self.values = values
 
 
+class SourceColumns:
+    """
+    Column metadata of one version of a source, built once from its
+    `columns` JSON and shared by all readers, which must not change it.
+    """
+
+    __slots__ = ("version", "columns", "names")
+
+    def __init__(self, version: int, columns: dict):
+        self.version = version
+        self.columns: Mapping[str, SourceColumn] = MappingProxyType(
+            {
+                key: SourceColumn(
+                    name=key,
+                    display_name=value["display_name"],
+                    type=value["type"],
+                    jsonstring=value["jsonstring"],
+                    autocomplete=value["autocomplete"],
+                    suggest=value["suggest"],
+                    group_by=value["group_by"],
+                    values=value["values"],
+                )
+                for key, value in columns.items()
+            }
+        )
+        self.names: Tuple[str, ...] = tuple(sorted(self.columns))
+
+
 class Connection(models.Model):
     kind = models.CharField(max_length=32)
     name = models.CharField(max_length=64)
@@ -73,6 +123,8 @@ class Source(models.Model):
     conn = models.ForeignKey(Connection, on_delete=models.SET_NULL, null=True)
     data = models.JSONField(default=dict, blank=True)
     query_mode = models.CharField(max_length=16, default="separate")
+    # incremented on every save, invalidates the cached column metadata
+    version = models.PositiveIntegerField(default=1)
 
     def __init__(self, *args, **kwargs):
         super(Source, self).__init__(*args, **kwargs)
@@ -117,20 +169,40 @@ class Source(models.Model):
         return "_____record_pseudo_id"
 
     @property
-    def _columns(self) -> Dict[str, SourceColumn]:
-        columns = {}
-        for key, value in self.columns.items():
-            columns[key] = SourceColumn(
-                name=key,
-                display_name=value["display_name"],
-                type=value["type"],
-                jsonstring=value["jsonstring"],
-                autocomplete=value["autocomplete"],
-                suggest=value["suggest"],
-                group_by=value["group_by"],
-                values=value["values"],
-            )
-        return columns
+    def source_columns(self) -> SourceColumns:
+        """
+        Column metadata, cached per process by source id and rebuilt when the
+        stored source changed (see `version`).
+        """
+        if self.pk is None:
+            return SourceColumns(self.version, self.columns)
+        with _source_columns_lock:
+            cached = _source_columns.get(self.pk)
+        if cached is not None and cached.version == self.version:
+            return cached
+        source_columns = SourceColumns(self.version, self.columns)
+        with _source_columns_lock:
+            # instances loaded before a save must not evict the newer version
+            cached = _source_columns.get(self.pk)
+            if cached is None or cached.version < self.version:
+                _source_columns[self.pk] = source_columns
+        return source_columns
+
+    @property
+    def _columns(self) -> Mapping[str, SourceColumn]:
+        return self.source_columns.columns
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # atomic, so that concurrent updates never share a version
+            self.version = F("version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+        if not isinstance(self.version, int):
+            self.refresh_from_db(fields=["version"])
+        with _source_columns_lock:
+            _source_columns.pop(self.pk, None)
 
     def add_perms(self, perms):
         for perm in perms:
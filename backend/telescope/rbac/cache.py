@@ -0,0 +1,63 @@
+from threading import Lock
+from typing import Dict, FrozenSet, Hashable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from telescope.cache import VersionedCache
+
+# shared cache key of the permissions version, bumped by every process that
+# changes role bindings, group memberships, sources or connections
+VERSION_KEY = "telescope:rbac:permissions_version"
+
+
+class UserPermissions:
+    """
+    Effective permissions of a user: global permissions and, per model
+    class, the permissions granted by role bindings on each object (by the
+    object's RBAC key, see SUPPORTED_MODELS in the manager).
+    """
+
+    __slots__ = ("global_permissions", "object_permissions")
+
+    def __init__(
+        self,
+        global_permissions: FrozenSet[str],
+        object_permissions: Dict[type, Dict[Hashable, FrozenSet[str]]],
+    ):
+        self.global_permissions = global_permissions
+        self.object_permissions = object_permissions
+
+
+_permissions_cache: Optional[VersionedCache] = None
+_permissions_cache_lock = Lock()
+
+
+def get_permissions_cache() -> VersionedCache:
+    """
+    UserPermissions by (user id, is_superuser).
+    """
+    global _permissions_cache
+    if _permissions_cache is None:
+        with _permissions_cache_lock:
+            if _permissions_cache is None:
+                config = settings.CONFIG["rbac"]["permissions_cache"]
+                _permissions_cache = VersionedCache(
+                    VERSION_KEY,
+                    enabled=config["enabled"],
+                    ttl=config["ttl"],
+                    shared=config["shared"],
+                    version_check_interval=config["version_check_interval"],
+                )
+    return _permissions_cache
+
+
+def bump_permissions_version():
+    """
+    Invalidates cached permissions now, and again once the current
+    transaction is committed: entries loaded in between may have read the
+    data as it was before the commit.
+    """
+    permissions_cache = get_permissions_cache()
+    permissions_cache.bump()
+    transaction.on_commit(permissions_cache.bump)
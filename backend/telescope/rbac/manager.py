@@ -1,14 +1,16 @@
 import logging
-from typing import List, Dict, Optional, Union, TypeVar, Type
+from typing import FrozenSet, List, Dict, Optional, Union, TypeVar, Type
 
 from django.db.models import Q, Model
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
 from django.contrib.auth.models import User, Group
 
 
 from telescope.rbac.roles import ROLES
 from telescope.rbac import permissions
+from telescope.rbac.cache import UserPermissions, get_permissions_cache
+from telescope.cache import get_source_snapshot
 from telescope.models import (
     GlobalRoleBinding,
     SourceRoleBinding,
@@ -70,8 +72,8 @@ class RBACManager:
                     result.add(name)
         return result
 
-    def _get_user_global_permissions(self, user: User, groups=None) -> set:
-        groups = groups if groups is not None else user.groups.all()
+    def _load_user_permissions(self, user: User) -> UserPermissions:
+        groups = user.groups.all()
         if not user.is_superuser:
             roles = (
                 GlobalRoleBinding.objects.filter(Q(group__in=groups) | Q(user=user))
@@ -80,7 +82,74 @@ class RBACManager:
             )
         else:
             roles = ROLES["global"].keys()
-        return self._roles_to_permissions(roles, kind="global")
+        global_permissions = frozenset(self._roles_to_permissions(roles, kind="global"))
+
+        object_permissions = {}
+        for model_class, config in SUPPORTED_MODELS.items():
+            roles_by_key: Dict[Union[int, str], List[str]] = {}
+            bindings = (
+                config["role_binding_class"]
+                .objects.filter(Q(user=user) | Q(group__in=groups))
+                .values_list(
+                    f"{config['role_binding_field']}__{config['pk_key']}", "role"
+                )
+            )
+            for key, role in bindings:
+                roles_by_key.setdefault(key, []).append(role)
+            object_permissions[model_class] = {
+                key: frozenset(
+                    self._roles_to_permissions(roles, kind=config["roles_kind"])
+                )
+                for key, roles in roles_by_key.items()
+            }
+        return UserPermissions(global_permissions, object_permissions)
+
+    def get_user_permissions(self, user: User) -> UserPermissions:
+        """
+        Effective permissions of `user`, cached until role bindings, group
+        memberships, sources or connections change.
+        """
+        return get_permissions_cache().get(
+            (user.pk, user.is_superuser), lambda: self._load_user_permissions(user)
+        )
+
+    @staticmethod
+    def _get_object_key(model_class, pk: Union[int, str]) -> Union[int, str]:
+        # pk as stored in the bindings, e.g. connection ids given as strings
+        config = SUPPORTED_MODELS[model_class]
+        if config["pk_key"] == "pk":
+            field = model_class._meta.pk
+        else:
+            field = model_class._meta.get_field(config["pk_key"])
+        try:
+            return field.to_python(pk)
+        except ValidationError:
+            return pk
+
+    @staticmethod
+    def _get_global_object_permissions(
+        config: Dict, global_user_permissions: FrozenSet[str]
+    ) -> set:
+        global_object_permissions = set()
+        for perm in global_user_permissions:
+            local_perm = config["global_to_local_mapping"].get(perm)
+            if local_perm:
+                global_object_permissions.add(local_perm)
+        return global_object_permissions
+
+    def _get_readable_permissions(
+        self, config: Dict, user_permissions: UserPermissions
+    ) -> Optional[set]:
+        # object permissions given by global roles to users allowed to read
+        # every object, None for the others
+        if config["global_read_permission"] not in user_permissions.global_permissions:
+            return None
+        return self._get_global_object_permissions(
+            config, user_permissions.global_permissions
+        )
+
+    def _get_user_global_permissions(self, user: User) -> set:
+        return set(self.get_user_permissions(user).global_permissions)
 
     def _get_objects(
         self,
@@ -93,66 +162,33 @@ class RBACManager:
     ) -> Union[List[ModelType], ModelType]:
         filters = filters or {}
         config = self._get_model_config(model_class)
+        user_permissions = self.get_user_permissions(user)
+        bound_permissions = user_permissions.object_permissions[model_class]
 
-        _global_filter = {}
-        _filter = {}
-
-        for key, value in filters.items():
-            _global_filter[key] = value
-            _filter[f"{config['role_binding_field']}__{key}"] = value
-
+        _filter = dict(filters)
         if pk:
-            _global_filter[config["pk_key"]] = pk
-            _filter[f"{config['role_binding_field']}__{config['pk_key']}"] = pk
+            _filter[config["pk_key"]] = pk
 
         objects = []
-        objects_map = {}
-
-        global_user_permissions = self._get_user_global_permissions(user)
-
-        if config["global_read_permission"] in global_user_permissions:
-            global_object_permissions = set()
-            for perm in global_user_permissions:
-                local_perm = config["global_to_local_mapping"].get(perm)
-                if local_perm:
-                    global_object_permissions.add(local_perm)
-
-            object_queryset = model_class.objects.filter(**_global_filter)
-            if fetch_connection and model_class == Source:
-                object_queryset = object_queryset.select_related("conn")
-
-            for obj in object_queryset:
-                obj.add_perms(global_object_permissions)
-                objects_map[obj.pk] = {"object": obj, "roles": []}
-
-        binding_queryset = config["role_binding_class"].objects.select_related(
-            config["role_binding_field"]
+        global_object_permissions = self._get_readable_permissions(
+            config, user_permissions
         )
-        if fetch_connection and model_class == Source:
-            binding_queryset = binding_queryset.select_related(
-                f"{config['role_binding_field']}__conn"
+        if global_object_permissions is not None:
+            object_queryset = model_class.objects.filter(**_filter)
+        elif bound_permissions:
+            object_queryset = model_class.objects.filter(
+                **_filter, **{f"{config['pk_key']}__in": list(bound_permissions)}
             )
+        else:
+            object_queryset = model_class.objects.none()
 
-        bindings = binding_queryset.filter(
-            (Q(user=user) | Q(group__in=user.groups.all())) & Q(**_filter)
-        )
-
-        for binding in bindings:
-            obj = getattr(binding, config["role_binding_field"])
-            if obj.pk not in objects_map:
-                objects_map[obj.pk] = {
-                    "object": obj,
-                    "roles": [binding.role],
-                }
-            else:
-                objects_map[obj.pk]["roles"].append(binding.role)
+        if fetch_connection and model_class == Source:
+            object_queryset = object_queryset.select_related("conn")
 
-        for _, data in objects_map.items():
-            if data["roles"]:
-                data["object"].add_perms(
-                    self._roles_to_permissions(data["roles"], kind=config["roles_kind"])
-                )
-            objects.append(data["object"])
+        for obj in object_queryset:
+            obj.add_perms(global_object_permissions or ())
+            obj.add_perms(bound_permissions.get(getattr(obj, config["pk_key"]), ()))
+            objects.append(obj)
 
         if required_permissions:
             objects = list(
@@ -185,27 +221,16 @@ class RBACManager:
         raise_exception: bool = True,
     ) -> bool:
         config = self._get_model_config(model_class)
-        groups = user.groups.all()
-
-        global_user_permissions = self._get_user_global_permissions(user, groups=groups)
-
-        global_local_permissions = set()
-        for perm in global_user_permissions:
-            local_perm = config["global_to_local_mapping"].get(perm)
-            if local_perm:
-                global_local_permissions.add(local_perm)
+        user_permissions = self.get_user_permissions(user)
 
+        global_local_permissions = self._get_global_object_permissions(
+            config, user_permissions.global_permissions
+        )
         if all([perm in global_local_permissions for perm in required_permissions]):
             return True
 
-        filter_kwargs = {f"{config['role_binding_field']}__{config["pk_key"]}": pk}
-
-        bindings = config["role_binding_class"].objects.filter(
-            (Q(user=user) | Q(group__in=groups)) & Q(**filter_kwargs)
-        )
-
-        existing_permissions = self._roles_to_permissions(
-            [b.role for b in bindings], kind=config["roles_kind"]
+        existing_permissions = user_permissions.object_permissions[model_class].get(
+            self._get_object_key(model_class, pk), frozenset()
         )
 
         if all([perm in existing_permissions for perm in required_permissions]):
@@ -246,6 +271,39 @@ class RBACManager:
             fetch_connection=fetch_connection,
         )
 
+    def get_source_snapshot(
+        self,
+        user: User,
+        source_slug: str,
+        required_permissions: Optional[List[str]] = None,
+    ) -> Source:
+        """
+        Same as get_source(..., fetch_connection=True), the source and its
+        connection coming from the per-process sources cache: to be used
+        by requests that only read them.
+        """
+        user_permissions = self.get_user_permissions(user)
+        global_object_permissions = self._get_readable_permissions(
+            SOURCE_CONFIG, user_permissions
+        )
+        bound_permissions = user_permissions.object_permissions[Source]
+
+        source = None
+        if global_object_permissions is not None or source_slug in bound_permissions:
+            source = get_source_snapshot(source_slug)
+        if source is not None:
+            source.add_perms(global_object_permissions or ())
+            source.add_perms(bound_permissions.get(source.slug, ()))
+            if required_permissions and not all(
+                [perm in source.permissions for perm in required_permissions]
+            ):
+                source = None
+        if source is None:
+            raise Source.DoesNotExist(
+                f"object with pk {source_slug} does not exist or you have no permissions to read it"
+            )
+        return source
+
     def get_connections(
         self,
         user: User,
@@ -371,8 +429,8 @@ class RBACManager:
                 )
                 raise PermissionDenied("Insufficient permissions")
 
-    def get_user_global_permissions(self, user: User, groups=None) -> set:
-        return self._get_user_global_permissions(user, groups)
+    def get_user_global_permissions(self, user: User) -> set:
+        return self._get_user_global_permissions(user)
 
     # Convenience wrappers for source/connection roles
     def grant_source_role(
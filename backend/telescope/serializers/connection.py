@@ -47,8 +47,38 @@ class ClickhouseConnectionSerializer(serializers.Serializer):
     tls_mode = serializers.CharField(allow_blank=True, allow_null=True)
 
 
-class DockerConnectionSerializer(serializers.Serializer):
+class DockerHostSerializer(serializers.Serializer):
     address = serializers.CharField()
+    label = serializers.CharField(required=False, allow_blank=True, default="")
+    timeout = serializers.FloatField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        help_text="Timeout of each call to this daemon in seconds (default: 60)",
+    )
+
+
+class DockerConnectionSerializer(serializers.Serializer):
+    address = serializers.CharField(required=False, allow_blank=True, default="")
+    hosts = DockerHostSerializer(
+        many=True,
+        required=False,
+        default=list,
+        help_text="Further daemons searched together with `address`",
+    )
+    max_concurrent_requests = serializers.IntegerField(
+        required=False,
+        default=10,
+        min_value=1,
+        help_text="Maximum number of concurrent log requests per daemon (default: 10)",
+    )
+
+    def validate(self, data):
+        if not data.get("address") and not data.get("hosts"):
+            raise serializers.ValidationError(
+                {"address": "Address or at least one host is required."}
+            )
+        return data
 
 
 class KubernetesConnectionSerializer(serializers.Serializer):
@@ -74,6 +104,17 @@ class KubernetesConnectionSerializer(serializers.Serializer):
         min_value=1,
         help_text="Maximum number of concurrent requests for parallel log fetching (default: 20)",
     )
+    list_page_size = serializers.IntegerField(
+        required=False,
+        default=500,
+        min_value=0,
+        help_text="Page size (limit) for namespace and pod list calls, 0 disables paging (default: 500)",
+    )
+    list_from_cache = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Serve namespace and pod list calls from the API server watch cache (resourceVersion=0)",
+    )
 
     def validate(self, data):
         errors = {}
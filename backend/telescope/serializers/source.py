@@ -446,6 +446,7 @@ class SourceDataRequestSerializer(serializers.Serializer):
     to = serializers.CharField()
     limit = serializers.IntegerField()
     context_columns = serializers.JSONField(allow_null=True, required=False)
+    timeout = serializers.FloatField(min_value=1, required=False, allow_null=True)
 
     def get_fields(self):
         fields = super().get_fields()
@@ -535,6 +536,7 @@ class SourceDataAndGraphDataRequestSerializer(serializers.Serializer):
     limit = serializers.IntegerField()
     group_by = serializers.CharField(allow_blank=True, required=False)
     context_columns = serializers.JSONField(allow_null=True, required=False)
+    timeout = serializers.FloatField(min_value=1, required=False, allow_null=True)
 
     def get_fields(self):
         fields = super().get_fields()
@@ -3,12 +3,35 @@ from django.dispatch import receiver
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.models import User, Group
 from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 from allauth.account.signals import user_logged_in
 from allauth.socialaccount.signals import pre_social_login
 
 import requests
 
+from telescope.models import (
+    APIToken,
+    Connection,
+    ConnectionRoleBinding,
+    GlobalRoleBinding,
+    Source,
+    SourceRoleBinding,
+)
+from telescope.auth.token import bump_tokens_version
+from telescope.cache import bump_sources_version
+from telescope.rbac.cache import bump_permissions_version
+
+# models whose changes may change effective permissions
+PERMISSIONS_MODELS = (
+    GlobalRoleBinding,
+    SourceRoleBinding,
+    ConnectionRoleBinding,
+    Group,
+    Source,
+    Connection,
+)
+
 
 @receiver([pre_social_login])
 def check_github_organization_membership(request, sociallogin, **kwargs):
@@ -79,3 +102,26 @@ def add_feishu_user_to_default_group(request, user, **kwargs):
     if user.socialaccount_set.filter(provider="feishu").exists():
         default_group, created = Group.objects.get_or_create(name=default_group_name)
         user.groups.add(default_group)
+
+
+@receiver([post_save, post_delete])
+def invalidate_permissions(sender, **kwargs):
+    if sender in PERMISSIONS_MODELS:
+        bump_permissions_version()
+    if sender in (Source, Connection):
+        bump_sources_version()
+
+
+@receiver([post_save, post_delete])
+def invalidate_tokens(sender, update_fields=None, **kwargs):
+    if sender is APIToken:
+        bump_tokens_version()
+    elif sender is User and update_fields != frozenset(["last_login"]):
+        # logins only update last_login, which cached users may keep
+        bump_tokens_version()
+
+
+@receiver([m2m_changed], sender=User.groups.through)
+def invalidate_group_members_permissions(sender, action, pk_set=None, **kwargs):
+    if action == "post_clear" or (action in ("post_add", "post_remove") and pk_set):
+        bump_permissions_version()
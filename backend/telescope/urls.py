@@ -81,6 +81,10 @@ urlpatterns = [
         "ui/v1/sources/<slug:slug>/dataAndGraph",
         source.SourceDataAndGraphDataView.as_view(),
     ),
+    path(
+        "ui/v1/sources/<slug:slug>/dataAndGraphStream",
+        source.SourceDataAndGraphDataStreamView.as_view(),
+    ),
     path(
         "ui/v1/sources/<slug:slug>/contextColumnData",
         source.SourceContextColumnDataView.as_view(),
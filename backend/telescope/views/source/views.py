@@ -1,7 +1,9 @@
+import json
 import logging
 
 from telescope.constants import UTC_ZONE
 
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User, Group
@@ -19,6 +21,9 @@ from telescope.fetchers.request import (
     GraphDataRequest,
     DataAndGraphDataRequest,
 )
+from telescope.fetchers.models import rows_as_dicts
+from telescope.fetchers.response import DataAndGraphDataBatch
+from telescope.fetchers.scheduler import get_request_deadline
 from telescope.rbac import permissions
 from telescope.response import UIResponse
 from telescope.models import Source, SavedView, Connection
@@ -273,11 +278,10 @@ class SourceDataAutocompleteView(APIView):
     def post(self, request, slug):
         response = UIResponse()
 
-        source = rbac_manager.get_source(
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
         serializer = SourceAutocompleteRequestSerializer(
             data=request.data,
@@ -304,11 +308,10 @@ class SourceDataView(APIView):
     def post(self, request, slug):
         response = UIResponse()
 
-        source = rbac_manager.get_source(
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
         serializer = SourceDataRequestSerializer(
             data=request.data, context={"source": source, "user": request.user}
@@ -321,14 +324,18 @@ class SourceDataView(APIView):
 
         try:
             fetcher = get_fetchers()[source.kind]
+            query = serializer.validated_data.get("query", "")
             data_request = DataRequest(
                 source=source,
-                query=serializer.validated_data.get("query", ""),
+                query=query,
                 raw_query=serializer.validated_data.get("raw_query", ""),
                 time_from=serializer.validated_data["from"],
                 time_to=serializer.validated_data["to"],
                 limit=serializer.validated_data["limit"],
                 context_columns=serializer.validated_data["context_columns"],
+                deadline=get_request_deadline(serializer.validated_data.get("timeout")),
+                # compiled while validating, served from the query cache
+                compiled_query=fetcher.get_query(source, query),
             )
             data_response = fetcher.fetch_data(
                 data_request,
@@ -345,7 +352,7 @@ class SourceDataView(APIView):
                     "columns": [
                         f.as_dict() for f in serializer.validated_data["columns"]
                     ],
-                    "rows": [row.as_dict() for row in data_response.rows],
+                    "rows": rows_as_dicts(data_response.rows),
                     "message": data_response.message,
                 }
         return Response(response.as_dict())
@@ -356,11 +363,10 @@ class SourceContextColumnDataView(APIView):
     def post(self, request, slug):
         response = UIResponse()
 
-        source = rbac_manager.get_source(
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
         serializer = SourceContextColumnDataSerializer(data=request.data)
 
@@ -388,11 +394,10 @@ class SourceContextColumnsDataView(APIView):
     def get(self, request, slug):
         response = UIResponse()
 
-        source = rbac_manager.get_source(
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
         try:
             fetcher = get_fetchers()[source.kind]
@@ -411,11 +416,10 @@ class SourceGraphDataView(APIView):
     def post(self, request, slug):
         response = UIResponse()
 
-        source = rbac_manager.get_source(
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
         serializer = SourceGraphDataRequestSerializer(
             data=request.data, context={"source": source, "user": request.user}
@@ -428,14 +432,17 @@ class SourceGraphDataView(APIView):
 
         try:
             fetcher = get_fetchers()[source.kind]
+            query = serializer.validated_data.get("query", "")
             graph_data_request = GraphDataRequest(
                 source=source,
-                query=serializer.validated_data.get("query", ""),
+                query=query,
                 raw_query=serializer.validated_data.get("raw_query", ""),
                 time_from=serializer.validated_data["from"],
                 time_to=serializer.validated_data["to"],
                 group_by=serializer.validated_data["group_by"],
                 context_columns=serializer.validated_data["context_columns"],
+                deadline=get_request_deadline(serializer.validated_data.get("timeout")),
+                compiled_query=fetcher.get_query(source, query),
             )
             graph_data_response = fetcher.fetch_graph_data(graph_data_request)
         except Exception as err:
@@ -446,20 +453,21 @@ class SourceGraphDataView(APIView):
                 "timestamps": graph_data_response.timestamps,
                 "data": graph_data_response.data,
                 "total": graph_data_response.total,
+                "message": graph_data_response.message,
             }
         return Response(response.as_dict())
 
 
 class SourceDataAndGraphDataView(APIView):
-    @method_decorator(login_required)
-    def post(self, request, slug):
-        response = UIResponse()
-
-        source = rbac_manager.get_source(
+    def get_combined_request(self, request, slug, response):
+        """
+        Returns (serializer, DataAndGraphDataRequest), or (None, None) when
+        `response` has been marked as failed or invalid.
+        """
+        source = rbac_manager.get_source_snapshot(
             user=request.user,
             source_slug=slug,
             required_permissions=[permissions.Source.USE.value],
-            fetch_connection=True,
         )
 
         # Only allow combined mode for sources that support it
@@ -467,7 +475,7 @@ class SourceDataAndGraphDataView(APIView):
             response.mark_failed(
                 "This source does not support combined data/graph queries"
             )
-            return Response(response.as_dict())
+            return None, None
 
         serializer = SourceDataAndGraphDataRequestSerializer(
             data=request.data, context={"source": source, "user": request.user}
@@ -476,20 +484,35 @@ class SourceDataAndGraphDataView(APIView):
         if not serializer.is_valid():
             response.validation["result"] = False
             response.validation["columns"] = serializer.errors
+            return None, None
+
+        query = serializer.validated_data.get("query", "")
+        combined_request = DataAndGraphDataRequest(
+            source=source,
+            query=query,
+            raw_query=serializer.validated_data.get("raw_query", ""),
+            time_from=serializer.validated_data["from"],
+            time_to=serializer.validated_data["to"],
+            limit=serializer.validated_data["limit"],
+            group_by=serializer.validated_data["group_by"],
+            context_columns=serializer.validated_data["context_columns"],
+            deadline=get_request_deadline(serializer.validated_data.get("timeout")),
+            compiled_query=get_fetchers()[source.kind].get_query(source, query),
+        )
+        return serializer, combined_request
+
+    @method_decorator(login_required)
+    def post(self, request, slug):
+        response = UIResponse()
+
+        serializer, combined_request = self.get_combined_request(
+            request, slug, response
+        )
+        if combined_request is None:
             return Response(response.as_dict())
 
         try:
-            fetcher = get_fetchers()[source.kind]
-            combined_request = DataAndGraphDataRequest(
-                source=source,
-                query=serializer.validated_data.get("query", ""),
-                raw_query=serializer.validated_data.get("raw_query", ""),
-                time_from=serializer.validated_data["from"],
-                time_to=serializer.validated_data["to"],
-                limit=serializer.validated_data["limit"],
-                group_by=serializer.validated_data["group_by"],
-                context_columns=serializer.validated_data["context_columns"],
-            )
+            fetcher = get_fetchers()[combined_request.source.kind]
             combined_response = fetcher.fetch_data_and_graph(
                 combined_request,
                 tz=UTC_ZONE,
@@ -507,7 +530,7 @@ class SourceDataAndGraphDataView(APIView):
                     "columns": [
                         f.as_dict() for f in serializer.validated_data["columns"]
                     ],
-                    "rows": [row.as_dict() for row in combined_response.rows],
+                    "rows": rows_as_dicts(combined_response.rows),
                     "message": combined_response.message,
                     "graph": {
                         "timestamps": combined_response.graph_timestamps,
@@ -518,6 +541,85 @@ class SourceDataAndGraphDataView(APIView):
         return Response(response.as_dict())
 
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class SourceDataAndGraphDataStreamView(SourceDataAndGraphDataView):
+    """
+    Server-sent events variant of SourceDataAndGraphDataView.
+
+    Emits a `columns` event, then a `batch` event per finished container
+    with its rows (newest first, at most `limit`) and graph count deltas, and
+    finally a `summary` event with the total, message and per-container
+    errors. The client merges batches and keeps the newest `limit` rows.
+    """
+
+    @method_decorator(login_required)
+    def post(self, request, slug):
+        response = UIResponse()
+
+        serializer, combined_request = self.get_combined_request(
+            request, slug, response
+        )
+        if combined_request is None:
+            return Response(response.as_dict())
+
+        fetcher = get_fetchers()[combined_request.source.kind]
+        columns = [f.as_dict() for f in serializer.validated_data["columns"]]
+
+        def events():
+            yield sse_event("columns", {"columns": columns})
+            try:
+                for item in fetcher.stream_data_and_graph(
+                    combined_request, tz=UTC_ZONE
+                ):
+                    if isinstance(item, DataAndGraphDataBatch):
+                        yield sse_event(
+                            "batch",
+                            {
+                                "origin": item.origin,
+                                "rows": rows_as_dicts(item.rows),
+                                "graph": {
+                                    "timestamps": item.graph_timestamps,
+                                    "data": item.graph_data,
+                                    "total": item.graph_total,
+                                },
+                            },
+                        )
+                    else:
+                        yield sse_event(
+                            "summary",
+                            {
+                                "result": item.error is None,
+                                "total": item.total,
+                                "message": item.message,
+                                "error": item.error,
+                                "errors": item.errors,
+                            },
+                        )
+            except NotImplementedError:
+                yield sse_event(
+                    "summary",
+                    {
+                        "result": False,
+                        "error": "Streaming fetch not supported for this source type",
+                        "errors": [],
+                    },
+                )
+            except Exception as err:
+                logger.exception(f"unhandled exception: {err}")
+                yield sse_event(
+                    "summary", {"result": False, "error": str(err), "errors": []}
+                )
+
+        stream = StreamingHttpResponse(events(), content_type="text/event-stream")
+        stream["Cache-Control"] = "no-cache"
+        # disable proxy buffering, batches must reach the client as they come
+        stream["X-Accel-Buffering"] = "no"
+        return stream
+
+
 class SourceTestConnectionView(APIView):
     @method_decorator(login_required)
     def post(self, request, kind):
@@ -1,9 +1,14 @@
+import time
+
 import pytest
 from unittest.mock import Mock, MagicMock, patch
 
-from telescope.fetchers.clickhouse import Fetcher as ClickhouseFetcher
+from clickhouse_connect.driver.models import SettingDef
+
+from telescope.fetchers.clickhouse import Fetcher as ClickhouseFetcher, is_time_limited
 from telescope.fetchers.request import DataRequest, GraphDataRequest
-from telescope.models import Source
+from telescope.models import Source, SourceColumns
+from telescope.utils import get_telescope_column
 from telescope.constants import UTC_ZONE
 
 
@@ -18,10 +23,14 @@ def mock_clickhouse_source():
     }
     source.time_column = "timestamp"
     source.date_column = None
-    source._columns = {
-        "timestamp": Mock(type="DateTime"),
-        "message": Mock(type="String"),
-    }
+    source.source_columns = SourceColumns(
+        1,
+        {
+            "timestamp": get_telescope_column("timestamp", "DateTime"),
+            "message": get_telescope_column("message", "String"),
+        },
+    )
+    source._columns = source.source_columns.columns
 
     # Mock connection
     mock_connection = Mock()
@@ -44,10 +53,14 @@ def mock_clickhouse_source_no_settings():
     source.data = {"database": "test_db", "table": "test_table"}
     source.time_column = "timestamp"
     source.date_column = None
-    source._columns = {
-        "timestamp": Mock(type="DateTime"),
-        "message": Mock(type="String"),
-    }
+    source.source_columns = SourceColumns(
+        1,
+        {
+            "timestamp": get_telescope_column("timestamp", "DateTime"),
+            "message": get_telescope_column("message", "String"),
+        },
+    )
+    source._columns = source.source_columns.columns
 
     # Mock connection
     mock_connection = Mock()
@@ -294,3 +307,94 @@ def test_settings_query_position(mock_clickhouse_connect, mock_clickhouse_source
     limit_pos = query.find("LIMIT 100")
     settings_pos = query.find("SETTINGS")
     assert settings_pos > limit_pos, "SETTINGS clause should come after LIMIT"
+
+
+@patch("telescope.fetchers.clickhouse.ClickhouseConnect")
+def test_fetch_data_bounds_execution_time_by_deadline(
+    mock_clickhouse_connect, mock_clickhouse_source_no_settings
+):
+    """Test that the request deadline becomes max_execution_time"""
+    mock_client = MagicMock()
+    mock_result = MagicMock()
+    mock_result.result_rows = []
+    mock_client.query.return_value = mock_result
+
+    mock_client.server_settings = {
+        "max_execution_time": SettingDef("max_execution_time", "0", 0),
+        "timeout_overflow_mode": SettingDef("timeout_overflow_mode", "throw", 0),
+    }
+
+    mock_context = MagicMock()
+    mock_context.__enter__.return_value.client = mock_client
+    mock_clickhouse_connect.return_value = mock_context
+
+    deadline = time.monotonic() + 30
+    request = DataRequest(
+        source=mock_clickhouse_source_no_settings,
+        time_from=1000000000000,
+        time_to=2000000000000,
+        limit=100,
+        query=None,
+        raw_query=None,
+        context_columns={},
+        deadline=deadline,
+    )
+
+    response = ClickhouseFetcher.fetch_data(request, tz=UTC_ZONE)
+
+    settings = mock_client.query.call_args[1]["settings"]
+    assert settings["max_execution_time"] in (29, 30)
+    assert settings["timeout_overflow_mode"] == "break"
+    assert mock_clickhouse_connect.call_args[1]["deadline"] == deadline
+    assert response.message is None
+
+
+@patch("telescope.fetchers.clickhouse.ClickhouseConnect")
+def test_fetch_data_deadline_without_changeable_settings(
+    mock_clickhouse_connect, mock_clickhouse_source_no_settings
+):
+    """Test that readonly users are only bounded by the client timeout"""
+    mock_client = MagicMock()
+    mock_result = MagicMock()
+    mock_result.result_rows = []
+    mock_client.query.return_value = mock_result
+    mock_client.server_settings = {
+        "max_execution_time": SettingDef("max_execution_time", "0", 1),
+        "timeout_overflow_mode": SettingDef("timeout_overflow_mode", "throw", 1),
+    }
+
+    mock_context = MagicMock()
+    mock_context.__enter__.return_value.client = mock_client
+    mock_clickhouse_connect.return_value = mock_context
+
+    deadline = time.monotonic() + 30
+    request = DataRequest(
+        source=mock_clickhouse_source_no_settings,
+        time_from=1000000000000,
+        time_to=2000000000000,
+        limit=100,
+        query=None,
+        raw_query=None,
+        context_columns={},
+        deadline=deadline,
+    )
+
+    ClickhouseFetcher.fetch_data(request, tz=UTC_ZONE)
+
+    assert mock_client.query.call_args[1]["settings"] == {}
+    assert mock_clickhouse_connect.call_args[1]["deadline"] == deadline
+
+
+def test_is_time_limited():
+    """Test that queries reading all their rows are not reported as partial"""
+    settings = {"max_execution_time": 10, "timeout_overflow_mode": "break"}
+
+    assert not is_time_limited({}, 20, {})
+    assert not is_time_limited(settings, 5, {})
+    assert is_time_limited(settings, 10, {})
+    assert is_time_limited(
+        settings, 10, {"read_rows": "10", "total_rows_to_read": "100"}
+    )
+    assert not is_time_limited(
+        settings, 10, {"read_rows": "100", "total_rows_to_read": "100"}
+    )
@@ -0,0 +1,560 @@
+import queue
+import struct
+import time
+from threading import Event, Lock
+from unittest.mock import patch, MagicMock
+
+import docker
+import pytest
+import requests
+
+from telescope.fetchers.docker.fetcher import Fetcher
+from telescope.fetchers.docker.api import (
+    ContainerMeta,
+    api_get,
+    demux_log_streams,
+    get_hosts,
+)
+from telescope.fetchers.docker.index import MAX_VALUES, ValueIndex
+from telescope.fetchers.docker.inventory import (
+    ContainerInventory,
+    _inventories,
+    get_inventory,
+)
+from telescope.fetchers.request import (
+    DataRequest,
+    DataAndGraphDataRequest,
+    GraphDataRequest,
+)
+from telescope.fetchers.response import DataAndGraphDataBatch
+from telescope.constants import UTC_ZONE
+from tests.data import get_docker_source_data, get_docker_connection_data
+
+TIME_FROM = 1704067200000  # 2024-01-01T00:00:00Z
+TIME_TO = TIME_FROM + 60_000
+
+
+@pytest.fixture
+def docker_source():
+    source_data = get_docker_source_data("test-docker")
+    mock_source = MagicMock()
+    mock_source.slug = source_data["slug"]
+    mock_source.kind = source_data["kind"]
+    mock_source.time_column = source_data["time_column"]
+    mock_source.uniq_column = source_data["uniq_column"]
+    mock_source.columns = source_data["columns"]
+    mock_source.conn = MagicMock()
+    mock_source.conn.data = get_docker_connection_data()["data"]
+    mock_source._columns = {name: MagicMock() for name in source_data["columns"]}
+    return mock_source
+
+
+def frame(stream_type: int, payload: str) -> bytes:
+    data = payload.encode()
+    return struct.pack(">BxxxL", stream_type, len(data)) + data
+
+
+class FakeEventStream:
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.queue.put(None)
+
+
+class FakeDaemon:
+    """
+    Stands in for the pooled APIClient: serves the /containers/json listing
+    and raw /logs bodies, and records every call.
+    """
+
+    def __init__(self):
+        self.containers = []
+        self.logs = {}
+        self.errors = {}
+        self.calls = []
+        self.on_logs = None
+        self.stream = None
+        self.subscribed = Event()
+
+    def add(self, name, raw_logs, labels=None, error=None):
+        container_id = f"{name}-id".ljust(64, "0")
+        self.containers.append(
+            {
+                "Id": container_id,
+                "Names": [f"/{name}"],
+                "State": "running",
+                "Labels": labels,
+            }
+        )
+        self.logs[container_id] = raw_logs
+        if error is not None:
+            self.errors[container_id] = error
+
+    def _url(self, path, *args):
+        return path.format(*args)
+
+    def _get(self, url, params=None, timeout=None):
+        self.calls.append((url, params, timeout))
+        if url == "/containers/json":
+            return MagicMock(json=lambda: self.containers, error=None)
+        container_id = url.split("/")[2]
+        if self.on_logs is not None:
+            self.on_logs()
+        return MagicMock(
+            content=self.logs[container_id], error=self.errors.get(container_id)
+        )
+
+    def events(self, since=None, until=None, filters=None, decode=None):
+        self.calls.append(("/events", {"since": since, "until": until}, None))
+        self.stream = FakeEventStream()
+        self.subscribed.set()
+        return self.stream
+
+    def emit(self, action, name, **attributes):
+        self.stream.queue.put(
+            {
+                "Type": "container",
+                "Action": action,
+                "Actor": {
+                    "ID": f"{name}-id".ljust(64, "0"),
+                    "Attributes": {"name": name, "image": "busybox", **attributes},
+                },
+            }
+        )
+
+    def listings(self):
+        return [call for call in self.calls if call[0] == "/containers/json"]
+
+    def _raise_for_status(self, res):
+        if res.error is not None:
+            raise res.error
+
+    def log_calls(self):
+        return [call for call in self.calls if call[0].endswith("/logs")]
+
+
+def stop_inventories():
+    for inventory in _inventories.values():
+        inventory.stop()
+    _inventories.clear()
+
+
+@pytest.fixture
+def daemon():
+    daemon = FakeDaemon()
+    stop_inventories()
+    with patch("telescope.fetchers.docker.api.get_client", return_value=daemon), patch(
+        "telescope.fetchers.docker.inventory.get_client", return_value=daemon
+    ):
+        yield daemon
+        stop_inventories()
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def data_request(docker_source, **kwargs):
+    params = {
+        "source": docker_source,
+        "query": "",
+        "raw_query": "",
+        "time_from": TIME_FROM,
+        "time_to": TIME_TO,
+        "limit": 10,
+        "context_columns": {},
+    }
+    params.update(kwargs)
+    return DataRequest(**params)
+
+
+def test_demux_log_streams():
+    raw = (
+        frame(1, "2024-01-01T00:00:01.000000000Z out 1\n")
+        + frame(2, "2024-01-01T00:00:02.000000000Z err ")
+        + frame(2, "1\n")
+        + frame(1, "2024-01-01T00:00:03.000000000Z out 2\n")
+    )
+    streams = demux_log_streams(raw)
+    assert streams["stdout"].count(b"\n") == 2
+    assert streams["stderr"] == b"2024-01-01T00:00:02.000000000Z err 1\n"
+
+    tty_raw = b"2024-01-01T00:00:01.000000000Z plain\n"
+    assert demux_log_streams(tty_raw) == {"stdout": tty_raw}
+    assert demux_log_streams(raw, tty=True) == {"stdout": raw}
+
+
+def test_api_get_uses_docker_client():
+    # fails when the docker-py internals behind api_get change
+    api = docker.APIClient(base_url="tcp://127.0.0.1:2375", version="1.41")
+    response = MagicMock(status_code=200, content=b"logs")
+    with patch.object(api, "get", return_value=response) as get:
+        res = api_get(
+            api,
+            "/containers/{0}/logs",
+            "abc",
+            params={"stdout": 1},
+            timeout=5,
+        )
+    assert res.content == b"logs"
+    get.assert_called_once_with(
+        "http://127.0.0.1:2375/v1.41/containers/abc/logs",
+        params={"stdout": 1},
+        timeout=5,
+    )
+
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        response=MagicMock(status_code=404)
+    )
+    with patch.object(api, "get", return_value=response):
+        with pytest.raises(docker.errors.NotFound):
+            api_get(api, "/containers/{0}/logs", "abc", params={}, timeout=5)
+
+
+def test_container_meta_from_summary():
+    meta = ContainerMeta.from_summary(
+        {"Id": "a" * 64, "Names": ["/web"], "State": "exited", "Labels": None}
+    )
+    assert (meta.name, meta.short_id, meta.status) == ("web", "a" * 12, "exited")
+    assert meta.labels == {}
+    assert meta.tty is None
+
+
+def test_fetch_data_single_logs_call_per_container(daemon, docker_source):
+    daemon.add(
+        "web",
+        frame(1, "2024-01-01T00:00:01Z GET /\n")
+        + frame(2, "2024-01-01T00:00:03Z \x1b[31mfailed\x1b[0m\n"),
+    )
+    daemon.add("worker", b"2024-01-01T00:00:02Z job done\n")
+    daemon.add("other", frame(1, "2024-01-01T00:00:04Z not selected\n"))
+
+    request = data_request(
+        docker_source, limit=2, context_columns={"container": ["web", "worker"]}
+    )
+    response = Fetcher.fetch_data(request, UTC_ZONE)
+
+    listings = daemon.listings()
+    assert len(listings) == 1
+    log_calls = daemon.log_calls()
+    assert len(log_calls) == 2
+    for _, params, _ in log_calls:
+        assert params["stdout"] == params["stderr"] == 1
+        assert params["since"] == TIME_FROM / 1000
+
+    assert [row.data["message"] for row in response.rows] == ["failed", "job done"]
+    assert [row.data["stream"] for row in response.rows] == ["stderr", "stdout"]
+    assert response.rows[1].data["container_name"] == "worker"
+
+
+def test_container_listing_is_cached(daemon, docker_source):
+    daemon.add("web", frame(1, "2024-01-01T00:00:01Z hello\n"), labels={"a": "b"})
+
+    columns = Fetcher.get_all_context_columns_data(docker_source)
+    assert columns["containers"] == [
+        {
+            "name": "web",
+            "short_id": "web-id000000",
+            "status": "running",
+            "labels": {"a": "b"},
+            "host": "unix:///var/run/docker.sock",
+        }
+    ]
+    assert Fetcher.get_context_column_data(docker_source, "container") == (
+        columns["containers"]
+    )
+    Fetcher.fetch_data(data_request(docker_source), UTC_ZONE)
+
+    listings = daemon.listings()
+    assert len(listings) == 1
+    assert listings[0][1] == {"all": 1}
+
+
+def test_fetch_data_filters_by_stream(daemon, docker_source):
+    daemon.add(
+        "web",
+        frame(1, "2024-01-01T00:00:01Z ok\n") + frame(2, "2024-01-01T00:00:02Z boom\n"),
+    )
+    response = Fetcher.fetch_data(
+        data_request(docker_source, query="stream=stderr"), UTC_ZONE
+    )
+    assert [row.data["message"] for row in response.rows] == ["boom"]
+
+
+def test_fetch_graph_data_groups_by_label(daemon, docker_source):
+    daemon.add(
+        "web",
+        frame(1, "2024-01-01T00:00:01Z a\n") + frame(1, "2024-01-01T00:00:02Z b\n"),
+        labels={"app": "web"},
+    )
+    daemon.add("db", frame(2, "2024-01-01T00:00:01Z c\n"), labels={"app": "db"})
+    group_by = MagicMock()
+    group_by.name = "labels.app"
+    request = GraphDataRequest(
+        source=docker_source,
+        query="",
+        raw_query="",
+        time_from=TIME_FROM,
+        time_to=TIME_TO,
+        group_by=[group_by],
+        context_columns={},
+    )
+    response = Fetcher.fetch_graph_data(request)
+
+    assert response.total == 3
+    assert sum(response.data["web"]) == 2
+    assert sum(response.data["db"]) == 1
+
+
+def test_stream_data_and_graph_reports_container_errors(daemon, docker_source):
+    daemon.add("web", frame(1, "2024-01-01T00:00:01Z hello\n"))
+    daemon.add("broken", b"", error=RuntimeError("no such container"))
+    request = DataAndGraphDataRequest(
+        source=docker_source,
+        query="",
+        raw_query="",
+        time_from=TIME_FROM,
+        time_to=TIME_TO,
+        limit=10,
+        group_by=[],
+        context_columns={},
+    )
+    *batches, summary = list(Fetcher.stream_data_and_graph(request, UTC_ZONE))
+
+    assert len(batches) == 1
+    assert isinstance(batches[0], DataAndGraphDataBatch)
+    assert batches[0].origin == "web"
+    assert summary.total == 1
+    assert summary.errors == [
+        {"operation": "get_logs", "target": "broken", "error": "no such container"}
+    ]
+
+
+def test_fetch_data_reads_containers_concurrently(daemon, docker_source):
+    docker_source.conn.data = {
+        "address": "tcp://bounded:2375",
+        "max_concurrent_requests": 3,
+    }
+    lock = Lock()
+    active = {"now": 0, "max": 0}
+
+    def slow_logs():
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+
+    daemon.on_logs = slow_logs
+    for i in range(8):
+        daemon.add(f"c{i}", frame(1, "2024-01-01T00:00:01Z line\n"))
+
+    response = Fetcher.fetch_data(data_request(docker_source, limit=100), UTC_ZONE)
+
+    assert len(response.rows) == 8
+    assert active["max"] == 3
+
+
+def test_fetch_data_reports_failed_containers(daemon, docker_source):
+    daemon.add("web", frame(1, "2024-01-01T00:00:01Z hello\n"))
+    daemon.add("broken", b"", error=RuntimeError("no such container"))
+
+    response = Fetcher.fetch_data(data_request(docker_source), UTC_ZONE)
+
+    assert [row.data["message"] for row in response.rows] == ["hello"]
+    assert response.message == "Failed to read logs of broken (no such container)."
+
+
+def get_status(inventory, name):
+    for container in inventory.get_containers():
+        if container.name == name:
+            return container.status
+
+
+def test_inventory_follows_container_events(daemon):
+    daemon.add("web", b"", labels={"app": "web"})
+    inventory = get_inventory("unix:///var/run/docker.sock")
+    assert [c.name for c in inventory.get_containers()] == ["web"]
+    wait_for(daemon.subscribed.is_set)
+
+    daemon.emit("create", "job", team="ci")
+    wait_for(lambda: len(inventory.get_containers()) == 2)
+    job = next(c for c in inventory.get_containers() if c.name == "job")
+    assert (job.status, job.labels) == ("created", {"team": "ci"})
+
+    daemon.emit("die", "web", exitCode="1")
+    wait_for(lambda: get_status(inventory, "web") == "exited")
+    web = next(c for c in inventory.get_containers() if c.name == "web")
+    assert web.labels == {"app": "web"}
+
+    daemon.emit("destroy", "job")
+    wait_for(lambda: len(inventory.get_containers()) == 1)
+
+    assert len(daemon.listings()) == 1
+    events_call = next(call for call in daemon.calls if call[0] == "/events")
+    assert events_call[1]["since"] <= inventory.synced_at
+
+
+def test_inventory_without_events_caches_listing(daemon):
+    daemon.add("web", b"")
+    inventory = ContainerInventory("tcp://host:2375", watch_events=False)
+
+    inventory.get_containers()
+    inventory.get_containers()
+    assert len(daemon.listings()) == 1
+
+    inventory.synced_at -= 60
+    inventory.get_containers()
+    assert len(daemon.listings()) == 2
+    assert not daemon.subscribed.is_set()
+
+
+@pytest.fixture
+def daemons():
+    daemons = {}
+
+    def get_daemon(address):
+        if address not in daemons:
+            daemons[address] = FakeDaemon()
+        return daemons[address]
+
+    stop_inventories()
+    with patch(
+        "telescope.fetchers.docker.api.get_client", side_effect=get_daemon
+    ), patch("telescope.fetchers.docker.inventory.get_client", side_effect=get_daemon):
+        yield get_daemon
+        stop_inventories()
+
+
+def test_get_hosts():
+    hosts = get_hosts(
+        {
+            "address": "unix:///var/run/docker.sock",
+            "hosts": [
+                {"address": "tcp://a:2375", "label": "a", "timeout": 5},
+                {"address": "unix:///var/run/docker.sock", "label": "local"},
+                {"address": "tcp://b:2375"},
+            ],
+        }
+    )
+    assert [(h.address, h.label, h.timeout) for h in hosts] == [
+        ("unix:///var/run/docker.sock", "unix:///var/run/docker.sock", 60),
+        ("tcp://a:2375", "a", 5),
+        ("tcp://b:2375", "tcp://b:2375", 60),
+    ]
+
+
+def test_fetch_data_from_several_hosts(daemons, docker_source):
+    docker_source.conn.data = {
+        "address": "",
+        "hosts": [
+            {"address": "tcp://a:2375", "label": "a"},
+            {"address": "tcp://b:2375", "label": "b", "timeout": 5},
+        ],
+    }
+    daemons("tcp://a:2375").add(
+        "web",
+        frame(1, "2024-01-01T00:00:01Z a1\n") + frame(1, "2024-01-01T00:00:04Z a2\n"),
+    )
+    daemons("tcp://b:2375").add(
+        "web",
+        frame(1, "2024-01-01T00:00:02Z b1\n") + frame(1, "2024-01-01T00:00:03Z b2\n"),
+    )
+
+    response = Fetcher.fetch_data(data_request(docker_source, limit=3), UTC_ZONE)
+
+    assert [(row.data["host"], row.data["message"]) for row in response.rows] == [
+        ("a", "a2"),
+        ("b", "b2"),
+        ("b", "b1"),
+    ]
+    assert daemons("tcp://b:2375").log_calls()[0][2] == 5
+
+    request = DataAndGraphDataRequest(
+        source=docker_source,
+        query="",
+        raw_query="",
+        time_from=TIME_FROM,
+        time_to=TIME_TO,
+        limit=10,
+        group_by=[],
+        context_columns={},
+    )
+    *batches, summary = list(Fetcher.stream_data_and_graph(request, UTC_ZONE))
+    assert sorted(batch.origin for batch in batches) == ["a/web", "b/web"]
+    assert summary.total == 4
+
+
+def test_fetch_data_reports_failed_hosts(daemons, docker_source):
+    docker_source.conn.data = {
+        "address": "tcp://up:2375",
+        "hosts": [{"address": "tcp://down:2375", "label": "down"}],
+    }
+    daemons("tcp://up:2375").add("web", frame(1, "2024-01-01T00:00:01Z hello\n"))
+    daemons("tcp://down:2375").containers = None
+
+    response = Fetcher.fetch_data(data_request(docker_source), UTC_ZONE)
+
+    assert [row.data["message"] for row in response.rows] == ["hello"]
+    assert response.message.startswith("Failed to list containers of down (")
+
+
+def test_value_index_is_bounded():
+    index = ValueIndex()
+    for i in range(MAX_VALUES + 10):
+        index.add_containers(
+            [ContainerMeta(id=f"{i:064}", short_id=f"{i:012}", name=f"c{i}")]
+        )
+    names, incomplete = index.search("container_name", "", limit=MAX_VALUES + 10)
+    assert len(names) == MAX_VALUES
+    assert "c0" not in names and f"c{MAX_VALUES + 9}" in names
+    assert not incomplete
+
+    assert index.search("container_name", "c100", limit=3) == (
+        ["c100", "c1000", "c1001"],
+        True,
+    )
+
+
+def test_autocomplete_from_value_index(daemon, docker_source):
+    docker_source.conn.id = "test_autocomplete_from_value_index"
+    daemon.add(
+        "web",
+        frame(2, "2024-01-01T00:00:01Z boom\n"),
+        labels={"com.docker.compose.service": "web"},
+    )
+    daemon.add("db", b"", labels={"com.docker.compose.service": "db"})
+    Fetcher.fetch_data(
+        data_request(docker_source, context_columns={"container": ["web"]}), UTC_ZONE
+    )
+    calls = len(daemon.calls)
+
+    def autocomplete(column, value=""):
+        response = Fetcher.autocomplete(docker_source, column, 0, 1000, value)
+        return response.items
+
+    assert autocomplete("container_name") == ["db", "web"]
+    assert autocomplete("container_name", "e") == ["web"]
+    assert autocomplete("stream") == ["stderr"]
+    assert autocomplete("status", "run") == ["running"]
+    assert autocomplete("labels", "service") == ["com.docker.compose.service"]
+    assert autocomplete("labels.com.docker.compose.service", "d") == ["db"]
+    assert autocomplete("message") == []
+
+    # removed containers stay available, no calls to the daemon
+    daemon.containers.clear()
+    stop_inventories()
+    assert autocomplete("container_name") == ["db", "web"]
+    assert len(daemon.calls) == calls
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock
 from datetime import datetime
 
-from telescope.fetchers.graph_utils import generate_graph_from_rows
+from telescope.fetchers.graph_utils import GraphCounter, GroupNames
 from telescope.fetchers.models import Row
 from telescope.columns import ParsedColumn
 from telescope.constants import UTC_ZONE
@@ -33,6 +33,16 @@ def create_row(source, timestamp_ms, data_dict):
     )
 
 
+def count_rows(rows, time_from, time_to, group_by=None):
+    # the way aggregate_container_log counts matching entries
+    group_names = GroupNames(group_by)
+    counter = GraphCounter(time_from, time_to)
+    counter.add_many(
+        [row.time["unixtime"] for row in rows], [group_names(row.data) for row in rows]
+    )
+    return counter.result()
+
+
 def test_generate_graph_basic(mock_source):
     time_from = 1000000000000
     time_to = 1000000010000
@@ -43,7 +53,7 @@ def test_generate_graph_basic(mock_source):
         create_row(mock_source, 1000000003000, {"message": "log3"}),
     ]
 
-    timestamps, data, total = generate_graph_from_rows(rows, time_from, time_to, None)
+    timestamps, data, total = count_rows(rows, time_from, time_to, None)
 
     assert len(timestamps) >= 2
     assert timestamps[0] == time_from
@@ -84,9 +94,7 @@ def test_generate_graph_with_grouping(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 5
     assert "default" in data
@@ -117,9 +125,7 @@ def test_generate_graph_json_grouping(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 4
     assert "frontend" in data
@@ -152,9 +158,7 @@ def test_generate_graph_json_nested_grouping(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 2
     assert "frontend" in data
@@ -180,9 +184,7 @@ def test_generate_graph_missing_group_column(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 3
     assert "default" in data
@@ -200,7 +202,7 @@ def test_generate_graph_large_timespan(mock_source):
         timestamp = time_from + (i * 10 * 1000)
         rows.append(create_row(mock_source, timestamp, {"message": f"log{i}"}))
 
-    timestamps, data, total = generate_graph_from_rows(rows, time_from, time_to, None)
+    timestamps, data, total = count_rows(rows, time_from, time_to, None)
 
     assert total == 200
     assert "Rows" in data
@@ -218,7 +220,7 @@ def test_generate_graph_short_timespan(mock_source):
         create_row(mock_source, 1000000001200, {"message": "log3"}),
     ]
 
-    timestamps, data, total = generate_graph_from_rows(rows, time_from, time_to, None)
+    timestamps, data, total = count_rows(rows, time_from, time_to, None)
 
     assert total == 3
     assert sum(data["Rows"]) == 3
@@ -228,7 +230,7 @@ def test_generate_graph_empty_rows(mock_source):
     time_from = 1000000000000
     time_to = 1000000010000
 
-    timestamps, data, total = generate_graph_from_rows([], time_from, time_to, None)
+    timestamps, data, total = count_rows([], time_from, time_to, None)
 
     assert total == 0
     assert len(timestamps) == 2
@@ -256,9 +258,7 @@ def test_generate_graph_invalid_json_grouping(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 2
     assert "__none__" in data
@@ -278,7 +278,7 @@ def test_generate_graph_same_timestamp(mock_source):
         create_row(mock_source, same_time, {"message": "log3"}),
     ]
 
-    timestamps, data, total = generate_graph_from_rows(rows, time_from, time_to, None)
+    timestamps, data, total = count_rows(rows, time_from, time_to, None)
 
     assert total == 3
     assert sum(data["Rows"]) == 3
@@ -307,9 +307,7 @@ def test_generate_graph_grouping_with_multiple_timestamps(mock_source):
         modifiers=[],
     )
 
-    timestamps, data, total = generate_graph_from_rows(
-        rows, time_from, time_to, group_by
-    )
+    timestamps, data, total = count_rows(rows, time_from, time_to, group_by)
 
     assert total == 5
     assert "default" in data
@@ -318,3 +316,52 @@ def test_generate_graph_grouping_with_multiple_timestamps(mock_source):
     assert len(data["kube-system"]) == len(timestamps)
     assert sum(data["default"]) == 3
     assert sum(data["kube-system"]) == 2
+
+
+def test_graph_counter_merge():
+    time_from = 1000000000000
+    time_to = 1000000010000
+    first = GraphCounter(time_from, time_to)
+    first.add(time_from + 1500, "a")
+    second = GraphCounter(time_from, time_to)
+    second.add(time_from + 1200, "a")
+    second.add(time_from + 5000, "b")
+
+    first.merge(second)
+    timestamps, data, total = first.result()
+
+    assert total == 3
+    assert timestamps == [time_from, time_from + 1000, time_from + 5000, time_to]
+    assert data == {"a": [0, 2, 0, 0], "b": [0, 0, 1, 0]}
+
+
+def test_group_names_are_computed_once_per_value(monkeypatch):
+    from telescope.fetchers import graph_utils
+
+    calls = []
+    get_group_name = graph_utils.get_group_name
+
+    def counting_get_group_name(data, group_by):
+        calls.append(data)
+        return get_group_name(data, group_by)
+
+    monkeypatch.setattr(graph_utils, "get_group_name", counting_get_group_name)
+    group_names = graph_utils.GroupNames(
+        ParsedColumn(
+            name="labels.app",
+            root_name="labels",
+            type="json",
+            jsonstring=True,
+            display_name="labels.app",
+            modifiers=[],
+        )
+    )
+    names = [
+        group_names({"labels": '{"app": "web"}'}),
+        group_names({"labels": '{"app": "web"}'}),
+        group_names({"labels": {"app": "db"}}),
+        group_names({}),
+    ]
+
+    assert names == ["web", "web", "db", "__none__"]
+    assert len(calls) == 3
@@ -0,0 +1,185 @@
+import time
+
+import pytest
+
+from telescope.fetchers.health import (
+    CLOSED,
+    OPEN,
+    CircuitOpenError,
+    HealthRegistry,
+    is_unavailable_error,
+)
+from telescope.fetchers.scheduler import FetchScheduler, FetchTask
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def _fail():
+    raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def registry():
+    return HealthRegistry(
+        failure_threshold=3,
+        error_rate_threshold=0.5,
+        window=10,
+        probe_interval=0.05,
+    )
+
+
+def test_is_unavailable_error():
+    assert is_unavailable_error(ConnectionError("refused"))
+    assert is_unavailable_error(TimeoutError())
+    assert is_unavailable_error(ApiError(503))
+    assert not is_unavailable_error(ApiError(404))
+    assert not is_unavailable_error(ValueError("bad query"))
+
+
+def test_circuit_opens_after_consecutive_failures(registry):
+    target = ("kubernetes", "hash", "ctx1")
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            registry.call(target, _fail)
+
+    assert registry.state(target)["state"] == OPEN
+
+    called = []
+    with pytest.raises(CircuitOpenError) as exc:
+        registry.call(target, lambda: called.append(1))
+    assert not called
+    assert "ctx1 is unavailable" in str(exc.value)
+    assert "connection refused" in str(exc.value)
+
+
+def test_rejected_calls_do_not_open_circuit(registry):
+    target = ("docker", "tcp://host:2375")
+
+    def not_found():
+        raise ApiError(404)
+
+    for _ in range(5):
+        with pytest.raises(ApiError):
+            registry.call(target, not_found)
+
+    state = registry.state(target)
+    assert state["state"] == CLOSED
+    assert state["failures"] == 0
+    assert state["calls"] == 5
+
+
+def test_circuit_opens_on_error_rate(registry):
+    target = ("clickhouse", "host:8123")
+    for i in range(10):
+        if i % 2 == 0:
+            registry.call(target, lambda: None)
+        else:
+            with pytest.raises(ConnectionError):
+                registry.call(target, _fail)
+
+    state = registry.state(target)
+    assert state["state"] == OPEN
+    assert state["error_rate"] == 0.5
+
+
+def test_background_probe_closes_circuit(registry):
+    target = ("kubernetes", "hash", "ctx1")
+    healthy = {"value": False}
+
+    def probe():
+        if not healthy["value"]:
+            _fail()
+
+    registry.register_probe(target, probe)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            registry.call(target, _fail)
+    assert not registry.allow(target)
+
+    time.sleep(0.15)
+    assert not registry.allow(target)
+    assert registry.state(target)["probed_at"] is not None
+
+    healthy["value"] = True
+    deadline = time.monotonic() + 2
+    while not registry.allow(target) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert registry.state(target)["state"] == CLOSED
+    assert registry.call(target, lambda: "ok") == "ok"
+
+
+def test_latest_probe_is_used(registry):
+    target = ("clickhouse", "host:8123")
+    probes = []
+    registry.register_probe(target, lambda: probes.append("old"))
+    registry.register_probe(target, lambda: probes.append("new"))
+
+    registry.run_probe(target)
+    assert probes == ["new"]
+
+
+def test_least_recently_used_targets_are_dropped():
+    registry = HealthRegistry(
+        failure_threshold=1,
+        error_rate_threshold=0.5,
+        window=10,
+        probe_interval=60,
+        max_targets=2,
+    )
+    for target in ["a", "b"]:
+        with pytest.raises(ConnectionError):
+            registry.call(target, _fail)
+    registry.record("a", 0.1)
+    registry.record("c", 0.1)
+
+    assert registry.state("a")["calls"] == 2
+    assert registry.state("b")["calls"] == 0
+    assert registry.allow("b")
+    assert registry.state("c")["calls"] == 1
+
+
+def test_run_probe_closes_circuit_and_reraises_rejections(registry):
+    target = ("clickhouse", "host:8123")
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            registry.call(target, _fail)
+
+    def missing_table():
+        raise ApiError(404)
+
+    with pytest.raises(ApiError):
+        registry.run_probe(target, missing_table)
+    assert registry.allow(target)
+
+
+def test_scheduler_skips_targets_with_open_circuit(registry):
+    scheduler = FetchScheduler(max_workers=4, max_per_request=4)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            registry.call("dead", _fail)
+
+    called = []
+    tasks = [
+        FetchTask(key=("dead", i), target="dead", func=lambda: called.append(1))
+        for i in range(5)
+    ] + [FetchTask(key="alive", target="alive", func=lambda: "ok")]
+    results, errors, stats = scheduler.run(tasks, health=registry)
+
+    assert results == {"alive": "ok"}
+    assert len(errors) == 5
+    assert all(isinstance(err, CircuitOpenError) for err in errors.values())
+    assert not called
+    assert stats.rejected == 5
+
+
+def test_scheduler_records_task_outcomes(registry):
+    scheduler = FetchScheduler(max_workers=4, max_per_request=4)
+    tasks = [FetchTask(key=i, target="flaky", func=_fail) for i in range(3)]
+    _, errors, _ = scheduler.run(tasks, health=registry)
+
+    assert len(errors) == 3
+    assert registry.state("flaky")["state"] == OPEN
@@ -37,6 +37,28 @@ def kubernetes_source():
     return mock_source
 
 
+def mock_iter_logs(entries, errors=()):
+    """
+    Emulates KubeHelper.iter_logs: entries are grouped per container and
+    rendered back into `timestamps=True` log output for the raw consumer.
+    """
+
+    def iter_logs(since_seconds, time_from, time_to, raw_consumer=None, **kwargs):
+        containers = {}
+        for entry in entries:
+            key = (entry.context, entry.namespace, entry.pod, entry.container)
+            containers.setdefault(key, []).append(entry)
+        for key, container_entries in containers.items():
+            raw_logs = "\n".join(
+                f"{e.timestamp.isoformat()} {e.message}" for e in container_entries
+            )
+            yield key, raw_consumer(raw_logs, container_entries[0].meta), None
+        for key, err in errors:
+            yield key, None, err
+
+    return iter_logs
+
+
 def test_validate_query_valid():
     source = MagicMock()
     valid, error = Fetcher.validate_query(source, 'message ~ "error"')
@@ -284,7 +306,7 @@ def test_fetch_data_simple(mock_config_helper, mock_kube_helper, kubernetes_sour
     mock_helper.pods = {
         "context1": {"default": {"pod1": {"containers": ["container1"]}}}
     }
-    mock_helper.get_logs.return_value = (log_entries, [])
+    mock_helper.iter_logs.side_effect = mock_iter_logs(log_entries)
     mock_helper.validate.return_value = None
     mock_helper.errors = []
     mock_kube_helper.return_value = mock_helper
@@ -308,6 +330,126 @@ def test_fetch_data_simple(mock_config_helper, mock_kube_helper, kubernetes_sour
     assert response.rows[0].data["pod"] == "pod1"
 
 
+@patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
+@patch("telescope.fetchers.kubernetes.fetcher.KubeConfigHelper")
+def test_fetch_data_reports_deadline(
+    mock_config_helper, mock_kube_helper, kubernetes_source
+):
+    from telescope.fetchers.scheduler import DeadlineExceededError
+
+    log_entries = [
+        LogEntry(
+            context="context1",
+            namespace="default",
+            pod="pod1",
+            container="container1",
+            timestamp=datetime(2025, 1, 1, 0, 0, 1, tzinfo=UTC_ZONE),
+            message="Log line 1",
+        ),
+    ]
+
+    mock_helper = MagicMock()
+    mock_helper.contexts = ["context1"]
+    mock_helper.namespaces = {"context1": ["default"]}
+    mock_helper.pods = {
+        "context1": {"default": {"pod1": {"containers": ["container1", "slow"]}}}
+    }
+    mock_helper.iter_logs.side_effect = mock_iter_logs(
+        log_entries,
+        errors=[
+            (
+                ("context1", "default", "pod1", "slow"),
+                DeadlineExceededError("deadline exceeded"),
+            )
+        ],
+    )
+    mock_helper.errors = []
+    mock_helper.store_error.side_effect = lambda operation, sev, data: (
+        mock_helper.errors.append({"operation": operation, "sev": sev, "data": data})
+    )
+    mock_kube_helper.return_value = mock_helper
+
+    request = DataRequest(
+        source=kubernetes_source,
+        query="",
+        raw_query="",
+        time_from=1000000000000,
+        time_to=2000000000000,
+        limit=10,
+        context_columns={},
+        deadline=12345.0,
+    )
+    response = Fetcher.fetch_data(request, tz=UTC_ZONE)
+
+    assert [row.data["message"] for row in response.rows] == ["Log line 1"]
+    assert "deadline exceeded" in response.message
+    assert mock_kube_helper.call_args.kwargs["deadline"] == 12345.0
+
+
+@patch("telescope.fetchers.kubernetes.fetcher.get_parse_pool")
+@patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
+@patch("telescope.fetchers.kubernetes.fetcher.KubeConfigHelper")
+def test_parse_timeout_does_not_mark_context_unhealthy(
+    mock_config_helper, mock_kube_helper, mock_get_parse_pool, kubernetes_source
+):
+    from telescope.fetchers.health import CLOSED, HealthRegistry
+    from telescope.fetchers.scheduler import FetchScheduler, FetchTask
+
+    registry = HealthRegistry(
+        failure_threshold=1, error_rate_threshold=0.5, window=10, probe_interval=60
+    )
+    scheduler = FetchScheduler(max_workers=2, max_per_request=2)
+    entry = LogEntry(
+        context="context1",
+        namespace="default",
+        pod="pod1",
+        container="container1",
+        timestamp=datetime(2025, 1, 1, 0, 0, 1, tzinfo=UTC_ZONE),
+        message="Log line 1",
+    )
+
+    def iter_logs(since_seconds, time_from, time_to, raw_consumer=None, **kwargs):
+        raw_logs = f"{entry.timestamp.isoformat()} {entry.message}"
+        task = FetchTask(
+            key=("context1", "default", "pod1", "container1"),
+            target="context1",
+            func=lambda: raw_consumer(raw_logs, entry.meta),
+        )
+        for task, result, err in scheduler.iter_run([task], health=registry):
+            yield task.key, result, err
+
+    mock_get_parse_pool.return_value.run.side_effect = TimeoutError
+    mock_helper = MagicMock()
+    mock_helper.contexts = ["context1"]
+    mock_helper.namespaces = {"context1": ["default"]}
+    mock_helper.pods = {
+        "context1": {"default": {"pod1": {"containers": ["container1"]}}}
+    }
+    mock_helper.iter_logs.side_effect = iter_logs
+    mock_helper.errors = []
+    mock_helper.store_error.side_effect = lambda operation, sev, data: (
+        mock_helper.errors.append({"operation": operation, "sev": sev, "data": data})
+    )
+    mock_kube_helper.return_value = mock_helper
+
+    request = DataRequest(
+        source=kubernetes_source,
+        query="",
+        raw_query="",
+        time_from=1000000000000,
+        time_to=2000000000000,
+        limit=10,
+        context_columns={},
+    )
+    response = Fetcher.fetch_data(request, tz=UTC_ZONE)
+
+    assert len(response.rows) == 0
+    assert "deadline exceeded" in response.message
+    state = registry.state("context1")
+    assert state["state"] == CLOSED
+    assert state["failures"] == 0
+
+
 @patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
 @patch("telescope.fetchers.kubernetes.fetcher.KubeConfigHelper")
 def test_fetch_data_with_query(mock_config_helper, mock_kube_helper, kubernetes_source):
@@ -347,7 +489,7 @@ def test_fetch_data_with_query(mock_config_helper, mock_kube_helper, kubernetes_
     mock_helper.pods = {
         "context1": {"default": {"pod1": {"containers": ["container1"]}}}
     }
-    mock_helper.get_logs.return_value = (log_entries, [])
+    mock_helper.iter_logs.side_effect = mock_iter_logs(log_entries)
     mock_helper.validate.return_value = None
     mock_helper.errors = []
     mock_kube_helper.return_value = mock_helper
@@ -403,6 +545,60 @@ def test_autocomplete(kubernetes_source):
     assert response.incomplete is False
 
 
+PODS = {
+    "ctx1": {
+        "default": {
+            "api-7d9f": {
+                "containers": ["api", "sidecar"],
+                "node": "node-1",
+                "status": "Running",
+                "labels": {"app": "api", "tier": "backend"},
+                "annotations": {"owner": "team-a"},
+            },
+            "web-5c2a": {
+                "containers": ["web"],
+                "node": "node-2",
+                "status": "Pending",
+                "labels": {"app": "web"},
+                "annotations": {},
+            },
+        }
+    }
+}
+
+
+def test_inventory_index_search():
+    from telescope.fetchers.kubernetes.inventory import InventoryIndex
+
+    index = InventoryIndex(PODS)
+
+    assert index.search("pod", "") == (["api-7d9f", "web-5c2a"], False)
+    assert index.search("container", "si") == (["sidecar"], False)
+    # prefix matches first, then substring matches
+    assert index.search("container", "a") == (["api", "sidecar"], False)
+    assert index.search("node", "node", limit=1) == (["node-1"], True)
+    assert index.search("labels", "") == (["app", "tier"], False)
+    assert index.search("labels.app", "") == (["api", "web"], False)
+    assert index.search("annotations.owner", "team") == (["team-a"], False)
+    assert index.search("labels.missing", "") == ([], False)
+
+
+@pytest.mark.django_db
+@patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
+def test_autocomplete_from_inventory(mock_helper_class, kubernetes_source):
+    mock_helper = MagicMock()
+    mock_helper.pods = PODS
+    mock_helper.pods_cache_key = "test_autocomplete_from_inventory"
+    mock_helper_class.return_value = mock_helper
+
+    response = Fetcher.autocomplete(kubernetes_source, "status", 0, 1000, "Run")
+    assert response.items == ["Running"]
+    assert response.incomplete is False
+
+    response = Fetcher.autocomplete(kubernetes_source, "labels.tier", 0, 1000, "")
+    assert response.items == ["backend"]
+
+
 @pytest.mark.django_db
 @patch("telescope.fetchers.kubernetes.api.KubeClientHelper")
 def test_kubehelper_filters_by_selected_contexts(mock_client_helper):
@@ -597,3 +793,326 @@ def test_kubehelper_cache_isolation(mock_client_helper):
 
     cached_value = cache.get(helper1.pods_cache_key)
     assert cached_value == {"ctx1": {"ns1": {"pod1": {}}}}
+
+
+def _make_list_page(names, continue_token=None):
+    page = MagicMock()
+    items = []
+    for name in names:
+        item = MagicMock()
+        item.metadata.name = name
+        items.append(item)
+    page.items = items
+    page.metadata._continue = continue_token
+    return page
+
+
+@patch("telescope.fetchers.kubernetes.api.KubeClientHelper")
+def test_kubehelper_list_paging_follows_continue(mock_client_helper):
+    from telescope.fetchers.kubernetes.api import KubeHelper
+
+    mock_config = MagicMock()
+    mock_config.kubeconfig_hash = "test_hash"
+
+    mock_client = MagicMock()
+    mock_client.core.list_namespace.side_effect = [
+        _make_list_page(["ns1", "ns2"], continue_token="token-1"),
+        _make_list_page(["ns3"], continue_token=None),
+    ]
+
+    helper = KubeHelper(
+        conn_id=1,
+        source_id=1,
+        max_concurrent_requests=5,
+        config=mock_config,
+        list_page_size=2,
+        list_from_cache=True,
+    )
+
+    result = helper.get_namespaces_from_client(mock_client)
+
+    assert result == ["ns1", "ns2", "ns3"]
+    first_call, second_call = mock_client.core.list_namespace.call_args_list
+    assert first_call[1]["limit"] == 2
+    assert first_call[1]["resource_version"] == "0"
+    assert "_continue" not in first_call[1]
+    assert second_call[1]["limit"] == 2
+    assert second_call[1]["_continue"] == "token-1"
+    assert "resource_version" not in second_call[1]
+
+
+@patch("telescope.fetchers.kubernetes.api.KubeClientHelper")
+def test_kubehelper_list_without_paging(mock_client_helper):
+    from telescope.fetchers.kubernetes.api import KubeHelper
+
+    mock_config = MagicMock()
+    mock_config.kubeconfig_hash = "test_hash"
+
+    mock_client = MagicMock()
+    mock_client.core.list_namespace.return_value = _make_list_page(
+        ["ns1"], continue_token="ignored"
+    )
+
+    helper = KubeHelper(
+        conn_id=1,
+        source_id=1,
+        max_concurrent_requests=5,
+        config=mock_config,
+    )
+
+    assert helper.get_namespaces_from_client(mock_client) == ["ns1"]
+    assert mock_client.core.list_namespace.call_count == 1
+    call_kwargs = mock_client.core.list_namespace.call_args[1]
+    assert "limit" not in call_kwargs
+    assert "resource_version" not in call_kwargs
+
+
+KUBECONFIG_DATA = {
+    "apiVersion": "v1",
+    "kind": "Config",
+    "current-context": "ctx1",
+    "clusters": [
+        {"name": "c1", "cluster": {"server": "https://c1.example.com:6443"}},
+        {"name": "c2", "cluster": {"server": "https://c2.example.com:6443"}},
+    ],
+    "users": [{"name": "u1", "user": {"token": "secret-token"}}],
+    "contexts": [
+        {"name": "ctx1", "context": {"cluster": "c1", "user": "u1"}},
+        {"name": "ctx2", "context": {"cluster": "c2", "user": "u1"}},
+    ],
+}
+
+
+def test_kubeclienthelper_builds_isolated_configuration():
+    import yaml
+    from kubernetes import client as kubernetes_client
+    from telescope.fetchers.kubernetes.api import KubeClientHelper, KubeConfigHelper
+
+    default_host = kubernetes_client.Configuration.get_default_copy().host
+    config = KubeConfigHelper(
+        kubeconfig=yaml.safe_dump(KUBECONFIG_DATA),
+        kubeconfig_hash="isolated-config-hash",
+    )
+    helper = KubeClientHelper(config, pool_size=17)
+
+    client = helper.get_client_for_context("ctx2")
+
+    cfg = client.core.api_client.configuration
+    assert cfg.host == "https://c2.example.com:6443"
+    assert cfg.connection_pool_maxsize == 17
+    assert helper.get_client_for_context("ctx2") is client
+    assert kubernetes_client.Configuration.get_default_copy().host == default_host
+
+
+def test_kubeclienthelper_slow_context_does_not_block_others():
+    import threading
+    from telescope.fetchers.kubernetes.api import KubeClientHelper
+
+    config = MagicMock()
+    config.kubeconfig_hash = "per-key-lock-hash"
+    helper = KubeClientHelper(config, pool_size=1)
+
+    slow_started = threading.Event()
+    release_slow = threading.Event()
+
+    def create_client(context_name):
+        if context_name == "slow":
+            slow_started.set()
+            release_slow.wait(5)
+        return MagicMock(name=context_name)
+
+    with patch.object(helper, "_create_client", side_effect=create_client) as mock:
+        slow_thread = threading.Thread(
+            target=helper.get_client_for_context, args=("slow",)
+        )
+        slow_thread.start()
+        assert slow_started.wait(5)
+
+        fast_client = helper.get_client_for_context("fast")
+        assert fast_client is not None
+        assert slow_thread.is_alive()
+
+        release_slow.set()
+        slow_thread.join(5)
+        assert mock.call_count == 2
+
+
+@pytest.mark.django_db
+@patch("telescope.fetchers.kubernetes.api.KubeClientHelper")
+def test_kubehelper_applies_query_constraints(mock_client_helper):
+    from flyql.core.parser import parse
+    from telescope.fetchers.kubernetes.api import KubeHelper
+    from telescope.fetchers.kubernetes.pushdown import extract_constraints
+
+    mock_config = MagicMock()
+    mock_config.list_contexts.return_value = [
+        {"name": "ctx1", "cluster": "c1", "user": "u1", "namespace": "default"},
+        {"name": "ctx2", "cluster": "c2", "user": "u2", "namespace": "default"},
+    ]
+    mock_config.kubeconfig_hash = "pushdown_hash"
+
+    mock_client = MagicMock()
+    mock_client.core.list_namespace.return_value = _make_list_page(
+        ["payments", "billing"]
+    )
+    mock_client.core.list_namespaced_pod.return_value.items = []
+    mock_client_helper.return_value.get_client_for_context.return_value = mock_client
+
+    query = "context='ctx1' and namespace='payments' and labels.app='checkout'"
+    helper = KubeHelper(
+        conn_id=1,
+        source_id=1,
+        max_concurrent_requests=5,
+        config=mock_config,
+        pods_label_selector="tier=web",
+        selected_contexts=["ctx1", "ctx2"],
+        query_constraints=extract_constraints(parse(query).root),
+    )
+    helper.validate()
+
+    assert helper.contexts == {"ctx1"}
+    helper.get_pods()
+
+    assert mock_client.core.list_namespaced_pod.call_count == 1
+    call_kwargs = mock_client.core.list_namespaced_pod.call_args[1]
+    assert call_kwargs["namespace"] == "payments"
+    assert call_kwargs["label_selector"] == "tier=web,app=checkout"
+
+
+@patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
+@patch("telescope.fetchers.kubernetes.fetcher.KubeConfigHelper")
+def test_stream_data_and_graph(mock_config_helper, mock_kube_helper, kubernetes_source):
+    from telescope.fetchers.request import DataAndGraphDataRequest
+    from telescope.fetchers.response import (
+        DataAndGraphDataBatch,
+        DataAndGraphDataSummary,
+    )
+
+    def entry(container, second):
+        return LogEntry(
+            context="context1",
+            namespace="default",
+            pod="pod1",
+            container=container,
+            timestamp=datetime(2025, 1, 1, 0, 0, second, tzinfo=UTC_ZONE),
+            message=f"{container} line {second}",
+            node="node1",
+            labels={},
+            annotations={},
+            status="Running",
+        )
+
+    mock_helper = MagicMock()
+    mock_helper.contexts = ["context1"]
+    mock_helper.namespaces = {"context1": ["default"]}
+    mock_helper.pods = {
+        "context1": {"default": {"pod1": {"containers": ["c1", "c2", "c3"]}}}
+    }
+    mock_helper.iter_logs.side_effect = mock_iter_logs(
+        [entry("c1", 1), entry("c1", 2), entry("c3", 3)],
+        errors=[(("context1", "default", "pod1", "c2"), TimeoutError("timed out"))],
+    )
+    mock_helper.errors = []
+    mock_kube_helper.return_value = mock_helper
+
+    request = DataAndGraphDataRequest(
+        source=kubernetes_source,
+        query="",
+        raw_query="",
+        time_from=int(datetime(2025, 1, 1, tzinfo=UTC_ZONE).timestamp() * 1000),
+        time_to=int(datetime(2025, 1, 1, 0, 0, 10, tzinfo=UTC_ZONE).timestamp() * 1000),
+        limit=2,
+        group_by=[],
+        context_columns={},
+    )
+    items = list(Fetcher.stream_data_and_graph(request, tz=UTC_ZONE))
+
+    batches = [i for i in items if isinstance(i, DataAndGraphDataBatch)]
+    assert [b.origin for b in batches] == [
+        "context1/default/pod1/c1",
+        "context1/default/pod1/c3",
+    ]
+    assert [r.data["message"] for r in batches[0].rows] == ["c1 line 2", "c1 line 1"]
+    assert sum(batches[0].graph_data["Rows"]) == 2
+
+    summary = items[-1]
+    assert isinstance(summary, DataAndGraphDataSummary)
+    assert summary.total == 3
+    assert summary.error is None
+    assert "2 out of 3" in summary.message
+    mock_helper.store_error.assert_called_once()
+
+
+def test_log_entries_share_container_meta():
+    from telescope.fetchers.kubernetes.api import ContainerMeta
+
+    meta = ContainerMeta(
+        context="ctx", namespace="ns", pod="pod", container="c", labels={"a": "b"}
+    )
+    first = LogEntry(
+        timestamp=datetime(2025, 1, 1, tzinfo=UTC_ZONE), message="1", meta=meta
+    )
+    second = LogEntry(
+        timestamp=datetime(2025, 1, 2, tzinfo=UTC_ZONE), message="2", meta=meta
+    )
+
+    assert first.labels is second.labels
+    assert not hasattr(first, "__dict__")
+    assert second.as_dict() == {
+        "time": datetime(2025, 1, 2, tzinfo=UTC_ZONE),
+        "context": "ctx",
+        "namespace": "ns",
+        "pod": "pod",
+        "container": "c",
+        "node": "",
+        "labels": {"a": "b"},
+        "annotations": None,
+        "message": "2",
+        "status": "",
+    }
+
+
+@patch("telescope.fetchers.kubernetes.fetcher.KubeHelper")
+@patch("telescope.fetchers.kubernetes.fetcher.KubeConfigHelper")
+def test_fetch_graph_data_counts_per_container(
+    mock_config_helper, mock_kube_helper, kubernetes_source
+):
+    def entry(container, second):
+        return LogEntry(
+            context="context1",
+            namespace="default",
+            pod="pod1",
+            container=container,
+            timestamp=datetime(2025, 1, 1, 0, 0, second, tzinfo=UTC_ZONE),
+            message="line",
+            node="node1",
+            labels={},
+            annotations={},
+            status="Running",
+        )
+
+    mock_helper = MagicMock()
+    mock_helper.contexts = ["context1"]
+    mock_helper.namespaces = {"context1": ["default"]}
+    mock_helper.pods = {"context1": {"default": {"pod1": {"containers": ["c1", "c2"]}}}}
+    mock_helper.iter_logs.side_effect = mock_iter_logs(
+        [entry("c1", 1), entry("c1", 1), entry("c2", 3)]
+    )
+    mock_kube_helper.return_value = mock_helper
+
+    time_from = int(datetime(2025, 1, 1, tzinfo=UTC_ZONE).timestamp() * 1000)
+    request = GraphDataRequest(
+        source=kubernetes_source,
+        query="",
+        raw_query="",
+        time_from=time_from,
+        time_to=time_from + 10000,
+        group_by=[],
+        context_columns={},
+    )
+    response = Fetcher.fetch_graph_data(request)
+
+    assert response.total == 3
+    counts = dict(zip(response.timestamps, response.data["Rows"]))
+    assert counts[time_from + 1000] == 2
+    assert counts[time_from + 3000] == 1
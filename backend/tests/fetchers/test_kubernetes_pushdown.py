@@ -0,0 +1,61 @@
+from flyql.core.parser import parse
+
+from telescope.fetchers.kubernetes.pushdown import extract_constraints
+
+
+def constraints(query):
+    return extract_constraints(parse(query).root)
+
+
+def test_extract_conjunction():
+    result = constraints(
+        "namespace='payments' and container='api' and labels.app='checkout'"
+    )
+
+    assert result.column("namespace").allowed == {"payments"}
+    assert result.column("container").allowed == {"api"}
+    assert result.label_selector == "app=checkout"
+    assert result.field_selector == ""
+
+
+def test_extract_and_intersects_or_unions():
+    result = constraints(
+        "(namespace='a' or namespace='b') and (namespace='b' or namespace='c')"
+    )
+    assert result.column("namespace").allowed == {"b"}
+
+    result = constraints("namespace='a' or pod='p1'")
+    assert not result
+
+
+def test_extract_exclusions_and_field_selector():
+    result = constraints("pod='web-1' and node!='n1' and status='Running'")
+
+    assert result.field_selector == (
+        "metadata.name=web-1,spec.nodeName!=n1,status.phase=Running"
+    )
+    assert result.matches_pod("web-1", "n2", "Running")
+    assert not result.matches_pod("web-1", "n1", "Running")
+
+
+def test_field_selector_skips_values_it_cannot_express():
+    result = constraints("pod='a,b' and node!='x y' and status='Running'")
+
+    assert result.field_selector == "status.phase=Running"
+    assert result.matches_pod("a,b", "n1", "Running")
+    assert not result.matches_pod("web-1", "n1", "Running")
+    assert not result.matches_pod("a,b", "x y", "Running")
+
+
+def test_extract_skips_unsafe_expressions():
+    assert not constraints("not namespace='a'")
+    assert not constraints("namespace~'pay.*'")
+    assert not constraints("message='error' or namespace='a'")
+    assert not constraints("labels.app='not a label value'")
+
+
+def test_cache_key_depends_on_constraints():
+    assert constraints("message='x'").cache_key == ""
+    assert (
+        constraints("namespace='a'").cache_key != constraints("namespace='b'").cache_key
+    )
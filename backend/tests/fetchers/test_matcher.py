@@ -0,0 +1,197 @@
+import itertools
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from flyql.core.exceptions import FlyqlError
+from flyql.core.parser import ParserError, parse
+from flyql.matcher.evaluator import Evaluator
+from flyql.matcher.record import Record
+
+from telescope.fetchers.matcher import compile_predicate, compile_query
+
+NOW = datetime.now(timezone.utc)
+
+RECORDS = [
+    {},
+    {"message": "GET /health 200", "level": "info", "status": 200},
+    {"message": "failed to connect", "level": "ERROR", "status": 500},
+    {"message": "", "level": None, "status": 0, "flag": False},
+    {"message": "retry 1", "status": 200.0, "flag": True, "level": "warn"},
+    {"message": 42, "status": "200", "flag": 1},
+    {"labels": {"app": "web", "tier": "1", "com.docker.compose.service": "db"}},
+    {"labels": {"app": "worker", "empty": ""}, "tags": ["a", "b", 1, True]},
+    {"labels": '{"app": "web", "nested": {"list": [1, 2, {"x": "y"}]}}'},
+    {"labels": "not json", "tags": []},
+    {"labels": {"nested": {"list": [0, "two", {"x": None}]}}, "tags": ("a",)},
+    {"time": NOW, "date": NOW.date(), "created": "2024-01-01T00:00:00Z"},
+    {
+        "time": NOW - timedelta(days=2),
+        "date": date(2024, 1, 1),
+        "created": 1704067200000,
+    },
+    {"time": datetime(2024, 1, 1, 12, 0), "date": "2024-01-01", "created": None},
+    {"status": 500, "other": 500, "level": "info", "ref": "info"},
+    {"status": 404, "other": "404", "level": "warn", "ref": "error"},
+]
+
+KEYS = [
+    "message",
+    "level",
+    "status",
+    "flag",
+    "missing",
+    "labels",
+    "labels.app",
+    "labels.tier",
+    "labels.nested.list.1",
+    "labels.nested.list.2.x",
+    "tags",
+    "time",
+    "date",
+    "created",
+    "level|upper",
+    "message|len",
+]
+
+VALUES = [
+    "200",
+    "500.0",
+    '"200"',
+    "info",
+    '"ERROR"',
+    "true",
+    "false",
+    "null",
+    '""',
+    "web",
+    "1",
+    "-1",
+    '"2024-01-01"',
+    '"2024-01-01T00:00:00Z"',
+    "1704067200000",
+    "ago(1d)",
+    "now()",
+    "today()",
+    "other",
+    "ref",
+]
+
+OPERATORS = ["=", "!=", ">", "<", ">=", "<=", " has ", " not has "]
+PATTERN_OPERATORS = ["~", "!~", " like ", " not like ", " ilike ", " not ilike "]
+PATTERNS = ['"^GET"', '"fail|warn"', '"%"', '"w_b"', '"["']
+LISTS = [
+    "[200, 404]",
+    '["info", "warn"]',
+    "[true, 1]",
+    "[null]",
+    "[]",
+    '["a", other]',
+    '["2024-01-01", 1704067200000]',
+]
+
+COMPOUND = [
+    "status=200 and level=info",
+    "status=500 or not level",
+    'not (status>=400 and message~"fail")',
+    "labels.app=web or (tags has a and not flag)",
+    "level in [info, warn] and status not in [500]",
+    "(status=200 or status=500) and not (level=info or message=42)",
+    "level|lower=error or level|upper=INFO",
+    'time>ago(1d) and date>="2024-01-01"',
+    'created>"2023-12-31" or created<=1704067200000',
+    "status=other and level!=ref",
+    "labels.com.docker.compose.service=db",
+    "message",
+    "not message",
+    "flag or missing",
+]
+
+
+# every key set, for query errors that are only raised on non-null values
+PROBE = {
+    **{key.split("|")[0]: "probe" for key in KEYS if "." not in key},
+    "labels": {
+        "app": "probe",
+        "tier": "probe",
+        "nested": {"list": ["probe", "probe", {"x": "probe"}]},
+    },
+}
+
+
+def generated_queries():
+    for key, op, value in itertools.product(KEYS, OPERATORS, VALUES):
+        yield f"{key}{op}{value}"
+    for key, op, pattern in itertools.product(KEYS, PATTERN_OPERATORS, PATTERNS):
+        yield f"{key}{op}{pattern}"
+    for key, items in itertools.product(KEYS, LISTS):
+        yield f"{key} in {items}"
+        yield f"{key} not in {items}"
+    for key in KEYS:
+        yield key
+        yield f"not {key}"
+    yield from COMPOUND
+
+
+def evaluate_all(root):
+    evaluator = Evaluator()
+    results = []
+    for record in RECORDS:
+        try:
+            results.append(evaluator.evaluate(root, Record(data=record)))
+        except FlyqlError:
+            results.append(FlyqlError)
+    return results
+
+
+def compiled_all(root):
+    predicate = compile_predicate(root)
+    results = []
+    for record in RECORDS:
+        try:
+            results.append(predicate(record))
+        except FlyqlError:
+            results.append(FlyqlError)
+    return results
+
+
+def test_compiled_predicates_match_evaluator():
+    checked = 0
+    for query in generated_queries():
+        try:
+            root = parse(query).root
+        except (ParserError, FlyqlError, ValueError):
+            continue
+        expected = evaluate_all(root)
+        try:
+            actual = compiled_all(root)
+        except FlyqlError:
+            # query errors are raised when compiling, the evaluator raises
+            # them when matching (negations skip nulls before failing)
+            with pytest.raises(FlyqlError):
+                Evaluator().evaluate(root, Record(data=PROBE))
+            continue
+        assert actual == expected, query
+        checked += 1
+    assert checked > 1000
+
+
+def test_compiled_predicate_returns_booleans():
+    predicate = compile_query("message has fail or tags has a")
+    assert [predicate(record) for record in RECORDS[1:3]] == [False, True]
+    predicate = compile_query("labels.app")
+    assert predicate(RECORDS[6]) is True
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["status=$code", "status in [1, $code]", "level|missing=1"],
+)
+def test_query_errors_are_raised_when_compiling(query):
+    with pytest.raises(FlyqlError):
+        compile_query(query)
+
+
+def test_time_functions_are_evaluated_when_matching():
+    predicate = compile_query("time>ago(1h)")
+    assert predicate({"time": datetime.now(timezone.utc)})
+    assert not predicate({"time": datetime.now(timezone.utc) - timedelta(hours=2)})
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+from telescope.constants import UTC_ZONE
+from telescope.fetchers.models import Row, RowBatch, format_times, rows_as_dicts
+from telescope.models import Source
+from telescope.utils import get_telescope_column
+
+
+def make_source():
+    return Source(
+        kind="clickhouse",
+        time_column="time",
+        uniq_column="",
+        columns={
+            "time": get_telescope_column("time", "DateTime64(6)"),
+            "message": get_telescope_column("message", "String"),
+            "payload": get_telescope_column("payload", "String", jsonstring=True),
+        },
+    )
+
+
+def test_format_times_matches_strftime():
+    times = [
+        datetime(2024, 1, 2, 3, 4, 5, 6),
+        datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=3))),
+        datetime(1999, 12, 31, 23, 59, 59, 999999, tzinfo=UTC_ZONE),
+    ]
+    expected = []
+    for dt in times:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=UTC_ZONE)
+        expected.append(
+            {
+                "unixtime": int(dt.timestamp() * 1000),
+                "datetime": dt.strftime("%Y-%m-%d %H:%M:%S"),
+                "microseconds": dt.strftime("%f"),
+            }
+        )
+    assert format_times(times, UTC_ZONE) == expected
+
+
+def test_row_batch_serializes_like_rows():
+    source = make_source()
+    columns = ["_id", "message", "payload", "time"]
+    values = [
+        ("a", "hello", '{"key": 1}', datetime(2024, 1, 1, 0, 0, 1)),
+        ("b", "world", "{broken}", datetime(2024, 1, 1, 0, 0, 2, 500)),
+        ("c", '{"not": "json column"}', 3, datetime(2024, 1, 1, 0, 0, 3)),
+    ]
+    batch = RowBatch(source, columns, values, UTC_ZONE)
+
+    expected = [Row(source, columns, row, UTC_ZONE).as_dict() for row in values]
+    assert batch.as_dicts() == expected
+    assert rows_as_dicts(batch) == expected
+    assert rows_as_dicts(list(batch)) == expected
+    assert expected[0]["data"]["payload"] == {"key": 1}
+    assert expected[1]["data"]["payload"] == "{broken}"
+    assert expected[2]["data"]["message"] == '{"not": "json column"}'
+
+
+def test_row_is_a_view_of_its_batch():
+    source = make_source()
+    batch = RowBatch(
+        source,
+        ["time", "message", "payload"],
+        [(datetime(2024, 1, 1, tzinfo=UTC_ZONE), "hello", "")],
+    )
+    row = batch[0]
+    assert len(batch) == 1
+    assert row.data == {
+        "time": datetime(2024, 1, 1, tzinfo=UTC_ZONE),
+        "message": "hello",
+        "payload": "",
+    }
+    assert row.time is batch.times[0]
+    assert row.time["unixtime"] == 1704067200000
@@ -0,0 +1,111 @@
+from datetime import datetime
+from functools import partial
+
+from flyql.columns import parse as parse_columns
+
+from telescope.constants import UTC_ZONE
+from telescope.fetchers import aggregate
+from telescope.fetchers.aggregate import aggregate_container_log
+from telescope.fetchers.parse_pool import ParsePool
+from telescope.fetchers.kubernetes.api import ContainerMeta, parse_log_lines
+
+RAW_LOGS = "\n".join(
+    [
+        "2025-01-01T00:00:01.000000000Z GET /health 200",
+        "2025-01-01T00:00:02.000000000Z \x1b[31mERROR\x1b[0m db timeout",
+        "2025-01-01T00:00:03.000000000Z GET /api 500",
+        "2025-01-01T00:00:30.000000000Z out of range",
+    ]
+)
+TIME_FROM = datetime(2025, 1, 1, tzinfo=UTC_ZONE)
+TIME_TO = datetime(2025, 1, 1, 0, 0, 10, tzinfo=UTC_ZONE)
+PARSE_LINES = partial(parse_log_lines, time_from=TIME_FROM, time_to=TIME_TO)
+GRAPH_RANGE = (
+    int(TIME_FROM.timestamp() * 1000),
+    int(TIME_TO.timestamp() * 1000),
+)
+
+
+def make_meta():
+    return ContainerMeta(context="ctx", namespace="ns", pod="pod", container="app")
+
+
+def test_aggregate_container_log_keeps_top_entries_and_counts():
+    result = aggregate_container_log(
+        PARSE_LINES,
+        RAW_LOGS,
+        make_meta(),
+        query="container='app'",
+        limit=2,
+        graph_range=GRAPH_RANGE,
+    )
+
+    assert result.matched == 3
+    assert [e.message for e in result.entries] == ["GET /api 500", "ERROR db timeout"]
+    assert result.entries[0].meta is result.entries[1].meta
+    timestamps, data, total = result.counter.result()
+    assert total == 3
+    assert sum(data["Rows"]) == 3
+
+
+def test_parse_pool_runs_in_thread_when_disabled():
+    pool = ParsePool(max_workers=0, min_chunk_size=0)
+
+    result = pool.run(
+        partial(aggregate_container_log, PARSE_LINES), RAW_LOGS, make_meta()
+    )
+
+    assert result.matched == 3
+    assert result.entries == []
+    assert pool._executor is None
+
+
+def test_parse_pool_measures_chunks_in_bytes():
+    pool = ParsePool(max_workers=1, min_chunk_size=10)
+
+    assert pool._is_small("é" * 4)
+    assert not pool._is_small("é" * 5)
+    assert not pool._is_small("a" * 10)
+    assert pool._is_small(b"a" * 9)
+
+
+def test_parse_pool_offloads_large_chunks():
+    pool = ParsePool(max_workers=1, min_chunk_size=10)
+    try:
+        result = pool.run(
+            partial(aggregate_container_log, PARSE_LINES),
+            RAW_LOGS,
+            make_meta(),
+            limit=1,
+            graph_range=GRAPH_RANGE,
+        )
+        assert pool._executor is not None
+    finally:
+        if pool._executor is not None:
+            pool._executor.shutdown()
+
+    assert result.matched == 3
+    assert result.entries[0].message == "GET /api 500"
+    assert result.entries[0].context == "ctx"
+    assert result.counter.total == 3
+
+
+def test_aggregate_container_log_counts_graph_points_in_batches(monkeypatch):
+    monkeypatch.setattr(aggregate, "GRAPH_BATCH_SIZE", 2)
+    group_by = parse_columns("message")[0]
+
+    result = aggregate_container_log(
+        PARSE_LINES,
+        RAW_LOGS,
+        make_meta(),
+        graph_range=GRAPH_RANGE,
+        group_by=group_by,
+    )
+
+    timestamps, data, total = result.counter.result()
+    assert total == 3
+    assert {name: sum(series) for name, series in data.items()} == {
+        "GET /health 200": 1,
+        "ERROR db timeout": 1,
+        "GET /api 500": 1,
+    }
@@ -0,0 +1,98 @@
+import pytest
+
+from telescope.fetchers.clickhouse import Fetcher as ClickhouseFetcher
+from telescope.fetchers.docker.fetcher import Fetcher as DockerFetcher
+from telescope.fetchers.kubernetes.fetcher import Fetcher as KubernetesFetcher
+from telescope.fetchers.query import clear_query_cache
+from telescope.fetchers.request import DataRequest
+from telescope.models import Source
+from telescope.utils import get_telescope_column
+
+
+@pytest.fixture(autouse=True)
+def query_cache():
+    clear_query_cache()
+    yield
+    clear_query_cache()
+
+
+@pytest.fixture
+def source():
+    return Source(kind="docker", columns={})
+
+
+def test_query_is_compiled_once(source):
+    query = DockerFetcher.get_query(source, "status=200")
+    assert query.text == "status=200"
+    assert query.sql is None
+    assert DockerFetcher.get_query(source, "status=200") is query
+    assert DockerFetcher.get_query(source, "status=404") is not query
+    assert DockerFetcher.get_query(source, "") is None
+
+
+def test_query_predicate_is_compiled_on_first_use(source):
+    query = DockerFetcher.get_query(source, "status=200")
+    predicate = query.predicate
+    assert query.predicate is predicate
+    assert predicate({"status": 200})
+    assert not predicate({"status": 404})
+
+
+def test_query_is_recompiled_when_source_version_changes(source, monkeypatch):
+    query = DockerFetcher.get_query(source, "status=200")
+    monkeypatch.setattr(
+        DockerFetcher, "get_query_version", classmethod(lambda cls, source: 2)
+    )
+    assert DockerFetcher.get_query(source, "status=200") is not query
+
+
+def test_queries_are_cached_per_fetcher(source):
+    query = DockerFetcher.get_query(source, "status=200")
+    assert KubernetesFetcher.get_query(source, "status=200") is not query
+
+
+def test_invalid_query_is_not_cached(source, monkeypatch):
+    calls = []
+    compile_query = DockerFetcher.compile_query
+
+    def counting_compile_query(source, query):
+        calls.append(query)
+        return compile_query(source, query)
+
+    monkeypatch.setattr(DockerFetcher, "compile_query", counting_compile_query)
+    for _ in range(2):
+        valid, error = DockerFetcher.validate_query(source, "status=(")
+        assert not valid
+        assert error
+    assert len(calls) == 2
+
+
+def test_request_uses_compiled_query(source):
+    compiled = DockerFetcher.get_query(source, "status=200")
+    request = DataRequest(
+        source=source,
+        query="status=200",
+        raw_query="",
+        time_from=0,
+        time_to=0,
+        limit=10,
+        context_columns={},
+        compiled_query=compiled,
+    )
+    assert DockerFetcher.get_request_query(request) is compiled
+    request.compiled_query = None
+    assert DockerFetcher.get_request_query(request) is compiled
+
+
+def test_clickhouse_query_is_compiled_to_sql():
+    source = Source(
+        pk=1,
+        kind="clickhouse",
+        columns={
+            "message": get_telescope_column("message", "String"),
+            "payload": get_telescope_column("payload", "String", jsonstring=True),
+        },
+    )
+    query = ClickhouseFetcher.get_query(source, "message='hello' and payload.user=1")
+    assert "message = 'hello'" in query.sql
+    assert "JSONExtract" in query.sql
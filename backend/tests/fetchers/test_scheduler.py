@@ -0,0 +1,197 @@
+import time
+import threading
+
+import pytest
+
+from telescope.fetchers.scheduler import (
+    FetchScheduler,
+    FetchTask,
+    DeadlineExceededError,
+    get_request_deadline,
+)
+
+
+@pytest.fixture
+def scheduler():
+    return FetchScheduler(max_workers=8, max_per_request=8)
+
+
+def test_run_collects_results_and_errors(scheduler):
+    def fail():
+        raise ValueError("boom")
+
+    tasks = [
+        FetchTask(key="a", target="t1", func=lambda: 1),
+        FetchTask(key="b", target="t2", func=lambda: 2),
+        FetchTask(key="c", target="t1", func=fail),
+    ]
+    results, errors, stats = scheduler.run(tasks, default_target_limit=2)
+
+    assert results == {"a": 1, "b": 2}
+    assert isinstance(errors["c"], ValueError)
+    assert stats.tasks == 3
+    assert stats.completed == 2
+    assert stats.failed == 1
+    assert stats.skipped == 0
+
+
+def _tracking_task(key, target, counters, lock, sleep=0.02):
+    def func():
+        with lock:
+            counters["current"][target] = counters["current"].get(target, 0) + 1
+            counters["total"] += 1
+            counters["max_target"][target] = max(
+                counters["max_target"].get(target, 0), counters["current"][target]
+            )
+            counters["max_total"] = max(counters["max_total"], counters["total"])
+        time.sleep(sleep)
+        with lock:
+            counters["current"][target] -= 1
+            counters["total"] -= 1
+        return key
+
+    return FetchTask(key=key, target=target, func=func)
+
+
+def test_run_respects_target_and_request_limits(scheduler):
+    lock = threading.Lock()
+    counters = {"current": {}, "total": 0, "max_target": {}, "max_total": 0}
+    tasks = [
+        _tracking_task(f"{target}-{i}", target, counters, lock)
+        for target in ["ctx1", "ctx2", "ctx3"]
+        for i in range(6)
+    ]
+
+    results, errors, _ = scheduler.run(
+        tasks,
+        target_limits={"ctx1": 1},
+        default_target_limit=2,
+        max_per_request=4,
+    )
+
+    assert not errors
+    assert len(results) == 18
+    assert counters["max_target"]["ctx1"] == 1
+    assert counters["max_target"]["ctx2"] <= 2
+    assert counters["max_target"]["ctx3"] <= 2
+    assert counters["max_total"] <= 4
+
+
+def test_run_target_limit_is_shared_between_requests(scheduler):
+    lock = threading.Lock()
+    counters = {"current": {}, "total": 0, "max_target": {}, "max_total": 0}
+
+    def run_request(prefix):
+        scheduler.run(
+            [_tracking_task(f"{prefix}-{i}", "ctx", counters, lock) for i in range(4)],
+            default_target_limit=2,
+        )
+
+    threads = [threading.Thread(target=run_request, args=(p,)) for p in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counters["max_target"]["ctx"] <= 2
+
+
+def test_run_target_limit_can_change(scheduler):
+    lock = threading.Lock()
+
+    def run_request(prefix, limit):
+        counters = {"current": {}, "total": 0, "max_target": {}, "max_total": 0}
+        scheduler.run(
+            [_tracking_task(f"{prefix}-{i}", "ctx", counters, lock) for i in range(6)],
+            default_target_limit=limit,
+        )
+        return counters["max_target"]["ctx"]
+
+    assert run_request("a", 1) == 1
+    assert run_request("b", 3) == 3
+    assert run_request("c", 2) == 2
+
+
+def test_run_target_limit_applies_to_tasks_of_other_requests(scheduler):
+    lock = threading.Lock()
+    counters = {"current": {}, "total": 0, "max_target": {}, "max_total": 0}
+    started = threading.Event()
+
+    def run_request(prefix, limit):
+        tasks = [
+            _tracking_task(f"{prefix}-{i}", "ctx", counters, lock, sleep=0.1)
+            for i in range(3)
+        ]
+        started.set()
+        scheduler.run(tasks, default_target_limit=limit)
+
+    wide = threading.Thread(target=run_request, args=("a", 3))
+    wide.start()
+    started.wait(5)
+    time.sleep(0.02)
+    # the target is saturated by the first request, so a request with a
+    # lower limit waits for the running tasks instead of adding to them
+    run_request("b", 1)
+    wide.join()
+
+    assert counters["max_target"]["ctx"] == 3
+
+
+def test_run_deadline_skips_remaining_tasks(scheduler):
+    tasks = [
+        FetchTask(key=i, target="ctx", func=lambda: time.sleep(0.2)) for i in range(4)
+    ]
+    started = time.monotonic()
+    results, errors, stats = scheduler.run(
+        tasks,
+        default_target_limit=1,
+        deadline=time.monotonic() + 0.05,
+    )
+
+    assert time.monotonic() - started < 0.2
+    assert not results
+    assert len(errors) == 4
+    assert all(isinstance(err, DeadlineExceededError) for err in errors.values())
+    assert stats.skipped == 4
+
+    # semaphores of cancelled and abandoned tasks are released
+    time.sleep(0.25)
+    results, errors, _ = scheduler.run(
+        [FetchTask(key="next", target="ctx", func=lambda: "ok")],
+        default_target_limit=1,
+    )
+    assert results == {"next": "ok"}
+
+
+def test_stats_separate_queue_and_fetch_time(scheduler):
+    tasks = [
+        FetchTask(key=i, target="ctx", func=lambda: time.sleep(0.03)) for i in range(2)
+    ]
+    _, _, stats = scheduler.run(tasks, default_target_limit=1)
+    data = stats.as_dict()
+
+    assert data["completed"] == 2
+    assert data["fetch_time_max"] >= 0.03
+    # second task waits for the first one to release the target slot
+    assert data["queue_time_max"] >= 0.03
+
+
+def test_iter_run_yields_tasks_as_they_finish(scheduler):
+    tasks = [
+        FetchTask(key="slow", target="t1", func=lambda: time.sleep(0.1) or "slow"),
+        FetchTask(key="fast", target="t2", func=lambda: "fast"),
+    ]
+    keys = [task.key for task, _, _ in scheduler.iter_run(tasks)]
+
+    assert keys == ["fast", "slow"]
+
+
+def test_request_deadline_is_capped(settings):
+    settings.CONFIG = {
+        "fetchers": {"deadline": {"timeout": 60, "max_timeout": 110}},
+    }
+    now = time.monotonic()
+
+    assert 59 < get_request_deadline() - now <= 60.5
+    assert 9 < get_request_deadline(10) - now <= 10.5
+    assert 109 < get_request_deadline(1000) - now <= 110.5
@@ -3,6 +3,13 @@ import pytest
 from django.contrib.auth.models import User
 
 from telescope.models import Source, SavedView, Connection
+from telescope.auth.token import (
+    get_invalid_tokens_cache,
+    get_token_failures,
+    get_tokens_cache,
+)
+from telescope.cache import get_sources_cache
+from telescope.rbac.cache import get_permissions_cache
 from telescope.services.source import SourceService
 from telescope.services.connection import ConnectionService
 
@@ -17,6 +24,32 @@ from tests.data import (
 )
 
 
+@pytest.fixture(autouse=True)
+def permissions_cache():
+    # test databases are rolled back without signals, ids get reused
+    get_permissions_cache().clear()
+    yield get_permissions_cache()
+    get_permissions_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def sources_cache():
+    get_sources_cache().clear()
+    yield get_sources_cache()
+    get_sources_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def tokens_cache():
+    get_tokens_cache().clear()
+    get_invalid_tokens_cache().clear()
+    get_token_failures().clear()
+    yield get_tokens_cache()
+    get_tokens_cache().clear()
+    get_invalid_tokens_cache().clear()
+    get_token_failures().clear()
+
+
 @pytest.fixture
 def service():
     return SourceService()
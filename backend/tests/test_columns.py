@@ -129,7 +129,10 @@ class TestParseColumns:
 
         result = parse_columns(mock_source, "message|upper|chars(10)")
         assert len(result) == 1
-        assert len(result[0].modifiers) == 2
+        assert result[0].modifiers == [
+            {"name": "upper", "arguments": []},
+            {"name": "chars", "arguments": [10]},
+        ]
 
     def test_unknown_column_raises_error(self):
         mock_source = MagicMock()
@@ -0,0 +1,39 @@
+import pytest
+
+from telescope.models import Source
+
+
+@pytest.mark.django_db
+def test_source_columns_are_built_once_per_version(clickhouse_source):
+    source_columns = clickhouse_source.source_columns
+    assert clickhouse_source.source_columns is source_columns
+    assert clickhouse_source._columns is source_columns.columns
+    assert list(source_columns.names) == sorted(clickhouse_source.columns)
+    assert source_columns.columns["event_time"].base_type == "datetime64"
+
+    # another instance of the same stored source shares the metadata
+    assert Source.objects.get(pk=clickhouse_source.pk).source_columns is source_columns
+
+    with pytest.raises(TypeError):
+        source_columns.columns["other"] = source_columns.columns["event_time"]
+
+
+@pytest.mark.django_db
+def test_source_columns_are_rebuilt_when_source_is_saved(clickhouse_source):
+    source_columns = clickhouse_source.source_columns
+    stale = Source.objects.get(pk=clickhouse_source.pk)
+    version = clickhouse_source.version
+
+    clickhouse_source.columns = {
+        **clickhouse_source.columns,
+        "extra": {**clickhouse_source.columns["event_time"], "jsonstring": True},
+    }
+    clickhouse_source.save()
+
+    assert clickhouse_source.version == version + 1
+    assert clickhouse_source.source_columns is not source_columns
+    assert "extra" in clickhouse_source._columns
+    assert clickhouse_source.source_columns.columns["extra"].jsonstring
+    assert "extra" in Source.objects.get(pk=clickhouse_source.pk)._columns
+    # instances loaded before the save keep the metadata of their version
+    assert "extra" not in stale._columns
@@ -0,0 +1,85 @@
+import pytest
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+
+from telescope.models import Source, SourceRoleBinding
+from telescope.rbac import permissions
+from telescope.rbac.cache import VERSION_KEY
+from telescope.rbac.manager import RBACManager
+from telescope.rbac.roles import GlobalRole, SourceRole
+
+rbac_manager = RBACManager()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="cached_user", password="pass")
+
+
+@pytest.mark.django_db
+def test_permissions_are_loaded_once(
+    user, docker_source, permissions_cache, django_assert_num_queries, monkeypatch
+):
+    monkeypatch.setattr(permissions_cache, "version_check_interval", 3600)
+    rbac_manager.grant_source_role(docker_source, SourceRole.USER.value, user=user)
+    rbac_manager.get_source(user, docker_source.slug)
+
+    # the source itself only
+    with django_assert_num_queries(1):
+        source = rbac_manager.get_source(
+            user, docker_source.slug, [permissions.Source.USE.value]
+        )
+    assert permissions.Source.USE.value in source.permissions
+    with django_assert_num_queries(0):
+        assert not rbac_manager.user_has_source_permissions(
+            user, docker_source.slug, [permissions.Source.RAW_QUERY.value]
+        )
+
+
+@pytest.mark.django_db
+def test_role_bindings_invalidate_permissions(user, docker_source):
+    with pytest.raises(Source.DoesNotExist):
+        rbac_manager.get_source(user, docker_source.slug)
+
+    rbac_manager.grant_source_role(docker_source, SourceRole.VIEWER.value, user=user)
+    assert rbac_manager.get_source(user, docker_source.slug)
+
+    rbac_manager.revoke_source_role(docker_source, SourceRole.VIEWER.value, user=user)
+    assert rbac_manager.get_sources(user) == []
+
+    rbac_manager.grant_global_role(GlobalRole.ADMIN.value, user=user)
+    assert rbac_manager.get_sources(user) == [docker_source]
+
+
+@pytest.mark.django_db
+def test_group_membership_invalidates_permissions(user, docker_source):
+    group = Group.objects.create(name="viewers")
+    rbac_manager.grant_source_role(docker_source, SourceRole.VIEWER.value, group=group)
+    assert rbac_manager.get_sources(user) == []
+
+    user.groups.add(group)
+    assert rbac_manager.get_sources(user) == [docker_source]
+
+    user.groups.remove(group)
+    assert rbac_manager.get_sources(user) == []
+
+
+@pytest.mark.django_db
+def test_changes_from_other_processes_are_seen(
+    user, docker_source, permissions_cache, monkeypatch
+):
+    monkeypatch.setattr(permissions_cache, "version_check_interval", 0)
+    assert rbac_manager.get_sources(user) == []
+
+    # as if another process changed the bindings: bulk_create sends no signals
+    SourceRoleBinding.objects.bulk_create(
+        [
+            SourceRoleBinding(
+                user=user, source=docker_source, role=SourceRole.VIEWER.value
+            )
+        ]
+    )
+    assert rbac_manager.get_sources(user) == []
+
+    cache.set(VERSION_KEY, "changed elsewhere", timeout=None)
+    assert rbac_manager.get_sources(user) == [docker_source]
@@ -0,0 +1,41 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from telescope.fetchers.response import GraphDataResponse
+
+
+@pytest.fixture
+def client(root_user):
+    client = APIClient()
+    client.force_login(root_user)
+    return client
+
+
+@pytest.mark.django_db
+def test_graph_data_request_timeout(client, docker_source):
+    fetcher = MagicMock()
+    fetcher.fetch_graph_data.return_value = GraphDataResponse(
+        timestamps=[], data={}, total=0
+    )
+    with patch(
+        "telescope.views.source.views.get_fetchers",
+        return_value={docker_source.kind: fetcher},
+    ):
+        response = client.post(
+            f"/ui/v1/sources/{docker_source.slug}/graphData",
+            {
+                "from": "now-5m",
+                "to": "now",
+                "group_by": "",
+                "context_columns": {},
+                "timeout": 5,
+            },
+            format="json",
+        )
+
+    assert response.status_code == 200
+    request = fetcher.fetch_graph_data.call_args[0][0]
+    assert request.deadline - time.monotonic() <= 5
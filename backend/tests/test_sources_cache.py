@@ -0,0 +1,72 @@
+import pytest
+from django.contrib.auth.models import User
+
+from telescope.models import Source
+from telescope.rbac import permissions
+from telescope.rbac.manager import RBACManager
+from telescope.rbac.roles import SourceRole
+
+rbac_manager = RBACManager()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="snapshot_user", password="pass")
+
+
+@pytest.mark.django_db
+def test_snapshots_are_loaded_once(
+    user,
+    docker_source,
+    permissions_cache,
+    sources_cache,
+    django_assert_num_queries,
+    monkeypatch,
+):
+    monkeypatch.setattr(permissions_cache, "version_check_interval", 3600)
+    monkeypatch.setattr(sources_cache, "version_check_interval", 3600)
+    rbac_manager.grant_source_role(docker_source, SourceRole.USER.value, user=user)
+    first = rbac_manager.get_source_snapshot(user, docker_source.slug)
+
+    with django_assert_num_queries(0):
+        second = rbac_manager.get_source_snapshot(
+            user, docker_source.slug, [permissions.Source.USE.value]
+        )
+        assert second.conn.kind == "docker"
+    assert second == docker_source
+    assert second is not first
+    assert second.permissions == first.permissions
+    assert second.permissions is not first.permissions
+    assert permissions.Source.USE.value in second.permissions
+
+
+@pytest.mark.django_db
+def test_saving_invalidates_snapshots(user, docker_source):
+    rbac_manager.grant_source_role(docker_source, SourceRole.USER.value, user=user)
+    assert rbac_manager.get_source_snapshot(user, docker_source.slug).name != "renamed"
+
+    docker_source.name = "renamed"
+    docker_source.save()
+    assert rbac_manager.get_source_snapshot(user, docker_source.slug).name == "renamed"
+
+    docker_source.conn.name = "renamed connection"
+    docker_source.conn.save()
+    snapshot = rbac_manager.get_source_snapshot(user, docker_source.slug)
+    assert snapshot.conn.name == "renamed connection"
+
+
+@pytest.mark.django_db
+def test_snapshots_require_permissions(user, docker_source):
+    with pytest.raises(Source.DoesNotExist):
+        rbac_manager.get_source_snapshot(user, docker_source.slug)
+
+    rbac_manager.grant_source_role(docker_source, SourceRole.VIEWER.value, user=user)
+    assert rbac_manager.get_source_snapshot(user, docker_source.slug)
+    with pytest.raises(Source.DoesNotExist):
+        rbac_manager.get_source_snapshot(
+            user, docker_source.slug, [permissions.Source.USE.value]
+        )
+
+    docker_source.delete()
+    with pytest.raises(Source.DoesNotExist):
+        rbac_manager.get_source_snapshot(user, "docker")
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+
+from telescope.auth.token import TokenAuth, get_invalid_tokens_cache
+from telescope.models import APIToken
+
+auth = TokenAuth()
+
+
+def make_request(token, remote_addr="10.0.0.1"):
+    return RequestFactory().get(
+        "/api/v1/sources",
+        HTTP_AUTHORIZATION=f"Token {token}",
+        REMOTE_ADDR=remote_addr,
+    )
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="token_user", password="pass")
+
+
+@pytest.fixture
+def api_token(user):
+    return APIToken.create(user=user, name="automation")
+
+
+@pytest.mark.django_db
+def test_tokens_are_loaded_once(
+    api_token, tokens_cache, django_assert_num_queries, monkeypatch
+):
+    monkeypatch.setattr(tokens_cache, "version_check_interval", 3600)
+    monkeypatch.setattr(get_invalid_tokens_cache(), "version_check_interval", 3600)
+    first, _ = auth.authenticate(make_request(api_token.token))
+
+    with django_assert_num_queries(0):
+        second, _ = auth.authenticate(make_request(api_token.token))
+    assert first == second == api_token.user
+    assert second is not first
+    assert api_token.token not in repr(list(tokens_cache._entries.keys()))
+
+
+@pytest.mark.django_db
+def test_deleted_tokens_are_rejected(client, user, api_token):
+    assert auth.authenticate(make_request(api_token.token))[0] == user
+
+    client.force_login(user)
+    response = client.post(
+        "/ui/v1/auth/api_tokens/delete",
+        {"tokens": [api_token.token]},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert not APIToken.objects.exists()
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(make_request(api_token.token))
+
+
+@pytest.mark.django_db
+def test_invalid_tokens_are_cached_and_throttled(
+    user, django_assert_num_queries, settings, monkeypatch
+):
+    monkeypatch.setitem(settings.CONFIG["auth"]["token_cache"], "max_failures", 3)
+    monkeypatch.setattr(get_invalid_tokens_cache(), "version_check_interval", 3600)
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(make_request("unknown"))
+    # cached as invalid
+    with django_assert_num_queries(0):
+        with pytest.raises(AuthenticationFailed):
+            auth.authenticate(make_request("unknown"))
+
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(make_request("another"))
+    valid_token = APIToken.create(user=user, name="valid")
+    with pytest.raises(Throttled):
+        auth.authenticate(make_request(valid_token.token))
+    assert auth.authenticate(make_request(valid_token.token, "10.0.0.2"))[0] == user
+
+
+@pytest.mark.django_db
+def test_valid_tokens_are_accepted_from_throttled_addresses(
+    api_token, settings, monkeypatch
+):
+    monkeypatch.setitem(settings.CONFIG["auth"]["token_cache"], "max_failures", 1)
+    assert auth.authenticate(make_request(api_token.token))[0] == api_token.user
+
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate(make_request("unknown"))
+    with pytest.raises(Throttled):
+        auth.authenticate(make_request("unknown"))
+    assert auth.authenticate(make_request(api_token.token))[0] == api_token.user
+
+
+@pytest.mark.django_db
+def test_invalid_tokens_are_not_throttled_by_default(user):
+    for _ in range(50):
+        with pytest.raises(AuthenticationFailed):
+            auth.authenticate(make_request("unknown"))